@@ -0,0 +1,7 @@
+# ===================================================================
+# --- CÓDIGO COMPARTILHADO ENTRE MODELOFINAL E PHOENIX ---
+# ===================================================================
+#
+# Módulos que as duas pastas usam iguais. Os scripts continuam importando
+# pelo nome curto (import visao): o arquivo de mesmo nome em cada pasta só
+# coloca a raiz do repositório no sys.path e devolve o módulo daqui.
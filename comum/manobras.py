@@ -0,0 +1,149 @@
+import time
+
+# ===================================================================
+# --- MANOBRAS SEM BLOQUEIO (SEQUÊNCIAS DE SEGMENTOS) ---
+# ===================================================================
+#
+# Uma manobra é uma lista de segmentos. Em vez de time.sleep, quem controla
+# os motores chama tick() a cada frame com o que a visão viu: a manobra troca
+# de segmento quando o atual termina e acaba sozinha. Enquanto isso a câmera
+# e a visão continuam rodando.
+#
+#   Segmento:       (velocidade L, velocidade R) por um tempo fixo; se abortavel,
+#                   a linha reencontrada encerra a manobra inteira
+#   AvancoAteSair:  anda para frente enquanto a visão ainda mostra a marcação
+#   GiroAteLinha:   gira até a linha voltar ao centro (fechado pela visão)
+#
+#   m = Manobra("Curva de 90 Direita", [AvancoAteSair(20, acao, 0.6), GiroAteLinha('right', 25, 1.5)], aplicar)
+#   m.iniciar()
+#   ... a cada frame: if not m.tick(linha_encontrada, erro=erro, acao=acao): m = None
+#
+# erro segue a convenção do modelofinal: positivo = linha à direita do centro.
+
+class Segmento:
+    __slots__ = ('velocidade_L', 'velocidade_R', 'duracao', 'abortavel', 'fim')
+    def __init__(self, velocidade_L, velocidade_R, duracao, abortavel=False):
+        self.velocidade_L, self.velocidade_R = velocidade_L, velocidade_R
+        self.duracao, self.abortavel = duracao, abortavel
+
+    def comecar(self, agora):
+        self.fim = agora + self.duracao
+        return self.velocidade_L, self.velocidade_R
+
+    def atualizar(self, agora, linha, erro, acao):
+        """Velocidades (L, R) a aplicar, ou None quando o segmento terminou."""
+        return None if agora >= self.fim else (self.velocidade_L, self.velocidade_R)
+
+def frente(velocidade, duracao, abortavel=False): return Segmento(velocidade, velocidade, duracao, abortavel)
+def tras(velocidade, duracao, abortavel=False): return Segmento(-velocidade, -velocidade, duracao, abortavel)
+def pausa(duracao): return Segmento(0, 0, duracao)
+
+def girar(direcao, velocidade, duracao, abortavel=False):
+    if direcao == 'left': return Segmento(-velocidade, velocidade, duracao, abortavel)
+    return Segmento(velocidade, -velocidade, duracao, abortavel)
+
+class AvancoAteSair(Segmento):
+    """
+    Anda para frente até a marcação que disparou a manobra (acao) sair da
+    visão por QUADROS_LIVRE frames seguidos, ou até o tempo máximo.
+    """
+    __slots__ = ('acao', 'livres')
+    QUADROS_LIVRE = 2
+
+    def __init__(self, velocidade, acao, tempo_maximo):
+        super().__init__(velocidade, velocidade, tempo_maximo)
+        self.acao, self.livres = acao, 0
+
+    def atualizar(self, agora, linha, erro, acao):
+        if agora >= self.fim: return None
+        self.livres = 0 if acao == self.acao else self.livres + 1
+        return None if self.livres >= self.QUADROS_LIVRE else (self.velocidade_L, self.velocidade_R)
+
+class GiroAteLinha(Segmento):
+    """
+    Gira no lugar até a linha ficar a até `tolerancia` px do centro, ou até o
+    tempo máximo. Primeiro sai da linha em que está (se houver), ignora as
+    `ignorar` próximas linhas que cruzar (meia volta passa pelo braço do
+    cruzamento) e, com a linha certa à vista, reduz a velocidade proporcional
+    ao erro (nunca abaixo de velocidade_minima), girando para o lado dela.
+    """
+    __slots__ = ('direcao', 'velocidade', 'ignorar', 'tolerancia', 'erro_desacelerar', 'velocidade_minima', 'fase', 'lado')
+
+    def __init__(self, direcao, velocidade, tempo_maximo, ignorar=0, tolerancia=20, erro_desacelerar=160, velocidade_minima=12):
+        super().__init__(0, 0, tempo_maximo)
+        self.direcao, self.velocidade, self.ignorar = direcao, velocidade, ignorar
+        self.tolerancia, self.erro_desacelerar, self.velocidade_minima = tolerancia, erro_desacelerar, velocidade_minima
+        self.fase, self.lado = 'saindo', (1 if direcao == 'right' else -1)
+
+    def _giro(self, lado, velocidade):
+        return (velocidade, -velocidade) if lado > 0 else (-velocidade, velocidade)
+
+    def comecar(self, agora):
+        self.fim = agora + self.duracao
+        return self._giro(self.lado, self.velocidade)
+
+    def atualizar(self, agora, linha, erro, acao):
+        if agora >= self.fim: return None
+        if self.fase == 'saindo':
+            if not linha: self.fase = 'procurando'
+        elif self.fase == 'procurando' and linha:
+            if self.ignorar > 0: self.ignorar -= 1; self.fase = 'saindo'
+            else: self.fase = 'centralizando'
+        if self.fase != 'centralizando': return self._giro(self.lado, self.velocidade)
+
+        if linha and erro is not None:
+            if abs(erro) <= self.tolerancia: return None
+            self.lado = 1 if erro > 0 else -1 # Passou do centro: volta devagar
+            fator = min(1.0, abs(erro) / self.erro_desacelerar)
+        else: fator = 0.0 # Perdeu a linha de vista: devagar para o lado em que ela estava
+        return self._giro(self.lado, max(self.velocidade_minima, self.velocidade * fator))
+
+class Manobra:
+    """
+    Executa os segmentos em ordem, chamando aplicar(velocidade_L, velocidade_R)
+    só quando a velocidade muda. Ao terminar (ou abortar) aplica (0, 0).
+    """
+    def __init__(self, nome, segmentos, aplicar):
+        self.nome, self.segmentos, self.aplicar = nome, list(segmentos), aplicar
+        self.indice, self.velocidades = len(self.segmentos), None
+        self.abortada = False
+
+    @property
+    def ativa(self):
+        return self.indice < len(self.segmentos)
+
+    def _aplicar(self, velocidades):
+        if velocidades != self.velocidades:
+            self.velocidades = velocidades
+            self.aplicar(*velocidades)
+
+    def _entrar(self, indice, agora):
+        self.indice = indice
+        if not self.ativa: self._aplicar((0, 0))
+        else: self._aplicar(self.segmentos[indice].comecar(agora))
+
+    def iniciar(self, agora=None):
+        self.abortada = False
+        self._entrar(0, time.monotonic() if agora is None else agora)
+        return self
+
+    def tick(self, linha_encontrada=False, agora=None, erro=None, acao=None):
+        """Avança a manobra com o que a visão viu neste frame; devolve True enquanto ela não terminou."""
+        if not self.ativa: return False
+        agora = time.monotonic() if agora is None else agora
+        if linha_encontrada and self.segmentos[self.indice].abortavel:
+            self.abortada = True
+            self._entrar(len(self.segmentos), agora)
+            return False
+        while self.ativa:
+            velocidades = self.segmentos[self.indice].atualizar(agora, linha_encontrada, erro, acao)
+            if velocidades is not None:
+                self._aplicar(velocidades)
+                break
+            self._entrar(self.indice + 1, agora)
+        return self.ativa
+
+    def abortar(self):
+        if self.ativa:
+            self.abortada = True
+            self._entrar(len(self.segmentos), time.monotonic())
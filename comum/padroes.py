@@ -0,0 +1,76 @@
+# ===================================================================
+# --- BIBLIOTECA DE PADRÕES DE LADRILHOS (OBR) ---
+# ===================================================================
+#
+# Os estados das cinco zonas viram um número inteiro (2 bits por zona).
+# Na importação, todas as 4^5 = 1024 combinações possíveis são comparadas
+# com os padrões abaixo e o resultado fica numa tabela: durante a rodada a
+# decisão é uma única consulta, TABELA_ACOES[codigo].
+#
+# Para adicionar um tipo de ladrilho basta incluir uma linha em PADROES_OBR.
+
+ORDEM_ZONAS = ('CM', 'CE', 'CD', 'BE', 'BD')
+CODIGO_ESTADO = {"Branco": 0, "Preto": 1, "Verde": 2, "Vermelho": 3}
+ESTADOS = ("Branco", "Preto", "Verde", "Vermelho")
+
+ACAO_PADRAO = "Seguindo Linha"
+
+# (nome, ação, {zona: estado esperado}, tolerância)
+# A ordem é a prioridade e as linhas são exatamente a antiga cadeia de
+# if/elif: a tabela decide igual a ela em todas as 1024 combinações. Zonas
+# fora do dicionário não importam. A tolerância é quantas zonas podem estar
+# erradas (distância de Hamming); aqui todas são 0. Padrões novos (cruzamento
+# +, T, verde sozinho) mudam a decisão na pista e entram só depois de
+# testados no robô.
+PADROES_OBR = [
+    ("fim (vermelho CM)",       "Fim de Pista",         {'CM': "Vermelho"}, 0),
+    ("fim (vermelho CE)",       "Fim de Pista",         {'CE': "Vermelho"}, 0),
+    ("fim (vermelho CD)",       "Fim de Pista",         {'CD': "Vermelho"}, 0),
+    ("fim (vermelho BE)",       "Fim de Pista",         {'BE': "Vermelho"}, 0),
+    ("fim (vermelho BD)",       "Fim de Pista",         {'BD': "Vermelho"}, 0),
+    ("cruzamento na base",      "Seguir em Frente",     {'BE': "Preto", 'BD': "Preto"}, 0),
+    ("beco (dois verdes)",      "Meia Volta",           {'BE': "Verde", 'BD': "Verde"}, 0),
+    ("90 esquerda",             "Curva de 90 Esquerda", {'CE': "Preto", 'CD': "Branco", 'CM': "Branco"}, 0),
+    ("90 direita",              "Curva de 90 Direita",  {'CD': "Preto", 'CE': "Branco", 'CM': "Branco"}, 0),
+]
+
+def codificar_zonas(zone_states):
+    """Empacota os estados das zonas num inteiro (2 bits por zona, na ordem de ORDEM_ZONAS)."""
+    codigo = 0
+    for i, zona in enumerate(ORDEM_ZONAS):
+        codigo |= CODIGO_ESTADO.get(zone_states[zona], 0) << (2 * i)
+    return codigo
+
+def decodificar_zonas(codigo):
+    return {zona: ESTADOS[(codigo >> (2 * i)) & 3] for i, zona in enumerate(ORDEM_ZONAS)}
+
+def _distancia(estados, restricoes):
+    return sum(estados[zona] != esperado for zona, esperado in restricoes.items())
+
+def compilar_padroes(padroes):
+    """
+    Gera a tabela código -> ação. Para cada código vence o padrão de menor
+    distância; empates na distância 0 ficam com o de maior prioridade (ordem
+    da lista). Um empate com erro (distância > 0) entre ações diferentes é
+    ambíguo e cai em ACAO_PADRAO.
+    """
+    tabela = []
+    for codigo in range(4 ** len(ORDEM_ZONAS)):
+        estados = decodificar_zonas(codigo)
+        melhor_dist, acoes = None, []
+        for _nome, acao, restricoes, tolerancia in padroes:
+            d = _distancia(estados, restricoes)
+            if d > tolerancia: continue
+            if melhor_dist is None or d < melhor_dist: melhor_dist, acoes = d, [acao]
+            elif d == melhor_dist: acoes.append(acao)
+
+        if melhor_dist is None: tabela.append(ACAO_PADRAO)
+        elif melhor_dist == 0 or len(set(acoes)) == 1: tabela.append(acoes[0])
+        else: tabela.append(ACAO_PADRAO)
+    return tabela
+
+TABELA_ACOES = compilar_padroes(PADROES_OBR)
+
+def decidir(zone_states):
+    """Ação para os estados das zonas: uma consulta na tabela pré-compilada."""
+    return TABELA_ACOES[codificar_zonas(zone_states)]
@@ -0,0 +1,143 @@
+import cv2
+import numpy as np
+
+# ===================================================================
+# --- CLASSIFICAÇÃO DE CORES POR TABELA DE CONSULTA (LUT) ---
+# ===================================================================
+
+# Cada pixel recebe um rótulo com bits independentes, igual às máscaras
+# originais (um pixel vermelho escuro conta como vermelho E como preto).
+# Rótulo 0 = nenhuma máscara = "Branco".
+BIT_PRETO = 1
+BIT_VERDE = 2
+BIT_VERMELHO = 4
+
+# Bits por canal da LUT: 5 -> 32x32x32 (32 KB), 6 -> 64x64x64 (256 KB)
+LUT_BITS = 5
+
+def construir_lut(calib, bits=LUT_BITS):
+    """
+    Monta a tabela BGR -> rótulo a partir das variáveis de calibração.
+    Só precisa ser refeita quando a calibração muda.
+    """
+    n = 1 << bits
+    passo = 256 // n
+    centros = (np.arange(n) * passo + passo // 2).astype(np.uint8)
+
+    # Todas as combinações (B, G, R) dos centros dos bins, na ordem do índice
+    b, g, r = np.meshgrid(centros, centros, centros, indexing='ij')
+    bgr = np.stack([b, g, r], axis=-1).reshape(-1, 1, 3)
+
+    # A conversão HSV é feita uma única vez aqui, nunca por frame
+    hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY).reshape(-1)
+
+    mask_red = cv2.inRange(hsv, calib['LOWER_RED1'], calib['UPPER_RED1']) | \
+               cv2.inRange(hsv, calib['LOWER_RED2'], calib['UPPER_RED2'])
+    mask_green = cv2.inRange(hsv, calib['LOWER_GREEN'], calib['UPPER_GREEN'])
+
+    lut = np.zeros(n * n * n, dtype=np.uint8)
+    lut[gray <= calib['THRESHOLD_VALUE']] |= BIT_PRETO
+    lut[mask_green.reshape(-1) > 0] |= BIT_VERDE
+    lut[mask_red.reshape(-1) > 0] |= BIT_VERMELHO
+    return lut
+
+def classificar_frame(frame, lut, bits=LUT_BITS):
+    """Converte um frame (ou recorte) BGR em rótulos usando a LUT, sem HSV."""
+    shift = 8 - bits
+    q = frame >> shift
+    # Índice em uint16 sempre que cabe (bits <= 5) e take em vez de lut[idx]:
+    # montar o índice é a maior parte do custo, e uint32 dobrava a memória mexida
+    tipo = np.uint16 if 3 * bits <= 16 else np.uint32
+    idx = q[..., 0].astype(tipo) << (2 * bits)
+    idx |= q[..., 1].astype(tipo) << bits
+    idx |= q[..., 2]
+    return lut.take(idx)
+
+# ===================================================================
+# --- TABELA INTEGRAL (CONTAGEM DE CADA CÉLULA DA GRADE) ---
+# ===================================================================
+
+# Ordem dos canais da tabela integral
+CANAIS_CLASSES = (BIT_PRETO, BIT_VERDE, BIT_VERMELHO)
+
+def tabelas_integrais(rotulos):
+    """
+    Uma tabela integral por classe (preto, verde, vermelho) em uma única
+    chamada de cv2.integral. Resultado: (h+1, w+1, 3) int32.
+    """
+    canais = cv2.merge([((rotulos & bit) != 0).view(np.uint8) for bit in CANAIS_CLASSES])
+    return cv2.integral(canais)
+
+def _recortar(forma, zone_roi):
+    """Retângulo (x, y, w, h) limitado à forma (altura, largura): (x1, y1, x2, y2)."""
+    x, y, w, h = zone_roi
+    altura, largura = forma[:2]
+    return min(max(x, 0), largura), min(max(y, 0), altura), min(x + w, largura), min(y + h, altura)
+
+def _estado_por_percentual(preto, verde, vermelho, calib):
+    """Vermelho tem a maior prioridade, depois verde, depois preto."""
+    if vermelho > calib['RED_PERCENT_THRESH']: return "Vermelho"
+    if verde > calib['GREEN_PERCENT_THRESH']: return "Verde"
+    if preto > calib['BLACK_PERCENT_THRESH']: return "Preto"
+    return "Branco"
+
+# ===================================================================
+# --- ZONAS CLASSIFICADAS SÓ NO PRÓPRIO RECORTE ---
+# ===================================================================
+
+# Para as 5 zonas fixas é o caminho mais barato: só os pixels das zonas passam
+# pela LUT (cerca de 1/3 do frame na 640x360). A tabela integral fica para a
+# grade, que rotula o frame inteiro e conta dezenas de células de uma vez.
+
+def contagem_recorte(frame, zone_roi, lut):
+    """Pixels de cada classe dentro do retângulo, classificando só o recorte."""
+    x1, y1, x2, y2 = _recortar(frame.shape, zone_roi)
+    if x2 <= x1 or y2 <= y1: return np.zeros(len(CANAIS_CLASSES), dtype=np.int64), 0
+    rotulos = classificar_frame(frame[y1:y2, x1:x2], lut)
+    return np.array([cv2.countNonZero(rotulos & bit) for bit in CANAIS_CLASSES]), rotulos.size
+
+def estado_do_recorte(frame, zone_roi, lut, calib):
+    """Estado de uma zona direto do frame BGR (vermelho > verde > preto > branco)."""
+    (preto, verde, vermelho), total_pixels = contagem_recorte(frame, zone_roi, lut)
+    if total_pixels == 0: return "Branco"
+    return _estado_por_percentual(preto * 100 / total_pixels, verde * 100 / total_pixels,
+                                  vermelho * 100 / total_pixels, calib)
+
+# ===================================================================
+# --- GRADE DE OCUPAÇÃO N x M ---
+# ===================================================================
+
+def grade_ocupacao(rotulos, linhas, colunas):
+    """
+    Divide o frame rotulado em linhas x colunas células e devolve a fração
+    de cada classe por célula: matriz (linhas, colunas, 3) na ordem de
+    CANAIS_CLASSES. As contagens saem da tabela integral, amostrada só nos
+    cantos das células (4 consultas vetorizadas por célula), então o custo
+    é o de uma tabela integral, seja qual for o número de células. Sobras
+    de pixels nas bordas (divisão não exata) são ignoradas.
+    """
+    altura_cel, largura_cel = rotulos.shape[0] // linhas, rotulos.shape[1] // colunas
+    cantos = tabelas_integrais(rotulos[:altura_cel * linhas, :largura_cel * colunas])[::altura_cel, ::largura_cel]
+    contagem = cantos[1:, 1:] - cantos[:-1, 1:] - cantos[1:, :-1] + cantos[:-1, :-1]
+    return contagem / (altura_cel * largura_cel)
+
+def celulas_da_zona(zone_roi, forma_frame, linhas, colunas):
+    """
+    Converte um retângulo (x, y, w, h) no intervalo de células da grade que
+    ele cobre: (linha_ini, linha_fim, coluna_ini, coluna_fim). Sempre cobre
+    pelo menos uma célula.
+    """
+    x, y, w, h = zone_roi
+    altura_cel, largura_cel = forma_frame[0] // linhas, forma_frame[1] // colunas
+    l0 = min(max(int(round(y / altura_cel)), 0), linhas - 1)
+    l1 = min(max(int(round((y + h) / altura_cel)), l0 + 1), linhas)
+    c0 = min(max(int(round(x / largura_cel)), 0), colunas - 1)
+    c1 = min(max(int(round((x + w) / largura_cel)), c0 + 1), colunas)
+    return l0, l1, c0, c1
+
+def estado_da_zona_grade(grade, celulas, calib):
+    """Estado de uma zona (CM, CE, ...) visto como um conjunto de células da grade."""
+    l0, l1, c0, c1 = celulas
+    preto, verde, vermelho = grade[l0:l1, c0:c1].reshape(-1, len(CANAIS_CLASSES)).mean(axis=0) * 100
+    return _estado_por_percentual(preto, verde, vermelho, calib)
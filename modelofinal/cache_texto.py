@@ -0,0 +1,33 @@
+from collections import OrderedDict
+
+# ===================================================================
+# --- CACHE DE TEXTOS RENDERIZADOS (LRU) ---
+# ===================================================================
+
+class CacheTexto:
+    """
+    Guarda as Surfaces de font.render por (texto, fonte, cor). Textos fixos
+    ("AÇÃO:", botões...) são renderizados uma única vez; valores que mudam
+    (erro, ação) também aproveitam quando se repetem. Os menos usados saem
+    quando passa da capacidade.
+    """
+    def __init__(self, capacidade=128):
+        self.capacidade = capacidade
+        self._cache = OrderedDict()
+        self.acertos, self.falhas = 0, 0
+
+    def render(self, fonte, texto, cor):
+        chave = (texto, fonte, cor)
+        surf = self._cache.get(chave)
+        if surf is not None:
+            self._cache.move_to_end(chave)
+            self.acertos += 1
+            return surf
+        self.falhas += 1
+        surf = fonte.render(texto, True, cor)
+        self._cache[chave] = surf
+        if len(self._cache) > self.capacidade: self._cache.popitem(last=False)
+        return surf
+
+    def limpar(self):
+        self._cache.clear()
@@ -0,0 +1,47 @@
+import json
+import os
+import numpy as np
+
+# ===================================================================
+# --- CALIBRAÇÃO SALVA EM DISCO ---
+# ===================================================================
+
+ARQUIVO_CALIBRACAO = 'calibracao.json'
+
+# Valores padrão (os mesmos que ficavam fixos no App)
+CALIB_PADRAO = {
+    'THRESHOLD_VALUE': 80,
+    'WHITE_THRESHOLD_LOWER': 200,
+    'LOWER_GREEN': np.array([40, 50, 50]),
+    'UPPER_GREEN': np.array([80, 255, 255]),
+    # Vermelho tem duas faixas no HSV
+    'LOWER_RED1': np.array([0, 70, 50]),
+    'UPPER_RED1': np.array([10, 255, 255]),
+    'LOWER_RED2': np.array([170, 70, 50]),
+    'UPPER_RED2': np.array([180, 255, 255]),
+    'BLACK_PERCENT_THRESH': 50.0,
+    'GREEN_PERCENT_THRESH': 30.0,
+    'WHITE_PERCENT_THRESH': 50.0,
+    'RED_PERCENT_THRESH': 40.0,
+}
+
+def padrao():
+    return {k: (v.copy() if isinstance(v, np.ndarray) else v) for k, v in CALIB_PADRAO.items()}
+
+def salvar(calib, caminho=ARQUIVO_CALIBRACAO):
+    dados = {k: (v.tolist() if isinstance(v, np.ndarray) else v) for k, v in calib.items()}
+    with open(caminho, 'w') as f: json.dump(dados, f, indent=2)
+    print(f"Calibração salva em '{caminho}'.")
+
+def carregar(caminho=ARQUIVO_CALIBRACAO):
+    """Calibração salva, completada com os valores padrão. Sem arquivo, devolve o padrão."""
+    calib = padrao()
+    if not os.path.exists(caminho): return calib
+    try:
+        with open(caminho) as f: dados = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Aviso: calibração '{caminho}' inválida ({e}). Usando valores padrão.")
+        return calib
+    for k, v in dados.items():
+        calib[k] = np.array(v) if isinstance(v, list) else v
+    return calib
@@ -0,0 +1,453 @@
+import cv2
+import numpy as np
+import os
+import threading
+import time
+
+# ===================================================================
+# --- FRAME CRU EM YUV (CINZA = PLANO Y, SEM CONVERSÃO) ---
+# ===================================================================
+
+class QuadroYUV:
+    """
+    Frame como a câmera entrega, sem o cvtColor para BGR. O plano Y já é a
+    imagem em tons de cinza: .gray é uma vista dele (sem cópia). A cor só é
+    convertida quando alguém pede, e só nas linhas pedidas (bgr_linhas).
+
+    formato: 'YUYV' (V4L2, bytes Y U Y V intercalados, forma (altura, largura, 2))
+             'I420' (Picamera2 "YUV420": plano Y, depois U e V com meia resolução)
+    """
+    def __init__(self, bruto, formato, largura, altura):
+        self.formato, self.largura, self.altura = formato, largura, altura
+        self.shape = (altura, largura, 3) # Forma do frame BGR equivalente
+        if formato == 'YUYV':
+            self.bruto = bruto.reshape(altura, largura, 2)
+            self.gray = self.bruto[:, :, 0]
+        elif formato == 'I420':
+            # Picamera2 pode alinhar o stride: cada linha do buffer tem passo >= largura bytes
+            self.bruto = bruto.reshape(altura * 3 // 2, -1)
+            self.gray = self.bruto[:altura, :largura]
+        else: raise ValueError(f"Formato YUV desconhecido: {formato}")
+
+    def bgr_linhas(self, y0=0, y1=None, destino=None):
+        """
+        Converte só as linhas [y0, y1) para BGR, escrevendo em destino (frame
+        inteiro, alocado se None) nas mesmas coordenadas. O resto de destino
+        não é tocado. Os limites são arredondados para linhas pares (croma 2x2).
+        """
+        if y1 is None: y1 = self.altura
+        y0, y1 = max(0, y0) & ~1, min(self.altura, (y1 + 1) & ~1)
+        if destino is None: destino = np.empty(self.shape, dtype=np.uint8)
+        if y1 <= y0: return destino
+        if self.formato == 'YUYV':
+            cv2.cvtColor(self.bruto[y0:y1], cv2.COLOR_YUV2BGR_YUYV, dst=destino[y0:y1])
+        else:
+            a, l, passo = self.altura, self.largura, self.bruto.shape[1]
+            u = self.bruto[a:a + a // 4].reshape(a // 2, passo // 2)[:, :l // 2]
+            v = self.bruto[a + a // 4:].reshape(a // 2, passo // 2)[:, :l // 2]
+            # Monta um I420 só com a faixa pedida: Y das linhas + U/V das linhas/2
+            faixa = np.concatenate((self.gray[y0:y1].ravel(), u[y0 // 2:y1 // 2].ravel(), v[y0 // 2:y1 // 2].ravel()))
+            destino[y0:y1] = cv2.cvtColor(faixa.reshape((y1 - y0) * 3 // 2, l), cv2.COLOR_YUV2BGR_I420)
+        return destino
+
+    def para_bgr(self):
+        return self.bgr_linhas(0, self.altura)
+
+    @staticmethod
+    def limiar_cinza(valor):
+        """
+        Converte um limiar do cinza de cvtColor(BGR2GRAY) (0-255, o que a
+        calibração mede e a LUT usa) para o plano Y. O cvtColor YUV->BGR do
+        OpenCV trata o Y como BT.601 de faixa limitada (16-235), então
+        cinza = (Y - 16) * 255 / 219: cinza 74 é Y 80, cinza 214 é Y 200.
+        """
+        return int(round(16 + valor * 219 / 255))
+
+    def copia_crua(self):
+        """QuadroYUV com o próprio buffer (sem converter), para guardar fora do anel da fonte."""
+        return QuadroYUV(self.bruto.copy(), self.formato, self.largura, self.altura)
+
+def copiar_frame(frame):
+    """Cópia barata de um frame BGR ou QuadroYUV (continua no mesmo formato)."""
+    return frame.copia_crua() if isinstance(frame, QuadroYUV) else frame.copy()
+
+def como_bgr(frame):
+    """Aceita frame BGR (ndarray) ou QuadroYUV e devolve BGR."""
+    return frame.para_bgr() if isinstance(frame, QuadroYUV) else frame
+
+def copia_bgr(frame):
+    """BGR novo, para desenhar por cima sem mexer no original (o QuadroYUV já sai convertido num buffer novo)."""
+    return frame.para_bgr() if isinstance(frame, QuadroYUV) else frame.copy()
+
+# ===================================================================
+# --- FONTE DE FRAMES (INTERFACE ÚNICA PARA CÂMERAS E GRAVAÇÕES) ---
+# ===================================================================
+
+N_BUFFERS = 4 # Anel de saída pré-alocado: o frame mais novo, o reservado por quem consome e dois livres
+FIM = object() # _capturar() devolve FIM quando a fonte acabou (fim do vídeo)
+
+class FonteFrames:
+    """
+    Base de todas as fontes: uma thread lê frames sem parar e guarda só o
+    mais novo (buffer de uma posição), com o instante de captura
+    (time.monotonic) e um número de sequência. Quem consome nunca bloqueia e
+    nunca recebe um frame que ficou parado numa fila.
+
+    Cada backend implementa _abrir() -> bool, _capturar() -> frame / None
+    (falha) / FIM e _fechar(). Os frames são escritos num anel de N_BUFFERS
+    buffers pré-alocados (_proximo_buffer), sem alocação por frame.
+
+    O último frame entregue por ler()/esperar_novo() fica reservado até a
+    próxima chamada: a captura nunca escreve nele, por mais que a percepção
+    demore. É uma reserva só (um consumidor por vez); quem guarda o frame
+    para depois (ex.: a prévia de outra thread) precisa copiá-lo.
+    """
+    def __init__(self, largura=640, altura=360, fps=None):
+        self.largura, self.altura, self.fps = largura, altura, fps
+        self._thread = None
+        self._lock = threading.Lock()
+        self._novo_frame = threading.Condition(self._lock)
+        self._frame_lido = threading.Condition(self._lock)
+        self._rodando = False
+        self._esgotada = False
+        self.sem_descarte = False # True: espera quem consome ler cada frame (replay sem perder nenhum)
+        self._buffers, self._indice_buffer = [], 0
+        self._k_escrito = self._k_publicado = self._k_reservado = None # Índices no anel
+
+        self._frame, self._timestamp, self._seq = None, 0.0, 0
+        self._seq_lido = 0
+        # Contadores para instrumentação
+        self.frames_capturados = 0
+        self.frames_descartados = 0 # Sobrescritos antes de alguém ler
+        self.frames_duplicados = 0  # Lidos de novo por quem consome
+        self.falhas_leitura = 0
+
+    def start(self):
+        self._esgotada = False
+        if not self._abrir(): return False
+        self._rodando = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return True
+
+    def _proximo_buffer(self, forma):
+        """
+        Próximo buffer do anel com a forma pedida (alocado só na primeira volta
+        ou se a forma mudar). Pula o reservado por quem consome; em rodízio,
+        o mais novo publicado também nunca é o próximo.
+        """
+        k = self._indice_buffer % N_BUFFERS
+        if k == self._k_reservado: self._indice_buffer += 1; k = self._indice_buffer % N_BUFFERS
+        self._indice_buffer += 1
+        self._k_escrito = k
+        if len(self._buffers) <= k: self._buffers.append(np.empty(forma, dtype=np.uint8))
+        elif self._buffers[k].shape != forma: self._buffers[k] = np.empty(forma, dtype=np.uint8)
+        return self._buffers[k]
+
+    def _loop(self):
+        while self._rodando:
+            frame = self._capturar()
+            if frame is FIM:
+                with self._lock: self._esgotada = True; self._novo_frame.notify_all()
+                return
+            if frame is None:
+                self.falhas_leitura += 1
+                time.sleep(0.005)
+                continue
+            agora = time.monotonic()
+            if self.sem_descarte:
+                with self._lock: self._frame_lido.wait_for(lambda: self._seq_lido == self._seq or not self._rodando)
+            self._publicar_frame(frame, agora)
+
+    def _publicar_frame(self, frame, agora):
+        with self._lock:
+            if self._frame is not None and self._seq_lido != self._seq: self.frames_descartados += 1
+            self._frame, self._timestamp = frame, agora
+            self._k_publicado, self._k_escrito = self._k_escrito, None # None: frame fora do anel (ex.: o primeiro da webcam)
+            self._seq += 1
+            self.frames_capturados += 1
+            self._novo_frame.notify_all()
+
+    def ler(self):
+        """Retorna (frame, timestamp, seq) do frame mais novo, sem bloquear. frame é None até o primeiro chegar."""
+        with self._lock:
+            if self._frame is not None and self._seq == self._seq_lido: self.frames_duplicados += 1
+            self._seq_lido, self._k_reservado = self._seq, self._k_publicado
+            self._frame_lido.notify_all()
+            return self._frame, self._timestamp, self._seq
+
+    def esperar_novo(self, seq_anterior, timeout=None):
+        """Como ler(), mas espera (até timeout) chegar um frame com seq diferente de seq_anterior."""
+        with self._lock:
+            if self._seq == seq_anterior: self._novo_frame.wait_for(lambda: self._seq != seq_anterior or not self._rodando or self._esgotada, timeout)
+            if self._frame is not None and self._seq == self._seq_lido: self.frames_duplicados += 1
+            self._seq_lido, self._k_reservado = self._seq, self._k_publicado
+            self._frame_lido.notify_all()
+            return self._frame, self._timestamp, self._seq
+
+    def read(self):
+        """Compatível com cv2.VideoCapture.read()."""
+        frame, _, _ = self.ler()
+        return frame is not None, frame
+
+    def isOpened(self):
+        return self._rodando and not self._esgotada and self._aberta()
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH: return self.largura
+        if prop == cv2.CAP_PROP_FRAME_HEIGHT: return self.altura
+        if prop == cv2.CAP_PROP_FPS: return self.fps or 0
+        return 0
+
+    def release(self):
+        self._rodando = False
+        with self._lock: self._novo_frame.notify_all(); self._frame_lido.notify_all()
+        if self._thread is not None: self._thread.join(timeout=1.0); self._thread = None
+        self._fechar()
+        with self._lock: self._frame, self._seq, self._seq_lido, self._k_publicado, self._k_reservado = None, 0, 0, None, None
+
+    def _aberta(self): return True
+
+# ===================================================================
+# --- WEBCAM V4L2 ---
+# ===================================================================
+
+class CapturaUltimoFrame(FonteFrames):
+    """
+    Fonte V4L2 (cv2.VideoCapture). O cap.read() escreve direto no anel
+    pré-alocado.
+
+    yuv=True pede YUYV cru ao V4L2 (CAP_PROP_CONVERT_RGB=0) e entrega
+    QuadroYUV: o cinza sai do plano Y sem conversão nenhuma. Se a câmera não
+    aceitar YUYV, volta para BGR normal.
+    """
+    def __init__(self, indice=0, api=cv2.CAP_V4L2, largura=640, altura=360, yuv=False, fps=None):
+        super().__init__(largura, altura, fps)
+        self.indice, self.api = indice, api
+        self.yuv = yuv
+        self.cap = None
+
+    def _abrir(self):
+        self.cap = cv2.VideoCapture(self.indice, self.api)
+        if not self.cap.isOpened(): return False
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.largura); self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.altura)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1) # Nem todo driver respeita, por isso a thread
+        if self.fps: self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if self.yuv: self._configurar_yuyv()
+        # O driver pode ter escolhido outra resolução
+        self.largura, self.altura = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) or self.largura, int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) or self.altura
+        self._forma = None # Descoberta no primeiro frame (YUYV cru pode vir achatado)
+        return True
+
+    def _configurar_yuyv(self):
+        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'YUYV'))
+        self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        fourcc = int(self.cap.get(cv2.CAP_PROP_FOURCC)).to_bytes(4, 'little')
+        if fourcc != b'YUYV':
+            print(f"Aviso: câmera não entregou YUYV ({fourcc!r}); usando BGR.")
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 1)
+            self.yuv = False
+
+    def _capturar(self):
+        if self._forma is None:
+            ret, frame = self.cap.read()
+            if ret: self._forma = frame.shape
+        else:
+            ret, frame = self.cap.read(self._proximo_buffer(self._forma))
+        if not ret: return None
+        return QuadroYUV(frame, 'YUYV', self.largura, self.altura) if self.yuv else frame
+
+    def _aberta(self):
+        return self.cap is not None and self.cap.isOpened()
+
+    def get(self, prop):
+        return self.cap.get(prop) if self.cap is not None else super().get(prop)
+
+    def _fechar(self):
+        if self.cap is not None: self.cap.release(); self.cap = None
+
+# ===================================================================
+# --- PICAMERA2 COM DOIS STREAMS (LORES PARA VISÃO, MAIN PARA PRÉVIA) ---
+# ===================================================================
+
+class CapturaPicamera2(FonteFrames):
+    """
+    Fonte Picamera2 com dois streams: um lores YUV420 pequeno (ex.: 320x180)
+    só para a visão e o main RGB888 no tamanho da tela só para a prévia.
+
+    Cada capture_request() é copiado para buffers pré-alocados e liberado
+    na hora, antes de qualquer processamento. O lores vira QuadroYUV (cinza
+    = plano Y) e é publicado primeiro; o main só é copiado quando alguém pediu
+    prévia desde o último frame (ler_previa), então a prévia nunca atrasa a visão.
+    """
+    def __init__(self, largura=320, altura=180, tamanho_previa=(640, 360), com_previa=True, fps=None):
+        super().__init__(largura, altura, fps)
+        self.tamanho_previa, self.com_previa = tamanho_previa, com_previa
+        self.picam2 = None
+        self._previas, self._indice_previa = [], 0
+        self._previa, self._previa_pedida = None, True
+
+    def _abrir(self):
+        try: from picamera2 import Picamera2
+        except ImportError as e: print(f"Erro: Picamera2 indisponível ({e})."); return False
+        try:
+            self.picam2 = Picamera2()
+            streams = {'lores': {"size": (self.largura, self.altura), "format": "YUV420"}, 'buffer_count': 4}
+            # A Picamera2 exige um main; sem prévia ele fica do tamanho do lores e nunca é copiado
+            streams['main'] = {"size": self.tamanho_previa if self.com_previa else (self.largura, self.altura), "format": "RGB888"}
+            if self.fps: streams['controls'] = {"FrameRate": self.fps}
+            self.picam2.configure(self.picam2.create_video_configuration(**streams))
+            self.picam2.start()
+        except Exception as e:
+            print(f"Erro: não foi possível abrir a Picamera2 ({e}).")
+            self._fechar(); return False
+        return True
+
+    def _capturar(self):
+        from picamera2 import MappedArray
+        try: request = self.picam2.capture_request()
+        except Exception: return None
+        try:
+            with MappedArray(request, 'lores') as m:
+                bruto = self._proximo_buffer(m.array.shape)
+                np.copyto(bruto, m.array)
+            if self.com_previa and self._previa_pedida:
+                with MappedArray(request, 'main') as m:
+                    k = self._indice_previa % N_BUFFERS
+                    self._indice_previa += 1
+                    if len(self._previas) <= k: self._previas.append(np.empty(m.array[:, :, :3].shape, dtype=np.uint8))
+                    np.copyto(self._previas[k], m.array[:, :, :3])
+                with self._lock: self._previa, self._previa_pedida = self._previas[k], False
+        finally:
+            request.release() # Devolve o buffer à câmera antes de processar qualquer coisa
+        return QuadroYUV(bruto, 'I420', self.largura, self.altura)
+
+    def ler_previa(self):
+        """Último frame do stream main (BGR na memória, como o RGB888 da Picamera2) e pede o próximo. None se não houver."""
+        with self._lock:
+            self._previa_pedida = True
+            return self._previa
+
+    def _aberta(self):
+        return self.picam2 is not None
+
+    def _fechar(self):
+        if self.picam2 is not None:
+            try: self.picam2.stop(); self.picam2.close()
+            except Exception: pass
+            self.picam2 = None
+
+# ===================================================================
+# --- VÍDEO GRAVADO OU DIRETÓRIO DE FRAMES (REPLAY) ---
+# ===================================================================
+
+EXTENSOES_IMAGEM = ('.png', '.jpg', '.jpeg', '.bmp')
+
+class FonteArquivo(FonteFrames):
+    """
+    Reproduz uma corrida gravada (vídeo ou diretório de imagens em ordem de
+    nome) pela mesma interface das câmeras, já na resolução pedida.
+
+    tempo_real=True: entrega no ritmo do fps (o do vídeo se fps=None), como
+    uma câmera. tempo_real=False: o mais rápido possível e sem descartar
+    frames (cada um espera ser lido), para medir a visão na bancada.
+    repetir=True volta ao início no fim; senão a fonte se esgota (isOpened() False).
+    """
+    def __init__(self, caminho, largura=640, altura=360, fps=None, tempo_real=True, repetir=False):
+        super().__init__(largura, altura, fps)
+        self.caminho, self.tempo_real, self.repetir = caminho, tempo_real, repetir
+        self.sem_descarte = not tempo_real
+        self.cap, self._arquivos, self._indice = None, None, 0
+
+    def _abrir(self):
+        if os.path.isdir(self.caminho):
+            self._arquivos = sorted(os.path.join(self.caminho, f) for f in os.listdir(self.caminho) if f.lower().endswith(EXTENSOES_IMAGEM))
+            if not self._arquivos: return False
+        else:
+            self.cap = cv2.VideoCapture(self.caminho)
+            if not self.cap.isOpened(): return False
+        if not self.fps: self.fps = (self.cap.get(cv2.CAP_PROP_FPS) if self.cap is not None else 0) or 30.0
+        self._indice, self._inicio = 0, time.monotonic()
+        return True
+
+    def _ler_proximo(self):
+        if self._arquivos is not None:
+            if self._indice >= len(self._arquivos): return None
+            return cv2.imread(self._arquivos[self._indice])
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def _capturar(self):
+        frame = self._ler_proximo()
+        if frame is None and self.repetir and self._indice > 0:
+            if self.cap is not None: self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            self._indice, self._inicio = 0, time.monotonic()
+            frame = self._ler_proximo()
+        if frame is None: return FIM
+        if self.tempo_real:
+            espera = self._inicio + self._indice / self.fps - time.monotonic()
+            if espera > 0: time.sleep(espera)
+        self._indice += 1
+        destino = self._proximo_buffer((self.altura, self.largura, 3))
+        if frame.shape[:2] == (self.altura, self.largura): np.copyto(destino, frame)
+        else: cv2.resize(frame, (self.largura, self.altura), dst=destino, interpolation=cv2.INTER_AREA)
+        return destino
+
+    def _fechar(self):
+        if self.cap is not None: self.cap.release(); self.cap = None
+
+# ===================================================================
+# --- ESCOLHA DA FONTE ---
+# ===================================================================
+
+def criar_fonte(origem=0, largura=640, altura=360, fps=None, yuv=False, **opcoes):
+    """
+    origem: índice da webcam (V4L2), 'picamera2', ou caminho de um vídeo /
+    diretório de frames gravados. Devolve a FonteFrames ainda fechada (chame start()).
+    opcoes vão para o construtor do backend (tamanho_previa, tempo_real, repetir...).
+    """
+    if isinstance(origem, str) and origem.isdigit(): origem = int(origem)
+    if isinstance(origem, int): return CapturaUltimoFrame(origem, cv2.CAP_V4L2, largura, altura, yuv, fps)
+    if origem == 'picamera2': return CapturaPicamera2(largura, altura, fps=fps, **opcoes)
+    return FonteArquivo(origem, largura, altura, fps, **opcoes)
+
+# ===================================================================
+# --- SESSÃO DE CÂMERA ÚNICA (ABERTA UMA VEZ, SEMPRE AQUECIDA) ---
+# ===================================================================
+
+class SessaoCamera:
+    """
+    Dona de uma única fonte, aberta uma vez e mantida aquecida enquanto o
+    programa roda. As telas assinam (recebem a fonte já capturando) e
+    cancelam a assinatura sem fechar nada, então trocar de tela não custa
+    abrir a câmera de novo. Só reabre se a fonte caiu (ex.: câmera desconectada).
+
+    criar: função sem argumentos que devolve uma FonteFrames ainda fechada.
+    """
+    def __init__(self, criar):
+        self.criar = criar
+        self.fonte = None
+        self.assinantes = set()
+        self.aberturas = 0 # Quantas vezes a câmera foi aberta de verdade
+
+    def abrir(self):
+        """Fonte aberta (abre ou reabre se preciso), ou None se a câmera não abriu."""
+        if self.fonte is not None and self.fonte.isOpened(): return self.fonte
+        if self.fonte is not None: self.fonte.release()
+        self.fonte = self.criar()
+        self.aberturas += 1
+        if not self.fonte.start(): self.fonte.release(); self.fonte = None
+        return self.fonte
+
+    def assinar(self, nome):
+        fonte = self.abrir()
+        if fonte is not None: self.assinantes.add(nome)
+        return fonte
+
+    def cancelar(self, nome):
+        self.assinantes.discard(nome) # A câmera continua aberta e aquecida
+
+    def fechar(self):
+        """Libera a câmera de verdade (ao sair, ou para outro processo poder abri-la)."""
+        self.assinantes.clear()
+        if self.fonte is not None: self.fonte.release(); self.fonte = None
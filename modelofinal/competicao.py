@@ -0,0 +1,136 @@
+# ===================================================================
+# --- MODO COMPETIÇÃO SEM TELA (SEM PYGAME / SDL) ---
+# ===================================================================
+#
+# Liga a câmera, carrega a calibração salva pela interface (calibracao.json)
+# e roda percepção + motor_control na velocidade máxima. O status sai no
+# console e, se PINO_LED estiver configurado, num LED.
+#
+# Uso:  python3 competicao.py [--calibracao calibracao.json] [--multiprocesso | --yuv]
+#                             [--fonte 0|picamera2|corrida.mp4] [--fps N]
+#                             [--perfil] [--cprofile SEGUNDOS]
+# Com --perfil, a tabela por etapa sai ao encerrar e com: kill -USR1 <pid>
+# Ctrl+C para parar.
+
+import time
+INICIO_PROCESSO = time.perf_counter()
+
+import argparse
+import os
+import signal
+import sys
+import motor_control
+import calibracao
+import visao
+import percepcao
+import captura
+import controle
+import multiprocesso
+import latencia
+import perfil
+
+FRAME_WIDTH = 640
+FRAME_HEIGHT = 360
+
+PINO_LED = None          # Pino BCM de um LED de status (None = só console)
+ESPERA_PRIMEIRO_FRAME = 5.0 # Segundos até a primeira decisão antes de desistir
+INTERVALO_STATUS = 1.0   # Segundos entre linhas de status no console
+
+class Status:
+    """Canal mínimo de status: uma linha no console por intervalo e um LED opcional."""
+    def __init__(self, pino_led=PINO_LED):
+        self.pino_led = pino_led
+        self.gpio = None
+        if pino_led is not None:
+            try:
+                import RPi.GPIO as GPIO
+                GPIO.setup(pino_led, GPIO.OUT)
+                self.gpio = GPIO
+            except Exception as e:
+                print(f"Aviso: LED de status indisponível ({e}).")
+        self.led_aceso = False
+
+    def led(self, aceso):
+        if self.gpio is None or aceso == self.led_aceso: return
+        self.gpio.output(self.pino_led, self.gpio.HIGH if aceso else self.gpio.LOW)
+        self.led_aceso = aceso
+
+    def informar(self, hz, snap, latencia_total=None):
+        # LED aceso com a linha; piscando quando perdido ou sem câmera
+        vendo_linha = snap['acao'] not in ("Procurando Linha", "Aguardando Câmera", "Falha na Captura", "Câmera Desconectada")
+        self.led(vendo_linha or not self.led_aceso)
+        lat = f"  lat {latencia_total[0]:.0f}/{latencia_total[1]:.0f}/{latencia_total[2]:.0f} ms" if latencia_total else ""
+        print(f"[{hz:5.1f} Hz] {snap['acao']:<22} erro={snap['erro']:+4d}{lat}", flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Robô Axiom sem interface gráfica.")
+    parser.add_argument('--calibracao', default=calibracao.ARQUIVO_CALIBRACAO, help="arquivo de calibração salvo pela interface")
+    parser.add_argument('--multiprocesso', action='store_true', help="captura e visão em processos separados")
+    parser.add_argument('--fonte', default='0', help="índice da webcam, 'picamera2' ou vídeo/diretório gravado")
+    parser.add_argument('--fps', type=float, default=None, help="taxa pedida à câmera (padrão: a do driver)")
+    parser.add_argument('--yuv', action='store_true', help="captura YUYV crua: cinza direto do plano Y")
+    parser.add_argument('--log-latencia', default=None, help="CSV com a latência captura->PWM de cada frame")
+    parser.add_argument('--perfil', action='store_true', help="mede cada etapa (tabela ao sair ou com SIGUSR1)")
+    parser.add_argument('--cprofile', type=float, default=0, metavar='SEGUNDOS', help="cProfile dos primeiros N segundos do loop")
+    parser.add_argument('--grade', action='store_true', help="zonas derivadas da grade de ocupação")
+    args = parser.parse_args()
+    if args.multiprocesso and args.yuv: parser.error("--yuv não funciona com --multiprocesso (o anel compartilhado guarda BGR)")
+
+    if args.perfil:
+        perfil.ativar()
+        signal.signal(signal.SIGUSR1, lambda *_: perfil.despejar())
+    if args.cprofile: perfil.pedir_cprofile(args.cprofile)
+
+    calib = calibracao.carregar(args.calibracao)
+    lut = visao.construir_lut(calib)
+    obter_calibracao = lambda: (calib, lut)
+
+    motor_control.setup_motors()
+    status = Status()
+    medidor = latencia.MedidorLatencia(arquivo_log=args.log_latencia)
+
+    if args.multiprocesso:
+        fonte = multiprocesso.PipelineMultiprocesso(FRAME_WIDTH, FRAME_HEIGHT, args.fonte, args.fps, args.grade)
+        aberta = fonte.start(calib, lut)
+    else:
+        fonte = captura.criar_fonte(args.fonte, FRAME_WIDTH, FRAME_HEIGHT, args.fps, args.yuv)
+        aberta = fonte.start()
+    if not aberta:
+        print("Erro: Não foi possível abrir a webcam.")
+        fonte.release(); motor_control.full_stop_and_cleanup(); return 1
+
+    # Sem tela: o retrato não precisa do frame
+    if args.multiprocesso: loop = multiprocesso.LoopControleMultiprocesso(fonte, None, motor_control, obter_calibracao, medidor, com_frame=False)
+    else: loop = controle.LoopControle(fonte, percepcao.PercepcaoRodada(FRAME_WIDTH, FRAME_HEIGHT, args.grade), motor_control, obter_calibracao, medidor, com_frame=False)
+    loop.start()
+
+    try:
+        # Tempo até a primeira decisão com um frame de verdade (dentro do try: Ctrl+C aqui também para tudo)
+        limite = time.perf_counter() + ESPERA_PRIMEIRO_FRAME
+        while loop.snapshot()['seq'] == 0 and loop.snapshot()['acao'] != "Câmera Desconectada":
+            if time.perf_counter() > limite:
+                print(f"Erro: nenhum frame processado em {ESPERA_PRIMEIRO_FRAME:.0f} s.", flush=True)
+                return 1
+            time.sleep(0.005)
+        print(f"Pronto em {time.perf_counter() - INICIO_PROCESSO:.2f} s (primeira decisão).", flush=True)
+
+        ciclos_antes, t_antes = loop.ciclos, time.perf_counter()
+        while True:
+            time.sleep(INTERVALO_STATUS)
+            agora = time.perf_counter()
+            status.informar((loop.ciclos - ciclos_antes) / (agora - t_antes), loop.snapshot(), medidor.percentis().get('total'))
+            ciclos_antes, t_antes = loop.ciclos, agora
+    except KeyboardInterrupt:
+        print("encerrando")
+    finally:
+        loop.stop()
+        fonte.release()
+        status.led(False)
+        print(medidor.resumo()); medidor.fechar()
+        motor_control.full_stop_and_cleanup()
+    return 0
+
+if __name__ == '__main__':
+    try: os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    except NameError: pass
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import threading
+import time
+import captura
+import perfil
+
+# ===================================================================
+# --- LOOP DE PERCEPÇÃO E CONTROLE (THREAD PRÓPRIA) ---
+# ===================================================================
+
+TIMEOUT_SEM_FRAME = 0.25 # Segundos sem frame novo antes de parar os motores
+
+def aplicar_decisao(motor, acao, erro, geometria=None):
+    """A regra única de ação -> motor (loop, multiprocesso e replay usam a mesma)."""
+    if acao == "Fim de Pista": motor.stop_all_motors()
+    else: motor.gerenciar_movimento(acao, erro, geometria)
+
+class LoopControle:
+    """
+    Roda percepção + gerenciar_movimento no ritmo da câmera, numa thread
+    separada da interface. A tela só lê um retrato (snapshot) do estado no
+    ritmo dela, então desenhar nunca atrasa um comando de motor.
+
+    fonte: objeto com esperar_novo(seq, timeout) e isOpened() (captura.FonteFrames)
+    percepcao: percepcao.PercepcaoRodada
+    motor: módulo motor_control
+    obter_calibracao: função que devolve (calib_vars, lut_cores) atuais
+    latencia: latencia.MedidorLatencia opcional (captura -> visão -> decisão -> PWM).
+    Com a thread do PID, o PWM é escrito depois de gerenciar_movimento voltar:
+    o frame só é registrado no seguinte, com o instante que o motor informa
+    em instante_atuacao (motores sem essa função escrevem na hora).
+    com_frame: publica no retrato uma cópia do frame, para a prévia. A cópia
+    é feita aqui, depois do comando ao motor: o buffer é do anel da fonte e
+    seria reescrito enquanto a tela ainda o lê. Sem tela, False poupa a cópia.
+    """
+    def __init__(self, fonte, percepcao, motor, obter_calibracao, latencia=None, com_frame=True):
+        self.fonte, self.percepcao, self.motor = fonte, percepcao, motor
+        self.obter_calibracao = obter_calibracao
+        self.latencia = latencia
+        self.com_frame = com_frame
+        self._pendente = None # Frame cujo comando ainda não foi confirmado no PWM
+        self._lock = threading.Lock()
+        self._thread = None
+        self._rodando = False
+        self._snapshot = {'seq': 0, 'frame': None, 'timestamp': 0.0, 'acao': "Iniciando...", 'erro': 0, 'zone_states': {}}
+        self.ciclos = 0
+
+    def start(self):
+        if self.percepcao is not None: self.percepcao.reset()
+        self._pendente = None
+        self._rodando = True
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._rodando = False
+        if self._thread is not None: self._thread.join(timeout=2.0); self._thread = None
+        self.motor.stop_all_motors()
+
+    def snapshot(self):
+        with self._lock: return self._snapshot
+
+    def _publicar(self, **valores):
+        with self._lock:
+            novo = dict(self._snapshot); novo.update(valores)
+            self._snapshot = novo
+
+    def _fechar_latencia(self):
+        """Registra o frame pendente se o comando dele chegou ao PWM; senão a amostra é descartada."""
+        pendente, self._pendente = self._pendente, None
+        if pendente is None: return
+        *etapas, t_comando = pendente
+        t_atuacao = self.motor.instante_atuacao(t_comando)
+        if t_atuacao is not None: self.latencia.registrar(*etapas, t_atuacao)
+
+    def _aplicar(self, seq, timestamp, t_percepcao, t_decisao, acao, erro, geometria):
+        """Comando ao motor, com a latência do frame medida até o PWM."""
+        t_comando = time.monotonic()
+        with perfil.escopo('motor'): aplicar_decisao(self.motor, acao, erro, geometria)
+        if not self.latencia: return
+        if hasattr(self.motor, 'instante_atuacao'): self._pendente = (seq, timestamp, t_percepcao, t_decisao, t_comando)
+        else: self.latencia.registrar(seq, timestamp, t_percepcao, t_decisao, time.monotonic())
+
+    def _loop(self):
+        ultimo_seq = 0
+        while self._rodando:
+            if not self.fonte.isOpened():
+                if self.latencia: self._fechar_latencia()
+                self.motor.stop_all_motors()
+                self._publicar(acao="Câmera Desconectada")
+                time.sleep(TIMEOUT_SEM_FRAME)
+                continue
+
+            frame, timestamp, seq = self.fonte.esperar_novo(ultimo_seq, TIMEOUT_SEM_FRAME)
+            if self.latencia: self._fechar_latencia() # Antes de qualquer outro comando ao motor
+            if frame is None or seq == ultimo_seq:
+                self.motor.stop_all_motors()
+                self._publicar(acao="Aguardando Câmera" if frame is None else "Falha na Captura")
+                continue
+            ultimo_seq = seq
+
+            perfil.tick_cprofile()
+            calib, lut = self.obter_calibracao()
+            with perfil.escopo('percepcao'): acao, erro, zone_states = self.percepcao.processar(frame, calib, lut)
+
+            # Envia comando final para os motores antes de qualquer coisa da tela
+            self._aplicar(seq, timestamp, self.percepcao.t_percepcao, self.percepcao.t_decisao, acao, erro, self.percepcao.geometria)
+
+            self.ciclos += 1
+            frame = captura.copiar_frame(frame) if self.com_frame else None
+            self._publicar(seq=seq, frame=frame, timestamp=timestamp, acao=acao, erro=erro, zone_states=zone_states)
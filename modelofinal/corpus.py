@@ -0,0 +1,163 @@
+# ===================================================================
+# --- CORPUS ROTULADO + SUÍTE ACURÁCIA x VELOCIDADE ---
+# ===================================================================
+#
+# Um corpus é um diretório com imagens (640x360, como a câmera do
+# modelofinal) e um rotulos.csv:
+#
+#   arquivo,acao,erro,revisado
+#   0000.png,Curva de 90 Esquerda,,1
+#   0001.png,Seguindo Linha,-42,1       <- erro esperado (px na base 640), só na linha
+#   0002.png,Atravessando Gap,,1
+#
+# acao usa o vocabulário de variantes.ACOES. "revisado" marca os rótulos já
+# conferidos por alguém; a avaliação usa só esses (a menos de --todos).
+#
+# Criar a partir de uma corrida gravada (rótulos pré-preenchidos pela
+# interface1 com o classificador HSV original, para revisar à mão):
+#   python3 corpus.py extrair corrida.mp4 corpus/ [--cada 5]
+# Avaliar todas as variantes:
+#   python3 corpus.py avaliar corpus/ [--variantes interface1,phoenix,...]
+#                     [--acuracia-minima 0.95] [--exigir interface1] [--modelo-keras caminho]
+# Com --acuracia-minima, sai com código 1 se a variante exigida ficar abaixo
+# dela ou não tiver resultado (fora de --variantes, ou ignorada por falta de
+# dependência).
+
+import argparse
+import csv
+import os
+import sys
+import time
+import cv2
+import numpy as np
+import calibracao
+import variantes
+
+ARQUIVO_ROTULOS = 'rotulos.csv'
+TOLERANCIA_ERRO = 20 # px (base 640) para contar o erro da linha como certo
+
+def ler_rotulos(diretorio, so_revisados=True):
+    """[(arquivo, acao, erro ou None)]"""
+    with open(os.path.join(diretorio, ARQUIVO_ROTULOS), newline='') as f:
+        linhas = list(csv.DictReader(f))
+    return [(l['arquivo'], l['acao'], int(l['erro']) if l.get('erro') not in (None, '') else None)
+            for l in linhas if not so_revisados or l.get('revisado', '1') == '1']
+
+def extrair(gravacao, diretorio, cada, calib):
+    os.makedirs(diretorio, exist_ok=True)
+    cap = cv2.VideoCapture(gravacao)
+    if not cap.isOpened(): raise SystemExit(f"Erro: não foi possível abrir '{gravacao}'.")
+    rotulador = variantes.Interface1HSV(calib) # O comportamento de antes da LUT: as outras variantes são medidas contra ele
+    largura, altura = rotulador.RESOLUCAO
+    linhas, n = [], 0
+    while True:
+        ret, frame = cap.read()
+        if not ret: break
+        n += 1
+        if (n - 1) % cada: continue
+        frame = cv2.resize(frame, (largura, altura), interpolation=cv2.INTER_AREA)
+        nome = f"{len(linhas):05d}.png"
+        cv2.imwrite(os.path.join(diretorio, nome), frame)
+        acao, erro = rotulador.processar(frame)
+        linhas.append((nome, acao, erro if acao == "Seguindo Linha" and erro is not None else '', 0))
+    cap.release()
+    with open(os.path.join(diretorio, ARQUIVO_ROTULOS), 'w', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(('arquivo', 'acao', 'erro', 'revisado'))
+        escritor.writerows(linhas)
+    print(f"{len(linhas)} frames em '{diretorio}'. Revise {ARQUIVO_ROTULOS} (acao/erro) e marque revisado=1.")
+
+def avaliar_variante(variante, frames, rotulos, repeticoes):
+    """(acurácia, erro médio absoluto em px ou None, ms/frame médio, ms/frame p95, [(arquivo, esperado, obtido)])"""
+    largura, altura = variante.RESOLUCAO
+    # O redimensionamento é trabalho da câmera, não da variante: fica fora do tempo
+    entradas = [f if f.shape[1::-1] == (largura, altura) else cv2.resize(f, (largura, altura), interpolation=cv2.INTER_AREA) for f in frames]
+    variante.processar(entradas[0]) # Aquecimento (alocações, JIT do TensorFlow...)
+    tempos = np.empty((repeticoes, len(entradas)))
+    for r in range(repeticoes):
+        for i, frame in enumerate(entradas):
+            t0 = time.perf_counter()
+            resultado = variante.processar(frame)
+            tempos[r, i] = time.perf_counter() - t0
+            if r == 0: rotulos[i][3].append(resultado)
+
+    acertos, desvios, errados = 0, [], []
+    for arquivo, acao, erro, resultados in rotulos:
+        acao_obtida, erro_obtido = resultados[-1]
+        certo = acao_obtida == acao
+        if certo and erro is not None:
+            if erro_obtido is None: certo = False
+            else:
+                desvios.append(abs(erro_obtido - erro))
+                certo = desvios[-1] <= TOLERANCIA_ERRO
+        acertos += certo
+        if not certo: errados.append((arquivo, (acao, erro), (acao_obtida, erro_obtido)))
+    ms = tempos.mean(axis=0) * 1000
+    return (acertos / len(rotulos), float(np.mean(desvios)) if desvios else None, float(ms.mean()), float(np.percentile(ms, 95)), errados)
+
+def avaliar(diretorio, nomes, calib, repeticoes, todos=False, mostrar_erros=0):
+    rotulos = ler_rotulos(diretorio, not todos)
+    if not rotulos: raise SystemExit("Nenhum frame rotulado (revisado=1). Use --todos para avaliar os pré-rótulos.")
+    frames = [cv2.imread(os.path.join(diretorio, arquivo)) for arquivo, _, _ in rotulos]
+    print(f"{len(rotulos)} frames rotulados em '{diretorio}'.\n")
+
+    resultados = {}
+    for nome in nomes:
+        try: variante = variantes.VARIANTES[nome](calib)
+        except ImportError as e: print(f"  {nome}: ignorada ({e})"); continue
+        por_frame = [(a, acao, erro, []) for a, acao, erro in rotulos]
+        resultados[nome] = (variante.RESOLUCAO,) + avaliar_variante(variante, frames, por_frame, repeticoes)
+
+    print(f"{'variante':<18}{'resolução':>11}{'acurácia':>10}{'erro px':>9}{'ms/frame':>10}{'p95 ms':>9}")
+    for nome, (resolucao, acuracia, desvio, ms, p95, _) in sorted(resultados.items(), key=lambda r: r[1][3]):
+        desvio = f"{desvio:.1f}" if desvio is not None else "-"
+        print(f"{nome:<18}{f'{resolucao[0]}x{resolucao[1]}':>11}{acuracia * 100:>9.1f}%{desvio:>9}{ms:>10.3f}{p95:>9.3f}")
+    if mostrar_erros:
+        for nome, (*_, errados) in resultados.items():
+            for arquivo, esperado, obtido in errados[:mostrar_erros]: print(f"  {nome}: {arquivo} esperado {esperado}, obtido {obtido}")
+    return resultados
+
+def main():
+    parser = argparse.ArgumentParser(description="Corpus rotulado e comparação das variantes de visão.")
+    sub = parser.add_subparsers(dest='comando', required=True)
+    p_ext = sub.add_parser('extrair', help="cria um corpus a partir de uma gravação")
+    p_ext.add_argument('gravacao'); p_ext.add_argument('diretorio')
+    p_ext.add_argument('--cada', type=int, default=5, help="guarda 1 a cada N frames")
+    p_ext.add_argument('--calibracao', default=calibracao.ARQUIVO_CALIBRACAO)
+    p_av = sub.add_parser('avaliar', help="roda as variantes no corpus")
+    p_av.add_argument('diretorio')
+    p_av.add_argument('--variantes', default=','.join(variantes.VARIANTES), help="lista separada por vírgulas")
+    p_av.add_argument('--calibracao', default=calibracao.ARQUIVO_CALIBRACAO)
+    p_av.add_argument('--repeticoes', type=int, default=3, help="passadas pelo corpus para medir o tempo")
+    p_av.add_argument('--acuracia-minima', type=float, default=None, help="ex.: 0.95")
+    p_av.add_argument('--exigir', default='interface1', help="variante que precisa atingir a acurácia mínima")
+    p_av.add_argument('--modelo-keras', default=None, help="modelo salvo da seg-linha-basico")
+    p_av.add_argument('--todos', action='store_true', help="inclui frames ainda não revisados")
+    p_av.add_argument('--mostrar-erros', type=int, default=0, metavar='N', help="lista até N frames errados por variante")
+    args = parser.parse_args()
+
+    calib = calibracao.carregar(args.calibracao)
+    if args.comando == 'extrair':
+        extrair(args.gravacao, args.diretorio, args.cada, calib)
+        return 0
+
+    variantes.Keras.MODELO = args.modelo_keras
+    nomes = [n.strip() for n in args.variantes.split(',') if n.strip()]
+    desconhecidas = [n for n in nomes if n not in variantes.VARIANTES]
+    if desconhecidas: raise SystemExit(f"Variantes desconhecidas: {desconhecidas}. Opções: {list(variantes.VARIANTES)}")
+    resultados = avaliar(args.diretorio, nomes, calib, args.repeticoes, args.todos, args.mostrar_erros)
+
+    if args.acuracia_minima is not None:
+        aprovadas = [(r[3], nome) for nome, r in resultados.items() if r[1] >= args.acuracia_minima]
+        if aprovadas: print(f"\nMais rápida com acurácia >= {args.acuracia_minima:.0%}: {min(aprovadas)[1]}")
+        else: print(f"\nNenhuma variante atingiu {args.acuracia_minima:.0%}.")
+        if args.exigir not in resultados:
+            print(f"REGRESSÃO: '{args.exigir}' não foi avaliada (fora de --variantes ou ignorada)")
+            return 1
+        if resultados[args.exigir][1] < args.acuracia_minima:
+            print(f"REGRESSÃO: '{args.exigir}' com {resultados[args.exigir][1]:.1%} < {args.acuracia_minima:.0%}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
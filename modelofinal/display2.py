@@ -1,4 +1,3 @@
-from picamera2 import Picamera2
 import cv2
 from PIL import Image, ImageTk
 import numpy as np
@@ -8,6 +7,7 @@ import threading
 import time
 import RPi.GPIO as GPIO
 from movimento import movimentar, parar
+from captura import CapturaPicamera2
 
 # ==== GPIO ====
 GPIO.setmode(GPIO.BOARD)
@@ -15,10 +15,15 @@ GPIO.setup(40, GPIO.OUT)
 GPIO.output(40, GPIO.HIGH)
 
 # ==== Inicialização da câmera ====
-picam2 = Picamera2()
-config = picam2.create_preview_configuration(main={"size": (640, 360), "format": "RGB888"})
-picam2.configure(config)
-picam2.start()
+# Dois streams: lores YUV420 pequeno só para a visão e main
+# RGB888 do tamanho da tela só para a prévia. A visão nunca espera a prévia.
+LARGURA, ALTURA = 640, 360               # Stream main (prévia)
+LARGURA_VISAO, ALTURA_VISAO = 320, 180   # Stream lores (visão)
+ESCALA = LARGURA / LARGURA_VISAO
+ROI_Y0, ROI_Y1 = int(200 / ESCALA), int(250 / ESCALA) # Mesma faixa de antes (200:250 em 640x360)
+
+camera = CapturaPicamera2(LARGURA_VISAO, ALTURA_VISAO, (LARGURA, ALTURA))
+if not camera.start(): raise SystemExit("Erro: câmera não abriu.")
 time.sleep(0.1)
 
 # ==== Interface Gráfica ====
@@ -56,14 +61,20 @@ class RoboApp:
         parar_btn.pack(pady=10)
 
     def processar_video(self):
+        roi_bgr = np.empty((ALTURA_VISAO, LARGURA_VISAO, 3), dtype=np.uint8)
+        seq = 0
         while self.running:
-            image = picam2.capture_array()
-            roi = image[200:250, 0:640]
+            quadro, _, seq_novo = camera.esperar_novo(seq, 0.5)
+            if quadro is None or seq_novo == seq: continue
+            seq = seq_novo
+            roi = quadro.bgr_linhas(ROI_Y0, ROI_Y1, roi_bgr)[ROI_Y0:ROI_Y1] # Cor só nas linhas da ROI
             
             # Convertendo para HSV para detecção de cor mais estável
+            # (RGB2HSV como antes: o RGB888 da Picamera2 já vinha em B, G, R na memória
+            # e as faixas abaixo foram ajustadas assim, com vermelho e azul trocados no matiz)
             hsv = cv2.cvtColor(roi, cv2.COLOR_RGB2HSV)
 
-            # Máscaras de cor
+            # Máscaras de cor (preto = V <= 50, o maior canal, como antes; não é o Y)
             Blackline = cv2.inRange(hsv, (0, 0, 0), (180, 255, 50))
             Greensign = cv2.inRange(hsv, (35, 40, 40), (85, 255, 255))
             Redsign = cv2.inRange(hsv, (0, 70, 50), (10, 255, 255))
@@ -80,17 +91,18 @@ class RoboApp:
             direction = "Linha não detectada!"
             color = (0, 0, 255)
             centerx_blk = None
+            linhas = [] # (x na prévia, cor) para desenhar depois do comando
 
             if len(contours_blk) > 0:
                 largest_blk = max(contours_blk, key=cv2.contourArea)
                 x_blk, y_blk, w_blk, h_blk = cv2.boundingRect(largest_blk)
                 centerx_blk = x_blk + w_blk // 2
-                cv2.line(image, (centerx_blk, 200), (centerx_blk, 250), (255, 0, 0), 3)
+                linhas.append((int(centerx_blk * ESCALA), (255, 0, 0)))
 
             if len(contours_grn) > 0 and centerx_blk is not None:
                 x, y, w, h = cv2.boundingRect(max(contours_grn, key=cv2.contourArea))
                 centerx_grn = x + w // 2
-                cv2.line(image, (centerx_grn, 200), (centerx_grn, 250), (0, 255, 0), 3)
+                linhas.append((int(centerx_grn * ESCALA), (0, 255, 0)))
                 if centerx_grn > centerx_blk:
                     direction = "Curva verde à direita"
                 else:
@@ -100,9 +112,9 @@ class RoboApp:
                 direction = "Comando vermelho detectado (ex: parar)"
                 color = (0, 0, 255)
             elif centerx_blk is not None:
-                if centerx_blk < 640 // 3:
+                if centerx_blk < LARGURA_VISAO // 3:
                     direction = "Curva à esquerda"
-                elif centerx_blk > 2 * 640 // 3:
+                elif centerx_blk > 2 * LARGURA_VISAO // 3:
                     direction = "Curva à direita"
                 else:
                     direction = "Seguir em frente"
@@ -111,6 +123,11 @@ class RoboApp:
             movimentar(direction)
             self.label_comando.config(text=f"Comando: {direction}")
 
+            # Prévia: último frame do stream main, só depois do comando enviado
+            image = camera.ler_previa()
+            if image is None: continue
+            image = image.copy() # O buffer é um slot do anel da câmera: desenhar nele sujaria a próxima prévia
+            for x_linha, cor_linha in linhas: cv2.line(image, (x_linha, 200), (x_linha, 250), cor_linha, 3)
             cv2.putText(image, direction, (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
             image_pil = Image.fromarray(image)
             imgtk = ImageTk.PhotoImage(image_pil)
@@ -123,5 +140,6 @@ root.geometry("800x500")
 app = RoboApp(root)
 root.mainloop()
 
+camera.release()
 GPIO.output(40, GPIO.LOW)
 cv2.destroyAllWindows()
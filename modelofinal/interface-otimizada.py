@@ -6,6 +6,8 @@ import os
 import time
 import motor_control 
 import ultrassonico
+import visao
+import padroes
 
 # --- MODO DE OTIMIZAÇÃO ---
 # Mude para True para desligar a visualização e ganhar desempenho máximo
@@ -36,6 +38,7 @@ class App:
         except FileNotFoundError: self.font_grande = pygame.font.Font(None, 46); self.font_media_bold = pygame.font.Font(None, 40); self.font_media = pygame.font.Font(None, 36)
         self.tela_inicio = TelaInicio(self); self.tela_calibracao = TelaCalibracao(self); self.tela_rodada = TelaRodada(self)
         self.calib_vars = {'THRESHOLD_VALUE': 80, 'WHITE_THRESHOLD_LOWER': 200, 'LOWER_GREEN': np.array([40, 50, 50]), 'UPPER_GREEN': np.array([80, 255, 255]), 'LOWER_RED1': np.array([0, 70, 50]), 'UPPER_RED1': np.array([10, 255, 255]), 'LOWER_RED2': np.array([170, 70, 50]), 'UPPER_RED2': np.array([180, 255, 255]), 'BLACK_PERCENT_THRESH': 50.0, 'GREEN_PERCENT_THRESH': 30.0, 'WHITE_PERCENT_THRESH': 50.0, 'RED_PERCENT_THRESH': 40.0}
+        self.lut_cores = visao.construir_lut(self.calib_vars) # Refeita só quando a calibração muda
         try: motor_control.setup_motors(); ultrassonico.setup_sensor()
         except Exception as e: print(f'Erro fatal ao iniciar hardware: {e}'); self.running = False
     def run(self):
@@ -56,6 +59,7 @@ class App:
         elif self.state == 'calibracao': self.tela_calibracao.draw()
         elif self.state == 'rodada': self.tela_rodada.draw()
         pygame.display.flip()
+    def reconstruir_lut(self): self.lut_cores = visao.construir_lut(self.calib_vars)
     def quit_app(self): print("Encerrando aplicação..."); self.tela_calibracao.stop(); self.tela_rodada.stop(); motor_control.full_stop_and_cleanup(); pygame.quit(); sys.exit()
 class TelaInicio:
     def __init__(self, app): self.app = app; self.btn_iniciar = pygame.Rect(25, 250, 430, 80); self.btn_calibrar = pygame.Rect(25, 350, 430, 80); self.btn_sair = pygame.Rect(25, 450, 430, 80)
@@ -94,8 +98,8 @@ class TelaCalibracao:
         else: instrucao, texto_botao = "Clique em vários pontos do Vermelho", "Finalizar Calibração"
         texto_instrucao = self.app.font_media.render(instrucao, True, TEXT_PURPLE_COLOR); self.app.screen.blit(texto_instrucao, (SCREEN_WIDTH // 2 - texto_instrucao.get_width() // 2, 420)); pygame.draw.rect(self.app.screen, PURPLE_COLOR, self.btn_proximo, border_radius=10); self.app.screen.blit(self.app.font_media.render(texto_botao, True, WHITE_COLOR), self.btn_proximo.center)
     def avancar_passo(self):
-        if self.step == 0 and self.black_samples: self.app.calib_vars['THRESHOLD_VALUE'] = int(np.mean(self.black_samples) + 30)
-        elif self.step == 1 and self.green_samples: h_vals, _, _ = zip(*self.green_samples); self.app.calib_vars['LOWER_GREEN'] = np.array([max(0, min(h_vals) - 10), 40, 40]); self.app.calib_vars['UPPER_GREEN'] = np.array([min(179, max(h_vals) + 10), 255, 255])
+        if self.step == 0 and self.black_samples: self.app.calib_vars['THRESHOLD_VALUE'] = int(np.mean(self.black_samples) + 30); self.app.reconstruir_lut()
+        elif self.step == 1 and self.green_samples: h_vals, _, _ = zip(*self.green_samples); self.app.calib_vars['LOWER_GREEN'] = np.array([max(0, min(h_vals) - 10), 40, 40]); self.app.calib_vars['UPPER_GREEN'] = np.array([min(179, max(h_vals) + 10), 255, 255]); self.app.reconstruir_lut()
         elif self.step == 2 and self.white_samples: self.app.calib_vars['WHITE_THRESHOLD_LOWER'] = int(np.mean(self.white_samples) - 30)
         if self.step < 3: self.step += 1
         else: print("Calibração finalizada."); self.stop(); self.app.state = 'inicio'
@@ -135,16 +139,8 @@ class TelaRodada:
         if self.cap: self.cap.release(); self.cap = None
         self.app.state = 'inicio'
 
-    def get_zone_state(self, hsv_frame, gray_frame, zone_roi, calib):
-        x, y, w, h = zone_roi
-        roi_hsv, roi_gray, total_pixels = hsv_frame[y:y+h, x:x+w], gray_frame[y:y+h, x:x+w], w*h
-        if total_pixels == 0: return "Branco"
-        mask_r1, mask_r2 = cv2.inRange(roi_hsv, calib['LOWER_RED1'], calib['UPPER_RED1']), cv2.inRange(roi_hsv, calib['LOWER_RED2'], calib['UPPER_RED2'])
-        if (cv2.countNonZero(mask_r1 + mask_r2) * 100 / total_pixels) > calib['RED_PERCENT_THRESH']: return "Vermelho"
-        if (cv2.countNonZero(cv2.inRange(roi_hsv, calib['LOWER_GREEN'], calib['UPPER_GREEN']))*100/total_pixels) > calib['GREEN_PERCENT_THRESH']: return "Verde"
-        _, mask_black = cv2.threshold(roi_gray, calib['THRESHOLD_VALUE'], 255, cv2.THRESH_BINARY_INV)
-        if (cv2.countNonZero(mask_black) * 100 / total_pixels) > calib['BLACK_PERCENT_THRESH']: return "Preto"
-        return "Branco"
+    def get_zone_state(self, frame, zone_roi, calib):
+        return visao.estado_do_recorte(frame, zone_roi, self.app.lut_cores, calib) # Só o recorte da zona passa pela LUT
 
     def update(self):
         if not self.cap or not self.cap.isOpened(): self.acao = "Câmera Desconectada"; motor_control.stop_all_motors(); return
@@ -157,34 +153,33 @@ class TelaRodada:
         distance = ultrassonico.get_distance()
         calib = self.app.calib_vars
         gray_frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
-        hsv_frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV)
-        zone_states = {name: self.get_zone_state(hsv_frame, gray_frame, roi, calib) for name, roi in self.ZONAS.items()}
+        zone_states = {name: self.get_zone_state(self.frame, roi, calib) for name, roi in self.ZONAS.items()}
+        acao_padrao = padroes.decidir(zone_states) # bitmask das zonas -> padrão OBR, uma consulta
+        # Centroide da linha em todo frame: os giros fechados pela visão precisam do erro deste frame
+        roi_line = gray_frame[self.ROI_LINE_Y : self.ROI_LINE_Y + self.ROI_LINE_HEIGHT, :]
+        _, mask = cv2.threshold(roi_line, calib['THRESHOLD_VALUE'], 255, cv2.THRESH_BINARY_INV)
+        M = cv2.moments(mask)
+        linha_detectada = M["m00"] > 0
+        if linha_detectada: self.erro = int(M["m10"] / M["m00"]) - FRAME_WIDTH // 2; self.last_erro = self.erro
         
         if distance < self.obstacle_dist_thresh and self.obstacle_state == "Nenhum": self.obstacle_state = "Iniciando_Desvio"
-        if self.obstacle_state != "Nenhum":
+        # Cada etapa do desvio é uma manobra sem bloqueio: a próxima só começa quando a anterior terminar
+        if self.obstacle_state != "Nenhum" and not motor_control.manobra_em_andamento():
             if self.obstacle_state == "Iniciando_Desvio": self.acao = "Obstaculo - Iniciar Desvio"; self.obstacle_state = "Contornando"
             elif self.obstacle_state == "Contornando": self.acao = "Obstaculo - Contornar"; self.obstacle_state = "Realinhando"
             elif self.obstacle_state == "Realinhando": self.acao = "Obstaculo - Realinhar"; self.obstacle_state = "Procurando_Linha"
             elif self.obstacle_state == "Procurando_Linha": self.acao = "Obstaculo - Procurar Linha"; self.obstacle_state = "Nenhum"
-        elif any(s == "Vermelho" for s in zone_states.values()): self.acao = "Fim de Pista"
-        elif zone_states['BE']=="Preto" and zone_states['BD']=="Preto": self.acao = "Seguir em Frente"
-        elif zone_states['BD']=="Verde" and zone_states['BE']=="Verde": self.acao = "Meia Volta"
-        elif zone_states['CE']=="Preto" and zone_states['CD']=="Branco" and zone_states['CM']=="Branco": self.acao = "Curva de 90 Esquerda"
-        elif zone_states['CD']=="Preto" and zone_states['CE']=="Branco" and zone_states['CM']=="Branco": self.acao = "Curva de 90 Direita"
+        elif acao_padrao != "Seguindo Linha": self.acao = acao_padrao
         else:
             self.acao = "Seguindo Linha"
-            roi_line = gray_frame[self.ROI_LINE_Y : self.ROI_LINE_Y + self.ROI_LINE_HEIGHT, :]
-            _, mask = cv2.threshold(roi_line, calib['THRESHOLD_VALUE'], 255, cv2.THRESH_BINARY_INV)
-            M = cv2.moments(mask)
-            if M["m00"] > 0:
-                self.erro = int(M["m10"] / M["m00"]) - FRAME_WIDTH // 2; self.last_erro = self.erro; self.gap_counter = 0
+            if linha_detectada: self.gap_counter = 0
             else:
                 self.gap_counter += 1
                 if self.gap_counter < self.MAX_GAP_FRAMES: self.acao, self.erro = "Atravessando Gap", self.last_erro
                 else: self.acao, self.erro = "Procurando Linha", 0
         
         if self.acao == "Fim de Pista": motor_control.stop_all_motors()
-        else: motor_control.gerenciar_movimento(self.acao, self.erro)
+        else: motor_control.gerenciar_movimento(self.acao, self.erro, linha_detectada=linha_detectada)
         
         # <<< OTIMIZAÇÃO: SÓ DESENHA NA TELA SE NÃO ESTIVER EM MODO COMPETIÇÃO >>>
         if not MODO_COMPETICAO:
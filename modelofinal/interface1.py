@@ -4,6 +4,19 @@ import pygame
 import sys
 import os
 import motor_control 
+import visao
+import captura
+import percepcao
+import controle
+import multiprocesso
+import calibracao
+import previa
+import cache_texto
+import latencia
+import perfil
+import sistema
+import collections
+import time
 
 # --- Configurações da Interface Gráfica ---
 SCREEN_WIDTH = 480
@@ -20,13 +33,40 @@ GRAY_COLOR = (50, 50, 50)
 
 CAMERA_DISPLAY_SIZE = (430, 242)
 
+# Taxa da interface (desenho). A percepção e os motores rodam no ritmo da câmera, em outra thread
+UI_FPS = 30
+
 # --- Configurações da Webcam ---
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 360
+# 0 = webcam V4L2, 'picamera2', ou o caminho de um vídeo / diretório de frames gravados (bancada)
+FONTE_CAMERA = 0
+
+# --- Grade de Ocupação ---
+# True: as zonas CM/CE/CD/BE/BD passam a ser vistas derivadas de uma grade N x M
+# (classifica o frame inteiro, não só os recortes das zonas: é opção de layout, não de velocidade)
+MODO_GRADE = False
+GRADE_LINHAS = 6
+GRADE_COLUNAS = 8
+
+# True: captura e visão rodam em processos separados (memória compartilhada), usando todos os núcleos do Pi
+MODO_MULTIPROCESSO = False
+
+# True: a câmera entrega YUYV cru; o cinza vem do plano Y e a cor só é convertida nas linhas das zonas
+# (não combina com MODO_MULTIPROCESSO, cujo anel compartilhado guarda BGR)
+MODO_YUV = False
+
+# Latência captura -> PWM: CSV com uma linha por frame (None desliga o arquivo; os percentis continuam na tela)
+LOG_LATENCIA = latencia.ARQUIVO_LOG
+
+# Perfil por etapa (cvtColor, moments, zonas, motor, desenho...). Tecla P: imprime a tabela; C: cProfile do loop
+PERFIL_ATIVO = False
+SEGUNDOS_CPROFILE = 5
 
 # --- Classe Principal da Aplicação ---
 class App:
     def __init__(self):
+        if PERFIL_ATIVO: perfil.ativar() # Tabela impressa também ao sair
         pygame.init()
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption("Axiom Robô Vision")
@@ -57,23 +97,22 @@ class App:
         self.tela_inicio = TelaInicio(self)
         self.tela_calibracao = TelaCalibracao(self)
         self.tela_rodada = TelaRodada(self)
-
-        # Variáveis de Calibração com valores padrão
-        self.calib_vars = {
-            'THRESHOLD_VALUE': 80,
-            'WHITE_THRESHOLD_LOWER': 200,
-            'LOWER_GREEN': np.array([40, 50, 50]),
-            'UPPER_GREEN': np.array([80, 255, 255]),
-            # Vermelho tem duas faixas no HSV
-            'LOWER_RED1': np.array([0, 70, 50]),
-            'UPPER_RED1': np.array([10, 255, 255]),
-            'LOWER_RED2': np.array([170, 70, 50]),
-            'UPPER_RED2': np.array([180, 255, 255]),
-            'BLACK_PERCENT_THRESH': 50.0,
-            'GREEN_PERCENT_THRESH': 30.0,
-            'WHITE_PERCENT_THRESH': 50.0,
-            'RED_PERCENT_THRESH': 40.0,
-        }
+        self.tela_desempenho = TelaDesempenho(self)
+
+        # Variáveis de Calibração: a última salva (calibracao.json) ou os valores padrão
+        self.calib_vars = calibracao.carregar()
+        # Textos renderizados uma vez e reaproveitados (LRU)
+        self.textos = cache_texto.CacheTexto()
+        self.estado_desenhado = None # Tela desenhada por inteiro por último (None força redesenho completo)
+        # Prévia da câmera: um resize direto para a tela num buffer reaproveitado, sem cópias extras
+        self.previa = previa.PreviaCamera(CAMERA_DISPLAY_SIZE)
+        # Tabela BGR -> cor, refeita apenas quando a calibração muda
+        self.lut_cores = visao.construir_lut(self.calib_vars)
+        # Idade de cada frame em cada etapa até o PWM (p50/p95/p99 na tela da rodada)
+        self.latencia = latencia.MedidorLatencia(arquivo_log=LOG_LATENCIA)
+        # Uma câmera só, aberta já na tela inicial e mantida aquecida; as telas assinam e cancelam
+        self.camera = captura.SessaoCamera(lambda: captura.criar_fonte(FONTE_CAMERA, FRAME_WIDTH, FRAME_HEIGHT, yuv=MODO_YUV))
+        if not MODO_MULTIPROCESSO and self.camera.abrir() is None: print("Aviso: Não foi possível abrir a webcam.")
 
         try:
             motor_control.setup_motors()
@@ -86,31 +125,46 @@ class App:
             self.handle_events()
             self.update()
             self.draw()
-            self.clock.tick(60)
+            self.clock.tick(UI_FPS)
         self.quit_app()
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT: self.running = False
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_p: perfil.despejar()
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_c: perfil.pedir_cprofile(SEGUNDOS_CPROFILE)
             if self.state == 'inicio': self.tela_inicio.handle_event(event)
             elif self.state == 'calibracao': self.tela_calibracao.handle_event(event)
             elif self.state == 'rodada': self.tela_rodada.handle_event(event)
+            elif self.state == 'desempenho': self.tela_desempenho.handle_event(event)
     
     def update(self):
         if self.state == 'calibracao': self.tela_calibracao.update()
         elif self.state == 'rodada': self.tela_rodada.update()
+        elif self.state == 'desempenho': self.tela_desempenho.update()
 
     def draw(self):
-        self.screen.fill(BG_COLOR)
-        if self.state == 'inicio': self.tela_inicio.draw()
-        elif self.state == 'calibracao': self.tela_calibracao.draw()
-        elif self.state == 'rodada': self.tela_rodada.draw()
-        pygame.display.flip()
+        if self.state == 'inicio': tela = self.tela_inicio
+        elif self.state == 'calibracao': tela = self.tela_calibracao
+        elif self.state == 'rodada': tela = self.tela_rodada
+        elif self.state == 'desempenho': tela = self.tela_desempenho
+        # Redesenho completo só ao trocar de tela (ou em telas sem suporte a retângulos sujos)
+        completo = self.state != self.estado_desenhado or not tela.parcial
+        if completo: self.screen.fill(BG_COLOR)
+        with perfil.escopo('desenho'): retangulos = tela.draw(completo)
+        if completo: pygame.display.flip()
+        elif retangulos: pygame.display.update(retangulos)
+        self.estado_desenhado = self.state
+
+    def reconstruir_lut(self):
+        self.lut_cores = visao.construir_lut(self.calib_vars)
 
     def quit_app(self):
         print("encerrando aplicação")
         self.tela_calibracao.stop()
         self.tela_rodada.stop()
+        self.camera.fechar()
+        print(self.latencia.resumo()); self.latencia.fechar()
         motor_control.full_stop_and_cleanup()
         pygame.quit()
         sys.exit()
@@ -121,19 +175,25 @@ class TelaInicio:
         self.btn_iniciar = pygame.Rect(25, 250, 430, 80)
         self.btn_calibrar = pygame.Rect(25, 350, 430, 80)
         self.btn_sair = pygame.Rect(25, 450, 430, 80)
+        self.btn_desempenho = pygame.Rect(25, 550, 430, 80)
+        self.parcial = True
 
-    def draw(self):
+    def draw(self, completo=True):
+        if not completo: return [] # Tela estática: nada muda depois do primeiro desenho
         self.app.screen.blit(self.app.logo, (SCREEN_WIDTH // 2 - 75, 50))
         pygame.draw.rect(self.app.screen, GREEN_COLOR, self.btn_iniciar, border_radius=10)
         pygame.draw.rect(self.app.screen, PURPLE_COLOR, self.btn_calibrar, border_radius=10)
         pygame.draw.rect(self.app.screen, RED_PINK_COLOR, self.btn_sair, border_radius=10)
-        texto_iniciar = self.app.font_grande.render("INICIAR RODADA", True, WHITE_COLOR)
-        texto_calibrar = self.app.font_grande.render("CALIBRAR", True, WHITE_COLOR)
-        texto_sair = self.app.font_grande.render("SAIR", True, WHITE_COLOR)
+        pygame.draw.rect(self.app.screen, GRAY_COLOR, self.btn_desempenho, border_radius=10)
+        texto_iniciar = self.app.textos.render(self.app.font_grande, "INICIAR RODADA", WHITE_COLOR)
+        texto_calibrar = self.app.textos.render(self.app.font_grande, "CALIBRAR", WHITE_COLOR)
+        texto_sair = self.app.textos.render(self.app.font_grande, "SAIR", WHITE_COLOR)
         self.app.screen.blit(texto_iniciar, texto_iniciar.get_rect(center=self.btn_iniciar.center))
         self.app.screen.blit(texto_calibrar, texto_calibrar.get_rect(center=self.btn_calibrar.center))
         self.app.screen.blit(texto_sair, texto_sair.get_rect(center=self.btn_sair.center))
-        texto_footer = self.app.font_media.render("Desenvolvido por Axiom", True, WHITE_COLOR)
+        texto_desempenho = self.app.textos.render(self.app.font_grande, "DESEMPENHO", WHITE_COLOR)
+        self.app.screen.blit(texto_desempenho, texto_desempenho.get_rect(center=self.btn_desempenho.center))
+        texto_footer = self.app.textos.render(self.app.font_media, "Desenvolvido por Axiom", WHITE_COLOR)
         self.app.screen.blit(texto_footer, (SCREEN_WIDTH // 2 - texto_footer.get_width() // 2, 720))
 
     def handle_event(self, event):
@@ -144,39 +204,41 @@ class TelaInicio:
                 self.app.state = 'calibracao'; self.app.tela_calibracao.start()
             elif self.btn_sair.collidepoint(event.pos):
                 self.app.running = False
+            elif self.btn_desempenho.collidepoint(event.pos):
+                self.app.tela_desempenho.abrir('inicio')
 
 class TelaCalibracao:
     def __init__(self, app):
-        self.app = app; self.cap = None; self.frame = None; self.gray_frame = None; self.hsv_frame = None
+        self.app = app; self.cap = None; self.frame = None; self.gray_frame = None; self.hsv_frame = None; self.seq = 0
         self.step = 0; self.btn_proximo = pygame.Rect(SCREEN_WIDTH // 2 - 125, 550, 250, 60)
         self.camera_rect = pygame.Rect((SCREEN_WIDTH - CAMERA_DISPLAY_SIZE[0]) // 2, 120, CAMERA_DISPLAY_SIZE[0], CAMERA_DISPLAY_SIZE[1])
         self.black_samples, self.green_samples, self.white_samples, self.red_samples = [], [], [], []
+        self.parcial = False # Câmera ocupa quase tudo; redesenha a tela inteira
 
     def start(self):
-        self.cap = cv2.VideoCapture(0, cv2.CAP_V4L2) # Mantendo o que funciona para você
-        if not self.cap.isOpened(): print("Erro: Não foi possível abrir a webcam."); self.app.state = 'inicio'; return
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH); self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+        self.cap = self.app.camera.assinar('calibracao') # Já aberta e aquecida pelo App
+        if self.cap is None: print("Erro: Não foi possível abrir a webcam."); self.app.state = 'inicio'; return
+        self.seq, self.frame = 0, None
         self.step = 0; self.black_samples, self.green_samples, self.white_samples, self.red_samples = [], [], [], []
 
     def stop(self):
-        if self.cap: self.cap.release(); self.cap = None
+        if self.cap: self.app.camera.cancelar('calibracao'); self.cap = None
 
     def update(self):
         if self.cap and self.cap.isOpened():
-            ret, self.frame = self.cap.read()
-            if ret: self.gray_frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY); self.hsv_frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV)
-            else: self.frame = None
+            frame, _, seq = self.cap.ler()
+            if frame is None or seq == self.seq: return # Sem frame novo: mantém o anterior
+            self.seq = seq
+            self.frame = captura.copia_bgr(frame) # Cópia: o buffer da fonte é reaproveitado
+            self.gray_frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY); self.hsv_frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV)
 
-    def draw(self):
+    def draw(self, completo=True):
         self.app.screen.blit(self.app.logo_pequeno, (SCREEN_WIDTH // 2 - 50, 10))
         if self.frame is not None:
-            frame_rgb = cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB)
-            frame_pygame = pygame.surfarray.make_surface(frame_rgb.swapaxes(0, 1))
-            frame_pygame = pygame.transform.scale(frame_pygame, CAMERA_DISPLAY_SIZE)
-            self.app.screen.blit(frame_pygame, self.camera_rect.topleft)
+            self.app.screen.blit(self.app.previa.surface(self.frame), self.camera_rect.topleft)
         else:
             pygame.draw.rect(self.app.screen, GRAY_COLOR, self.camera_rect)
-            texto_cam = self.app.font_media.render("Sem Sinal da Câmera", True, WHITE_COLOR)
+            texto_cam = self.app.textos.render(self.app.font_media, "Sem Sinal da Câmera", WHITE_COLOR)
             self.app.screen.blit(texto_cam, texto_cam.get_rect(center=self.camera_rect.center))
 
         if self.step == 0: instrucao, texto_botao = "Clique em vários pontos do Preto", "Próximo Passo"
@@ -184,20 +246,22 @@ class TelaCalibracao:
         elif self.step == 2: instrucao, texto_botao = "Clique em vários pontos do Branco", "Próximo Passo"
         else: instrucao, texto_botao = "Clique em vários pontos do Vermelho", "Finalizar Calibração"
         
-        texto_instrucao = self.app.font_media.render(instrucao, True, TEXT_PURPLE_COLOR)
+        texto_instrucao = self.app.textos.render(self.app.font_media, instrucao, TEXT_PURPLE_COLOR)
         self.app.screen.blit(texto_instrucao, (SCREEN_WIDTH // 2 - texto_instrucao.get_width() // 2, 420))
         pygame.draw.rect(self.app.screen, PURPLE_COLOR, self.btn_proximo, border_radius=10)
-        texto_renderizado_botao = self.app.font_media.render(texto_botao, True, WHITE_COLOR)
+        texto_renderizado_botao = self.app.textos.render(self.app.font_media, texto_botao, WHITE_COLOR)
         self.app.screen.blit(texto_renderizado_botao, texto_renderizado_botao.get_rect(center=self.btn_proximo.center))
 
     def avancar_passo(self):
         if self.step == 0 and self.black_samples:
             self.app.calib_vars['THRESHOLD_VALUE'] = int(np.mean(self.black_samples) + 30)
+            self.app.reconstruir_lut()
         elif self.step == 1 and self.green_samples:
             h_vals, _, _ = zip(*self.green_samples)
             h_min, h_max = max(0, min(h_vals) - 10), min(179, max(h_vals) + 10)
             self.app.calib_vars['LOWER_GREEN'] = np.array([h_min, 40, 40])
             self.app.calib_vars['UPPER_GREEN'] = np.array([h_max, 255, 255])
+            self.app.reconstruir_lut()
         elif self.step == 2 and self.white_samples:
              self.app.calib_vars['WHITE_THRESHOLD_LOWER'] = int(np.mean(self.white_samples) - 30)
 
@@ -207,6 +271,7 @@ class TelaCalibracao:
                 # Lógica para o vermelho (que cruza o 0/180)
                 # Não calculamos a média, apenas usamos faixas padrão amplas que funcionam bem
                 print("Faixas de vermelho definidas para o padrão.")
+            calibracao.salvar(self.app.calib_vars) # Usada também pelo modo sem tela (competicao.py)
             print("Calibração finalizada."); self.stop(); self.app.state = 'inicio'
             
     def handle_event(self, event):
@@ -225,122 +290,61 @@ class TelaCalibracao:
 
 class TelaRodada:
     def __init__(self, app):
-        self.app = app; self.cap = None; self.frame = None;
+        self.app = app; self.cap = None; self.frame = None; self.loop = None
         self.camera_rect = pygame.Rect((SCREEN_WIDTH - CAMERA_DISPLAY_SIZE[0]) // 2, 100, CAMERA_DISPLAY_SIZE[0], CAMERA_DISPLAY_SIZE[1])
         self.btn_parar = pygame.Rect(25, 700, 430, 70)
         self.erro, self.acao, self.area = 0, "Iniciando...", "Percurso"
-        self.last_erro = 0; self.gap_counter = 0; self.MAX_GAP_FRAMES = 15
-        
-        self.ROI_CM = (262, 8, 116, 85); self.ROI_CE = (64, 131, 186, 85); self.ROI_CD = (390, 131, 186, 85)
-        self.ROI_BE = (64, 275, 186, 85); self.ROI_BD = (390, 275, 186, 85)
-        self.ZONAS = {'CM': self.ROI_CM, 'CE': self.ROI_CE, 'CD': self.ROI_CD, 'BE': self.ROI_BE, 'BD': self.ROI_BD}
-        self.ROI_LINE_Y = 240; self.ROI_LINE_HEIGHT = 40
+        self.seq_exibido = 0; self.texto_latencia = ""; self.quadros_ui = 0
+        self.parcial = True; self.seq_desenhado = -1; self.valores_desenhados = {}
+
+        # Visão + decisão (sem pygame); as ROIs e o estado de gap ficam lá dentro
+        self.percepcao = percepcao.PercepcaoRodada(FRAME_WIDTH, FRAME_HEIGHT, MODO_GRADE, (GRADE_LINHAS, GRADE_COLUNAS))
+        self.ZONAS = self.percepcao.ZONAS
+        self.ROI_LINE_Y, self.ROI_LINE_HEIGHT = self.percepcao.ROI_LINE_Y, self.percepcao.ROI_LINE_HEIGHT
 
     def start(self):
-        self.cap = cv2.VideoCapture(0, cv2.CAP_V4L2) # Mantendo o que funciona para você
-        if not self.cap.isOpened(): print("Erro: Não foi possível abrir a webcam."); self.app.state = 'inicio'; return
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH); self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
-        self.acao, self.erro, self.last_erro, self.gap_counter = "Iniciando...", 0, 0, 0
+        obter_calibracao = lambda: (self.app.calib_vars, self.app.lut_cores)
+        if MODO_MULTIPROCESSO:
+            self.app.camera.fechar() # O processo de captura abre a câmera por conta própria
+            self.cap = multiprocesso.PipelineMultiprocesso(FRAME_WIDTH, FRAME_HEIGHT, FONTE_CAMERA, None, MODO_GRADE, (GRADE_LINHAS, GRADE_COLUNAS))
+            aberta = self.cap.start(self.app.calib_vars, self.app.lut_cores)
+        else:
+            # Câmera do App, já aquecida: a thread de captura guarda só o frame mais novo
+            self.cap = self.app.camera.assinar('rodada')
+            aberta = self.cap is not None
+        if not aberta:
+            print("Erro: Não foi possível abrir a webcam.")
+            if self.cap: self.cap.release()
+            self.cap = None; self.app.state = 'inicio'; return
+        self.acao, self.erro, self.seq_exibido, self.frame = "Iniciando...", 0, 0, None
+        self.app.latencia.reiniciar()
+        # Percepção e motores rodam no ritmo da câmera, fora do loop do pygame
+        if MODO_MULTIPROCESSO: self.loop = multiprocesso.LoopControleMultiprocesso(self.cap, None, motor_control, obter_calibracao, self.app.latencia)
+        else: self.loop = controle.LoopControle(self.cap, self.percepcao, motor_control, obter_calibracao, self.app.latencia)
+        self.loop.start()
 
     def stop(self):
+        if self.loop: self.loop.stop(); self.loop = None
         motor_control.stop_all_motors()
-        if self.cap: self.cap.release(); self.cap = None
+        if self.cap:
+            if MODO_MULTIPROCESSO: self.cap.release()
+            else: self.app.camera.cancelar('rodada') # A câmera continua aquecida para a próxima rodada
+            self.cap = None
         self.app.state = 'inicio'
 
-    def get_zone_state(self, hsv_frame, gray_frame, zone_roi, calib):
-        x, y, w, h = zone_roi
-        roi_hsv = hsv_frame[y:y+h, x:x+w]
-        roi_gray = gray_frame[y:y+h, x:x+w]
-        total_pixels = w * h
-        if total_pixels == 0: return "Branco"
-        
-        # 1. Checa por Vermelho (MAIOR PRIORIDADE)
-        mask_r1 = cv2.inRange(roi_hsv, calib['LOWER_RED1'], calib['UPPER_RED1'])
-        mask_r2 = cv2.inRange(roi_hsv, calib['LOWER_RED2'], calib['UPPER_RED2'])
-        mask_red = mask_r1 + mask_r2
-        if (cv2.countNonZero(mask_red) * 100 / total_pixels) > calib['RED_PERCENT_THRESH']: return "Vermelho"
-        
-        # 2. Checa por Verde
-        mask_green = cv2.inRange(roi_hsv, calib['LOWER_GREEN'], calib['UPPER_GREEN'])
-        if (cv2.countNonZero(mask_green) * 100 / total_pixels) > calib['GREEN_PERCENT_THRESH']: return "Verde"
-        
-        # 3. Checa por Preto
-        _, mask_black = cv2.threshold(roi_gray, calib['THRESHOLD_VALUE'], 255, cv2.THRESH_BINARY_INV)
-        if (cv2.countNonZero(mask_black) * 100 / total_pixels) > calib['BLACK_PERCENT_THRESH']: return "Preto"
-        
-        return "Branco"
-
     def update(self):
-        if not self.cap or not self.cap.isOpened(): 
-            self.acao = "Câmera Desconectada"
-            motor_control.stop_all_motors()
-            return
-        
-        ret, self.frame = self.cap.read()
-        if not ret: 
-            self.acao = "Falha na Captura"
-            motor_control.stop_all_motors()
-            return
-        
-        calib = self.app.calib_vars
-        gray_frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
-        
-        # --- LÓGICA OTIMIZADA ---
-        # 1. Tente seguir a linha primeiro (operação mais barata)
-        roi_line = gray_frame[self.ROI_LINE_Y : self.ROI_LINE_Y + self.ROI_LINE_HEIGHT, :]
-        _, mask = cv2.threshold(roi_line, calib['THRESHOLD_VALUE'], 255, cv2.THRESH_BINARY_INV)
-        M = cv2.moments(mask)
-        
-        line_detected = M["m00"] > 0
-        
-        if line_detected:
-            self.gap_counter = 0
-            cx = int(M["m10"] / M["m00"])
-            self.erro = cx - FRAME_WIDTH // 2
-            self.last_erro = self.erro
-            
-            # 2. APENAS SE a linha for detectada e reta (erro baixo), cheque as zonas
-            # Isso evita processamento pesado em curvas ou quando o robô está perdido
-            if abs(self.erro) < 50: # Se o robô está bem centralizado, pode haver uma intersecção
-                hsv_frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2HSV)
-                zone_states = {name: self.get_zone_state(hsv_frame, gray_frame, roi, calib) for name, roi in self.ZONAS.items()}
-
-                # Lógica de Decisão Hierárquica (igual à sua, mas dentro da condição)
-                if any(state == "Vermelho" for state in zone_states.values()):
-                    self.acao = "Fim de Pista"
-                elif zone_states['BE'] == "Preto" and zone_states['BD'] == "Preto": self.acao = "Seguir em Frente"
-                elif zone_states['BD'] == "Verde" and zone_states['BE'] == "Verde": self.acao = "Meia Volta"
-                elif zone_states['CE'] == "Preto" and zone_states['CD'] == "Branco" and zone_states['CM'] == "Branco": self.acao = "Curva de 90 Esquerda"
-                elif zone_states['CD'] == "Preto" and zone_states['CE'] == "Branco" and zone_states['CM'] == "Branco": self.acao = "Curva de 90 Direita"
-                else:
-                    self.acao = "Seguindo Linha"
-            else:
-                 self.acao = "Seguindo Linha" # Se o erro for alto (em curva), apenas siga a linha
-
-        # 3. Se a linha não for detectada (GAP ou fim de linha)
-        else:
-            self.gap_counter += 1
-            if self.gap_counter < self.MAX_GAP_FRAMES:
-                self.acao = "Atravessando Gap"
-                self.erro = self.last_erro # Mantenha o último erro conhecido
-            else:
-                self.acao = "Procurando Linha"
-                self.erro = 0 # O erro é 0, mas a ação fará ele girar para procurar
-        
-        # Envia comando final para os motores
-        if self.acao == "Fim de Pista":
-            motor_control.stop_all_motors()
-        else:
-            motor_control.gerenciar_movimento(self.acao, self.erro)
-        
-        # A visualização de ROIs continua a mesma, mas precisaremos dos zone_states
-        # Para evitar erros, inicializamos zone_states caso não seja calculado
-        try:
-            zone_states_for_viz = zone_states
-        except NameError:
-            zone_states_for_viz = {name: "N/A" for name in self.ZONAS.keys()}
-            
-        self.frame = self.visualize_rois(self.frame.copy(), zone_states_for_viz)
+        # Roda no ritmo da interface: só lê o último retrato publicado pelo loop de controle
+        if not self.loop: return
+        snap = self.loop.snapshot()
+        self.acao, self.erro = snap['acao'], snap['erro']
+        if snap['frame'] is not None and snap['seq'] != self.seq_exibido:
+            self.seq_exibido = snap['seq']
+            with perfil.escopo('visualize_rois'): self.frame = self.visualize_rois(captura.copia_bgr(snap['frame']), snap['zone_states'])
+        # Percentis a cada ~0,5 s (não vale recalcular nem re-renderizar todo quadro)
+        self.quadros_ui += 1
+        if self.quadros_ui % (UI_FPS // 2) == 0:
+            total = self.app.latencia.percentis().get('total')
+            self.texto_latencia = f"LAT {total[0]:.0f}/{total[1]:.0f}/{total[2]:.0f} ms" if total else ""
 
     def visualize_rois(self, display_frame, zone_states):
         cv2.rectangle(display_frame, (0, self.ROI_LINE_Y), (FRAME_WIDTH, self.ROI_LINE_Y + self.ROI_LINE_HEIGHT), (255, 255, 0), 2)
@@ -354,37 +358,174 @@ class TelaRodada:
             cv2.rectangle(display_frame, (x, y), (x + w, y + h), color, 2)
         return display_frame
 
-    def draw(self):
-        # ... (O código de desenho permanece o mesmo) ...
-        self.app.screen.blit(self.app.logo_pequeno, (SCREEN_WIDTH // 2 - 50, 0))
-        if self.frame is not None:
-            frame_rgb = cv2.cvtColor(self.frame, cv2.COLOR_BGR2RGB)
-            frame_pygame = pygame.surfarray.make_surface(frame_rgb.swapaxes(0, 1))
-            frame_pygame = pygame.transform.scale(frame_pygame, CAMERA_DISPLAY_SIZE)
-            self.app.screen.blit(frame_pygame, self.camera_rect.topleft)
-        else: pygame.draw.rect(self.app.screen, GRAY_COLOR, self.camera_rect)
-        erro_text = f"ERRO: {self.erro}"
-        texto_erro = self.app.font_media_bold.render(erro_text, True, TEXT_PURPLE_COLOR)
-        self.app.screen.blit(texto_erro, texto_erro.get_rect(centerx=SCREEN_WIDTH/2, y=400))
-        texto_acao_label = self.app.font_media_bold.render("AÇÃO:", True, TEXT_PURPLE_COLOR)
-        texto_acao_valor = self.app.font_media.render(self.acao, True, TEXT_PURPLE_COLOR)
-        self.app.screen.blit(texto_acao_label, texto_acao_label.get_rect(centerx=SCREEN_WIDTH/2, y=460))
-        self.app.screen.blit(texto_acao_valor, texto_acao_valor.get_rect(centerx=SCREEN_WIDTH/2, y=500))
-        texto_area_label = self.app.font_media_bold.render("ÁREA:", True, TEXT_PURPLE_COLOR)
-        texto_area_valor = self.app.font_media.render(self.area, True, TEXT_PURPLE_COLOR)
-        self.app.screen.blit(texto_area_label, texto_area_label.get_rect(centerx=SCREEN_WIDTH/2, y=560))
-        self.app.screen.blit(texto_area_valor, texto_area_valor.get_rect(centerx=SCREEN_WIDTH/2, y=600))
-        pygame.draw.rect(self.app.screen, PURPLE_COLOR, self.btn_parar, border_radius=10)
-        texto_parar = self.app.font_grande.render("PARAR LEITURA", True, WHITE_COLOR)
-        self.app.screen.blit(texto_parar, texto_parar.get_rect(center=self.btn_parar.center))
+    def draw(self, completo=True):
+        retangulos = []
+        if completo:
+            # Parte fixa: só ao entrar na tela
+            self.app.screen.blit(self.app.logo_pequeno, (SCREEN_WIDTH // 2 - 50, 0))
+            texto_acao_label = self.app.textos.render(self.app.font_media_bold, "AÇÃO:", TEXT_PURPLE_COLOR)
+            self.app.screen.blit(texto_acao_label, texto_acao_label.get_rect(centerx=SCREEN_WIDTH/2, y=460))
+            texto_area_label = self.app.textos.render(self.app.font_media_bold, "ÁREA:", TEXT_PURPLE_COLOR)
+            self.app.screen.blit(texto_area_label, texto_area_label.get_rect(centerx=SCREEN_WIDTH/2, y=560))
+            pygame.draw.rect(self.app.screen, PURPLE_COLOR, self.btn_parar, border_radius=10)
+            texto_parar = self.app.textos.render(self.app.font_grande, "PARAR LEITURA", WHITE_COLOR)
+            self.app.screen.blit(texto_parar, texto_parar.get_rect(center=self.btn_parar.center))
+            self.valores_desenhados = {}; self.seq_desenhado = -1
+
+        # Câmera: só quando chega frame novo
+        if self.seq_exibido != self.seq_desenhado:
+            if self.frame is not None: self.app.screen.blit(self.app.previa.surface(self.frame), self.camera_rect.topleft)
+            else: pygame.draw.rect(self.app.screen, GRAY_COLOR, self.camera_rect)
+            self.seq_desenhado = self.seq_exibido
+            retangulos.append(self.camera_rect)
+
+        # Valores: só os que mudaram, limpando a faixa de fundo antes
+        for chave, texto, fonte, y in (('erro', f"ERRO: {self.erro}", self.app.font_media_bold, 400),
+                                       ('acao', self.acao, self.app.font_media, 500),
+                                       ('area', self.area, self.app.font_media, 600),
+                                       ('latencia', self.texto_latencia, self.app.font_media, 650)):
+            if self.valores_desenhados.get(chave) == texto: continue
+            faixa = pygame.Rect(0, y, SCREEN_WIDTH, fonte.get_height())
+            self.app.screen.fill(BG_COLOR, faixa)
+            surf = self.app.textos.render(fonte, texto, TEXT_PURPLE_COLOR)
+            self.app.screen.blit(surf, surf.get_rect(centerx=SCREEN_WIDTH/2, y=y))
+            self.valores_desenhados[chave] = texto
+            retangulos.append(faixa)
+        return retangulos
 
     def handle_event(self, event):
         if (event.type == pygame.MOUSEBUTTONDOWN and self.btn_parar.collidepoint(event.pos)) or \
            (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
             self.stop()
+        elif event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+            self.app.tela_desempenho.abrir('rodada') # O loop de controle continua rodando por trás
+
+class TelaDesempenho:
+    """
+    Painel de pit: Hz do loop, FPS da câmera, frames descartados, ms por
+    etapa, temperatura/frequência da CPU e a curva recente do erro.
+
+    Tudo que é fixo (rótulos, moldura) é desenhado uma vez ao entrar. Os
+    números são recalculados a INTERVALO_NUMEROS e só as linhas cujo texto
+    mudou são redesenhadas; a curva do erro é desenhada numa Surface própria.
+    Assim a tela quase não rouba CPU do que ela mede.
+    """
+    INTERVALO_NUMEROS = 0.5 # s entre atualizações dos números
+    INTERVALO_CURVA = 0.1   # s entre redesenhos da curva
+    PONTOS_CURVA = 150      # Amostras de erro na curva (~5 s a 30 FPS)
+    MAX_LINHAS = 12
+    LINHA_Y0, LINHA_ALTURA = 150, 32
+
+    def __init__(self, app):
+        self.app = app
+        self.voltar_para = 'inicio'
+        self.btn_voltar = pygame.Rect(25, 700, 430, 70)
+        self.curva_rect = pygame.Rect(25, 560, 430, 120)
+        self.curva = pygame.Surface(self.curva_rect.size)
+        self.erros = collections.deque(maxlen=self.PONTOS_CURVA)
+        self.parcial = True
+        self.linhas, self.linhas_desenhadas = [], {}
+        self.curva_suja = True
+        self.t_numeros = self.t_curva = 0.0; self.seq_erro = -1
+        self.ciclos_antes = self.capturados_antes = self.descartados_antes = self.gpio_antes = self.evitadas_antes = 0
+        self.t_contadores = time.monotonic() # update() pode rodar antes do primeiro abrir()
+
+    def abrir(self, voltar_para):
+        self.voltar_para = voltar_para
+        self.t_numeros = 0.0; self.linhas_desenhadas = {}; self.curva_suja = True
+        self.ciclos_antes, self.capturados_antes, self.descartados_antes, self.gpio_antes, self.evitadas_antes = self._contadores()
+        self.t_contadores = time.monotonic()
+        self.app.state = 'desempenho'
+
+    def _contadores(self):
+        loop, fonte = self.app.tela_rodada.loop, self.app.camera.fonte
+        return (loop.ciclos if loop else 0,
+                fonte.frames_capturados if fonte else 0,
+                fonte.frames_descartados if fonte else 0) + motor_control.gpio_stats()
+
+    def update(self):
+        # Erro do PID: uma amostra por decisão nova
+        loop = self.app.tela_rodada.loop
+        if loop:
+            snap = loop.snapshot()
+            if snap['seq'] != self.seq_erro: self.seq_erro = snap['seq']; self.erros.append(snap['erro']); self.curva_suja = True
+
+        agora = time.monotonic()
+        if agora - self.t_numeros < self.INTERVALO_NUMEROS: return
+        self.t_numeros = agora
+
+        ciclos, capturados, descartados, gpio, evitadas = self._contadores()
+        dt = max(agora - self.t_contadores, 1e-6)
+        hz_loop, fps_camera = (ciclos - self.ciclos_antes) / dt, (capturados - self.capturados_antes) / dt
+        descartados_s = (descartados - self.descartados_antes) / dt
+        gpio_s, evitadas_s = (gpio - self.gpio_antes) / dt, (evitadas - self.evitadas_antes) / dt
+        self.ciclos_antes, self.capturados_antes, self.descartados_antes, self.t_contadores = ciclos, capturados, descartados, agora
+        self.gpio_antes, self.evitadas_antes = gpio, evitadas
+
+        temp, freq = sistema.temperatura_cpu(), sistema.frequencia_cpu_mhz()
+        linhas = [f"LOOP: {hz_loop:.1f} Hz" if loop else "LOOP: parado",
+                  f"CÂMERA: {fps_camera:.1f} FPS",
+                  f"DESCARTADOS: {descartados} ({descartados_s:.1f}/s)",
+                  f"CPU: {temp:.1f} °C" if temp is not None else "CPU: ? °C",
+                  f"FREQ: {freq:.0f} MHz" if freq is not None else "FREQ: ? MHz",
+                  f"THROTTLING: {sistema.descrever_throttling(sistema.estado_throttling())}",
+                  f"GPIO: {gpio_s:.0f}/s ({evitadas_s:.0f}/s evitadas)"]
+        # ms por etapa: percentis de latência sempre; médias do perfil se ligado
+        for etapa, (p50, p95, _) in self.app.latencia.percentis().items(): linhas.append(f"{etapa}: {p50:.1f} / {p95:.1f} ms")
+        for etapa, media in sorted(perfil.medias_ms().items(), key=lambda e: -e[1])[:3]: linhas.append(f"{etapa}: {media:.2f} ms")
+        self.linhas = linhas[:self.MAX_LINHAS]
+
+    def _desenhar_curva(self):
+        self.curva.fill(GRAY_COLOR)
+        w, h = self.curva_rect.size
+        pygame.draw.line(self.curva, TEXT_PURPLE_COLOR, (0, h // 2), (w, h // 2), 1) # erro = 0
+        if len(self.erros) > 1:
+            escala = (h / 2 - 2) / max(1, max(abs(e) for e in self.erros))
+            passo = w / (self.PONTOS_CURVA - 1)
+            inicio = self.PONTOS_CURVA - len(self.erros)
+            pontos = [((inicio + i) * passo, h / 2 - e * escala) for i, e in enumerate(self.erros)]
+            pygame.draw.lines(self.curva, GREEN_COLOR, False, pontos, 2)
+        self.app.screen.blit(self.curva, self.curva_rect.topleft)
+        self.curva_suja = False
+
+    def draw(self, completo=True):
+        retangulos = []
+        if completo:
+            self.app.screen.blit(self.app.logo_pequeno, (SCREEN_WIDTH // 2 - 50, 0))
+            titulo = self.app.textos.render(self.app.font_media_bold, "DESEMPENHO", TEXT_PURPLE_COLOR)
+            self.app.screen.blit(titulo, titulo.get_rect(centerx=SCREEN_WIDTH / 2, y=105))
+            rotulo = self.app.textos.render(self.app.font_media, "ERRO (PID)", TEXT_PURPLE_COLOR)
+            self.app.screen.blit(rotulo, rotulo.get_rect(x=self.curva_rect.x, bottom=self.curva_rect.y - 2))
+            pygame.draw.rect(self.app.screen, PURPLE_COLOR, self.btn_voltar, border_radius=10)
+            texto_voltar = self.app.textos.render(self.app.font_grande, "VOLTAR", WHITE_COLOR)
+            self.app.screen.blit(texto_voltar, texto_voltar.get_rect(center=self.btn_voltar.center))
+            self.linhas_desenhadas = {}; self.curva_suja = True
+
+        # Números: só as linhas cujo texto mudou (render direto, valores mudam demais para o cache)
+        for i in range(self.MAX_LINHAS):
+            texto = self.linhas[i] if i < len(self.linhas) else ""
+            if self.linhas_desenhadas.get(i) == texto: continue
+            faixa = pygame.Rect(0, self.LINHA_Y0 + i * self.LINHA_ALTURA, SCREEN_WIDTH, self.LINHA_ALTURA)
+            self.app.screen.fill(BG_COLOR, faixa)
+            if texto: self.app.screen.blit(self.app.font_media.render(texto, True, WHITE_COLOR), (25, faixa.y))
+            self.linhas_desenhadas[i] = texto
+            retangulos.append(faixa)
+
+        if self.curva_suja and (completo or time.monotonic() - self.t_curva >= self.INTERVALO_CURVA):
+            self.t_curva = time.monotonic()
+            self._desenhar_curva()
+            retangulos.append(self.curva_rect)
+        return retangulos
+
+    def handle_event(self, event):
+        if (event.type == pygame.MOUSEBUTTONDOWN and self.btn_voltar.collidepoint(event.pos)) or \
+           (event.type == pygame.KEYDOWN and event.key in (pygame.K_ESCAPE, pygame.K_h)):
+            # Só volta para a rodada se ela ainda estiver rodando
+            self.app.state = self.voltar_para if self.voltar_para != 'rodada' or self.app.tela_rodada.loop else 'inicio'
 
 if __name__ == '__main__':
     try: os.chdir(os.path.dirname(os.path.abspath(__file__)))
     except NameError: pass
+    if MODO_MULTIPROCESSO and MODO_YUV: sys.exit("Erro: MODO_YUV não funciona com MODO_MULTIPROCESSO (o anel compartilhado guarda BGR).")
     app = App()
     app.run()
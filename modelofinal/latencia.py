@@ -0,0 +1,67 @@
+import threading
+import numpy as np
+
+# ===================================================================
+# --- LATÊNCIA CAPTURA -> MOTOR (PERCENTIS MÓVEIS POR ETAPA) ---
+# ===================================================================
+#
+# Todos os instantes vêm de time.monotonic() (o mesmo relógio da captura,
+# inclusive entre processos), então as diferenças são a idade real do frame.
+
+# percepcao: frame capturado -> visão pronta (linha + zonas)
+# decisao:   visão pronta -> ação escolhida
+# atuacao:   ação escolhida -> o comando foi escrito no PWM (com a thread do
+#            PID, na primeira passada dela depois do comando, não na volta
+#            de gerenciar_movimento)
+# total:     frame capturado -> PWM escrito
+ETAPAS = ('percepcao', 'decisao', 'atuacao', 'total')
+JANELA = 300 # Amostras na janela móvel (~10 s a 30 FPS)
+ARQUIVO_LOG = 'latencia.csv'
+
+class MedidorLatencia:
+    """
+    Guarda as últimas `janela` latências de cada etapa (em ms) num anel
+    pré-alocado e calcula p50/p95/p99 sob demanda. Se arquivo_log for dado,
+    cada frame vira uma linha CSV (escrita com buffer, não trava o loop).
+    """
+    def __init__(self, janela=JANELA, arquivo_log=None):
+        self.janela = janela
+        self._amostras = np.zeros((len(ETAPAS), janela))
+        self._n = 0
+        self._lock = threading.Lock()
+        self._log = None
+        if arquivo_log:
+            try:
+                self._log = open(arquivo_log, 'w')
+                self._log.write("seq,t_captura," + ",".join(f"{e}_ms" for e in ETAPAS) + "\n")
+            except OSError as e:
+                print(f"Aviso: não foi possível abrir o log de latência '{arquivo_log}' ({e}).")
+
+    def registrar(self, seq, t_captura, t_percepcao, t_decisao, t_atuacao):
+        valores = ((t_percepcao - t_captura) * 1000, (t_decisao - t_percepcao) * 1000,
+                   (t_atuacao - t_decisao) * 1000, (t_atuacao - t_captura) * 1000)
+        with self._lock:
+            self._amostras[:, self._n % self.janela] = valores
+            self._n += 1
+            if self._log: self._log.write(f"{seq},{t_captura:.6f}," + ",".join(f"{v:.3f}" for v in valores) + "\n")
+
+    def reiniciar(self):
+        """Esvazia a janela (o log continua)."""
+        with self._lock: self._n = 0
+
+    def percentis(self):
+        """{etapa: (p50, p95, p99)} em ms sobre a janela; {} sem amostras."""
+        with self._lock:
+            if self._n == 0: return {}
+            dados = self._amostras[:, :min(self._n, self.janela)].copy()
+        p = np.percentile(dados, (50, 95, 99), axis=1)
+        return {etapa: tuple(p[:, i]) for i, etapa in enumerate(ETAPAS)}
+
+    def resumo(self):
+        p = self.percentis()
+        if not p: return "latência: sem amostras"
+        return "  ".join(f"{etapa} {p50:.1f}/{p95:.1f}/{p99:.1f}" for etapa, (p50, p95, p99) in p.items()) + " ms (p50/p95/p99)"
+
+    def fechar(self):
+        with self._lock:
+            if self._log: self._log.close(); self._log = None
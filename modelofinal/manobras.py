@@ -0,0 +1,7 @@
+# O código fica em comum/manobras.py (o mesmo da phoenix); este arquivo só mantém `import manobras` nesta pasta
+import os
+import sys
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path: sys.path.append(RAIZ)
+from comum import manobras
+sys.modules[__name__] = manobras
@@ -1,5 +1,8 @@
 import RPi.GPIO as GPIO
+import math
+import threading
 import time
+import manobras
 
 # ===================================================================
 # --- CONFIGURAÇÕES E CONSTANTES DE MOVIMENTO ---
@@ -11,16 +14,39 @@ IN1_R, IN2_R, EN_R = 16, 19, 13
 
 # --- Parâmetros PID (Calibre estes!) ---
 KP, KI, KD = 0.4, 0.0, 0.05
+PID_REFERENCE_DT = 1 / 30 # KI e KD foram calibrados com um passo por frame a 30 FPS; o dt real é reescalado para isso
+PID_RATE_HZ = 100         # Taxa fixa da thread do PID (0 = calcula a cada frame, na thread da visão)
+DERIVATIVE_CUTOFF_HZ = 8  # Corte do filtro passa-baixa da derivada
+PID_MAX_DT = 0.1          # Um passo maior que isso (frame travado) conta só até aqui
+PID_STALE_SECONDS = 0.25  # Medida da visão mais velha que isso: PID para os motores e recomeça do zero
 
 # --- Parâmetros de Velocidade (Calibre estes!) ---
 BASE_SPEED = 20
 INTERSECTION_SPEED = 20
 TURN_SPEED = 25
 
-# --- Constantes para Manobras Especiais (Calibre estes!) ---
-TURN_DURATION_90_DEGREES = 0.5 # Tempo para girar 90 graus em intersecções
-TURN_DURATION_180_DEGREES = 0.9
-FORWARD_BEFORE_TURN_DURATION = 0.25
+# --- Perfil de velocidade adaptativo (Calibre estes!) ---
+# A cada frame, a velocidade base do PID sai da confiança na linha, do |erro| e da
+# curvatura (linha na faixa de antecipação, perto do topo, x linha na faixa de baixo).
+# Desligado até ser validado na pista: ligado, a reta chega a MAX_SPEED (o dobro da BASE_SPEED)
+SPEED_PLANNER = False # False = BASE_SPEED fixa, como antes
+MAX_SPEED = 40        # Em reta, com a linha bem vista
+MIN_SPEED = BASE_SPEED # Na curva: nunca mais devagar que a velocidade que já funciona
+ERROR_SLOWDOWN = 150  # |erro| (px) em que a velocidade chega ao mínimo
+CURVE_SLOWDOWN = 150  # |erro_frente - erro| (px) em que a velocidade chega ao mínimo
+ACCEL_LIMIT = 40      # Quanto a velocidade base pode subir por segundo
+DECEL_LIMIT = 150     # Quanto pode descer por segundo (freia mais rápido do que acelera)
+
+# --- Curvas fechadas pela visão (Calibre estes!) ---
+# Avança até a marcação sair da visão e gira até a linha voltar ao centro;
+# os tempos abaixo são só limites de segurança.
+FORWARD_BEFORE_TURN_TIMEOUT = 0.6
+TURN_TIMEOUT_90_DEGREES = 1.5
+TURN_TIMEOUT_180_DEGREES = 2.5
+TURN_CENTER_TOLERANCE = 20   # |erro| (px do frame da visão) que já conta como centralizado
+TURN_SLOWDOWN_ERROR = 160    # Abaixo desse |erro| o giro desacelera proporcionalmente
+TURN_MIN_SPEED = 12
+LINE_ACTIONS = ("Seguindo Linha", "Seguir em Frente") # Sem linha_detectada nem geometria, só essas ações contam como linha à vista
 
 # --- Constantes para o Desvio de Obstáculo (Calibre estes!) ---
 OBSTACLE_MANEUVER_SPEED = 25
@@ -30,18 +56,72 @@ OBSTACLE_FORWARD_DURATION = 0.8
 OBSTACLE_SEARCH_DURATION = 0.5
 
 # --- Variáveis de Estado Internas ---
-last_error, integral = 0, 0
+last_error, integral, derivative = 0, 0, 0
+last_error_time = None
 INTEGRAL_LIMIT = 200
+_pid_lock = threading.Lock()
+_pid_target = None # (erro, base_speed, instante) da última medida; None = PID não comanda os motores
+_pid_thread, _pid_running = None, False
+pid_cycles, pid_overruns = 0, 0 # Ciclos da thread do PID e ciclos que perderam o prazo
+_escrita = (0.0, 0.0) # (instante do comando, instante em que ele foi escrito no PWM) da última escrita nova
+planned_speed, planned_time = None, 0.0
 pwm_L, pwm_R = None, None
+driver = None # MotorDriver, criado em setup_motors
 last_action_time = 0
 ACTION_DELAY_SECONDS = 0.5
+SPIN_MIN_FRACTION = 0.5 # Parte do giro que sempre é feita antes de aceitar a linha reencontrada
+manobra = None # manobras.Manobra em andamento (avançada por gerenciar_movimento, sem sleep)
 
 # ===================================================================
 # --- FUNÇÕES DE CONTROLE DE MOTORES ---
 # ===================================================================
 
+class MotorDriver:
+    """
+    Os dois motores da ponte H, lembrando o último sentido e duty escritos em
+    cada um: um comando só escreve o que mudou. set_speeds atualiza os dois
+    motores de uma vez (os pinos de sentido dos dois numa única GPIO.output).
+    gpio_calls conta as chamadas feitas e skipped as que foram evitadas.
+    """
+    DUTY_STEP = 0.5 # Resolução do duty (%): variações menores do PID não viram escrita
+
+    def __init__(self, pins, pwms):
+        self.pins, self.pwms = pins, pwms # {'L': (IN1, IN2), 'R': ...}, {'L': pwm, 'R': pwm}
+        self.gpio_calls, self.skipped = 0, 0
+        self.invalidate()
+
+    def invalidate(self):
+        """Esquece o estado (a próxima escrita de cada motor vai inteira para o GPIO)."""
+        self.direction = {'L': None, 'R': None} # 1 = frente, -1 = ré
+        self.duty = {'L': None, 'R': None}
+
+    def set_speeds(self, speeds):
+        """speeds: [(motor, velocidade -100..100), ...]. Velocidade 0 só zera o duty, como antes."""
+        channels, values, duties = [], [], []
+        for motor, speed in speeds:
+            speed = max(-100, min(100, speed))
+            duties.append((motor, round(abs(speed) / self.DUTY_STEP) * self.DUTY_STEP))
+            if speed == 0: continue
+            direction = 1 if speed > 0 else -1
+            if direction == self.direction[motor]: self.skipped += 1; continue
+            self.direction[motor] = direction
+            channels.extend(self.pins[motor])
+            values.extend((GPIO.HIGH, GPIO.LOW) if direction > 0 else (GPIO.LOW, GPIO.HIGH))
+        if channels:
+            GPIO.output(channels, values)
+            self.gpio_calls += 1
+        for motor, duty in duties:
+            if duty == self.duty[motor]: self.skipped += 1; continue
+            self.duty[motor] = duty
+            self.pwms[motor].ChangeDutyCycle(duty)
+            self.gpio_calls += 1
+
+def gpio_stats():
+    """(chamadas ao GPIO, escritas evitadas) desde o setup."""
+    return (driver.gpio_calls, driver.skipped) if driver else (0, 0)
+
 def setup_motors():
-    global pwm_L, pwm_R
+    global pwm_L, pwm_R, driver
     try:
         GPIO.setmode(GPIO.BCM)
         GPIO.setwarnings(False)
@@ -50,123 +130,255 @@ def setup_motors():
         pwm_R = GPIO.PWM(EN_R, 1000)
         pwm_L.start(0)
         pwm_R.start(0)
+        driver = MotorDriver({'L': (IN1_L, IN2_L), 'R': (IN1_R, IN2_R)}, {'L': pwm_L, 'R': pwm_R})
         print("Módulo de Controle: Motores configurados.")
+        start_pid_thread()
     except Exception as e:
         print(f"Módulo de Controle: Erro no setup: {e}")
         raise e
 
 def set_motor_speed(motor, speed):
-    speed = max(-100, min(100, speed))
-    if speed > 0:
-        if motor == 'L': GPIO.output(IN1_L, GPIO.HIGH); GPIO.output(IN2_L, GPIO.LOW); pwm_L.ChangeDutyCycle(speed)
-        elif motor == 'R': GPIO.output(IN1_R, GPIO.HIGH); GPIO.output(IN2_R, GPIO.LOW); pwm_R.ChangeDutyCycle(speed)
-    elif speed < 0:
-        if motor == 'L': GPIO.output(IN1_L, GPIO.LOW); GPIO.output(IN2_L, GPIO.HIGH); pwm_L.ChangeDutyCycle(abs(speed))
-        elif motor == 'R': GPIO.output(IN1_R, GPIO.LOW); GPIO.output(IN2_R, GPIO.HIGH); pwm_R.ChangeDutyCycle(abs(speed))
-    else:
-        if motor == 'L': pwm_L.ChangeDutyCycle(0)
-        elif motor == 'R': pwm_R.ChangeDutyCycle(0)
+    global _escrita
+    driver.set_speeds(((motor, speed),))
+    _escrita = (time.monotonic(),) * 2
+
+def _set_speeds(speed_L, speed_R, t_command=None):
+    """t_command: instante em que a visão deu o comando (a thread do PID escreve depois); None = agora."""
+    global _escrita
+    driver.set_speeds((('L', speed_L), ('R', speed_R)))
+    if t_command is None: _escrita = (time.monotonic(),) * 2
+    elif t_command != _escrita[0]: _escrita = (t_command, time.monotonic()) # Só a primeira escrita de cada comando
+
+def instante_atuacao(desde):
+    """
+    Instante em que o PWM recebeu o comando mais recente, se ele foi dado a
+    partir de `desde`; None se nenhum comando desde então chegou ao PWM (a
+    thread do PID ainda não rodou, ou o frame não mudou nada nos motores).
+    """
+    t_command, t_write = _escrita
+    return t_write if t_command >= desde else None
+
+def _release_pid():
+    """Tira os motores da thread do PID antes de qualquer outro comando."""
+    global _pid_target
+    with _pid_lock: _pid_target = None
 
 def stop_all_motors():
-    set_motor_speed('L', 0)
-    set_motor_speed('R', 0)
+    # Parar de fora (fim de pista, falha de câmera, saída) também cancela a manobra
+    global manobra
+    _release_pid()
+    manobra = None
+    _set_speeds(0, 0)
 
 def full_stop_and_cleanup():
+    stop_pid_thread()
     print("Módulo de Controle: Limpando pinos GPIO.")
     if pwm_L: pwm_L.stop()
     if pwm_R: pwm_R.stop()
+    if driver: driver.invalidate()
     if GPIO.getmode() is not None:
         GPIO.cleanup()
 
-def _calculate_pid(error):
-    global integral, last_error
-    integral += error
-    integral = max(-INTEGRAL_LIMIT, min(INTEGRAL_LIMIT, integral))
-    derivative = error - last_error
-    last_error = error
-    return KP * error + KI * integral + KD * derivative
+def _new_measurement(error, t):
+    """
+    Atualiza a derivada (filtrada) com uma medida nova da visão no instante t e
+    devolve o dt desde a anterior. Depois de uma pausa longa, recomeça do zero.
+    """
+    global integral, last_error, derivative, last_error_time
+    if last_error_time is None or t - last_error_time > PID_STALE_SECONDS:
+        integral, derivative, dt = 0, 0, PID_REFERENCE_DT
+    else:
+        dt = min(max(t - last_error_time, 1e-3), PID_MAX_DT)
+        raw = (error - last_error) / dt * PID_REFERENCE_DT
+        alpha = dt / (dt + 1 / (2 * math.pi * DERIVATIVE_CUTOFF_HZ))
+        derivative += alpha * (raw - derivative)
+    last_error, last_error_time = error, t
+    return dt
+
+def _calculate_pid(error, dt, limit):
+    """
+    Saída do PID para um passo de dt segundos, limitada a ±limit. Anti-windup:
+    a integral fica em ±INTEGRAL_LIMIT e não cresce enquanto a saída está
+    saturada no mesmo sentido do erro.
+    """
+    global integral
+    dt = min(dt, PID_MAX_DT)
+    pd = KP * error + KD * derivative
+    candidate = max(-INTEGRAL_LIMIT, min(INTEGRAL_LIMIT, integral + error * dt / PID_REFERENCE_DT))
+    output = pd + KI * candidate
+    if abs(output) <= limit or (output > 0) != (error > 0): integral = candidate
+    return max(-limit, min(limit, pd + KI * integral))
 
 def _follow_line_pid(error, base_speed):
-    pid_output = _calculate_pid(error)
-    set_motor_speed('L', base_speed - pid_output)
-    set_motor_speed('R', base_speed + pid_output)
-
-def _turn(direction, speed, duration):
-    if direction == 'left': set_motor_speed('L', -speed); set_motor_speed('R', speed)
-    else: set_motor_speed('L', speed); set_motor_speed('R', -speed)
-    time.sleep(duration)
-    stop_all_motors()
-
-def _move_forward(speed, duration):
-    set_motor_speed('L', speed)
-    set_motor_speed('R', speed)
-    time.sleep(duration)
-    stop_all_motors()
-    
+    global _pid_target
+    now = time.monotonic()
+    if _pid_running:
+        # A thread do PID aplica nos motores, no ritmo dela
+        with _pid_lock: _pid_target = (error, base_speed, now)
+        return
+    dt = _new_measurement(error, now)
+    pid_output = _calculate_pid(error, dt, 100 - abs(base_speed))
+    _set_speeds(base_speed - pid_output, base_speed + pid_output)
+
+def _plan_speed(error, geometria):
+    """Velocidade base para este frame, com a subida e a descida limitadas."""
+    confianca, erro_frente = geometria
+    # Curva chegando: a linha lá em cima se afastou da de baixo, ou sumiu de lá (curva fechada, gap)
+    curvatura = CURVE_SLOWDOWN if erro_frente is None else abs(erro_frente - error)
+    fator = confianca * (1 - min(1, abs(error) / ERROR_SLOWDOWN)) * (1 - min(1, curvatura / CURVE_SLOWDOWN))
+    return _ramp_speed(MIN_SPEED + (MAX_SPEED - MIN_SPEED) * fator)
+
+def _ramp_speed(target):
+    """Leva a velocidade base até target sem passar de ACCEL_LIMIT/DECEL_LIMIT por segundo."""
+    global planned_speed, planned_time
+    now = time.monotonic()
+    if planned_speed is None or now - planned_time > PID_STALE_SECONDS: planned_speed = MIN_SPEED # Saindo de manobra/parada
+    else:
+        dt = now - planned_time
+        planned_speed += max(-DECEL_LIMIT * dt, min(ACCEL_LIMIT * dt, target - planned_speed))
+    planned_time = now
+    return planned_speed
+
+# ===================================================================
+# --- THREAD DO PID EM TAXA FIXA ---
+# ===================================================================
+#
+# A visão só entrega (erro, velocidade base) em _pid_target; esta thread roda o
+# PID a PID_RATE_HZ com o dt medido, mesmo que a câmera caia de 60 para 30 FPS
+# ou um frame trave. A derivada só muda quando chega uma medida nova.
+
+def _pid_loop():
+    global _pid_target, pid_cycles, pid_overruns
+    period = 1 / PID_RATE_HZ
+    deadline = previous = time.monotonic()
+    last_seen = None
+    while _pid_running:
+        deadline += period
+        wait = deadline - time.monotonic()
+        if wait > 0: time.sleep(wait)
+        else: pid_overruns += 1; deadline = time.monotonic() # Atrasou: não tenta recuperar em rajada
+        now = time.monotonic()
+        dt, previous = now - previous, now
+        with _pid_lock:
+            if _pid_target is None: continue
+            error, base_speed, t = _pid_target
+            if now - t > PID_STALE_SECONDS: # A visão parou de mandar medidas
+                _pid_target = None
+                _set_speeds(0, 0)
+                continue
+            if t != last_seen: _new_measurement(error, t); last_seen = t
+            pid_output = _calculate_pid(error, dt, 100 - abs(base_speed))
+            _set_speeds(base_speed - pid_output, base_speed + pid_output, t)
+            pid_cycles += 1
+
+def start_pid_thread():
+    global _pid_thread, _pid_running
+    if _pid_running or PID_RATE_HZ <= 0: return
+    _pid_running = True
+    _pid_thread = threading.Thread(target=_pid_loop, name="pid", daemon=True)
+    _pid_thread.start()
+    print(f"Módulo de Controle: PID em {PID_RATE_HZ} Hz.")
+
+def stop_pid_thread():
+    global _pid_thread, _pid_running
+    _pid_running = False
+    if _pid_thread: _pid_thread.join(timeout=1.0)
+    _pid_thread = None
+    _release_pid()
+
+def _turn(direction, speed, duration, abortable=False):
+    """Segmentos de giro; se abortable, a segunda metade termina ao reencontrar a linha."""
+    if not abortable: return [manobras.girar(direction, speed, duration)]
+    fixo = duration * SPIN_MIN_FRACTION
+    return [manobras.girar(direction, speed, fixo), manobras.girar(direction, speed, duration - fixo, abortavel=True)]
+
+def _move_forward(speed, duration, abortable=False):
+    return [manobras.frente(speed, duration, abortable)]
+
 def _move_backward(speed, duration):
-    set_motor_speed('L', -speed)
-    set_motor_speed('R', -speed)
-    time.sleep(duration)
-    stop_all_motors()
+    return [manobras.tras(speed, duration)]
+
+def _forward_past_marker(acao):
+    return [manobras.AvancoAteSair(INTERSECTION_SPEED, acao, FORWARD_BEFORE_TURN_TIMEOUT)]
+
+def _turn_to_line(direction, timeout, lines_to_skip=0):
+    return [manobras.GiroAteLinha(direction, TURN_SPEED, timeout, lines_to_skip, TURN_CENTER_TOLERANCE,
+                                  TURN_SLOWDOWN_ERROR, TURN_MIN_SPEED)]
+
+def _start_maneuver(nome, segmentos):
+    global manobra
+    _release_pid()
+    manobra = manobras.Manobra(nome, segmentos, _set_speeds).iniciar()
+
+def manobra_em_andamento():
+    return manobra is not None and manobra.ativa
 
 # ===================================================================
 # --- FUNÇÃO PRINCIPAL DE MOVIMENTO ---
 # ===================================================================
 
-def gerenciar_movimento(acao, erro):
-    global last_action_time
+def gerenciar_movimento(acao, erro, geometria=None, linha_detectada=None):
+    """
+    geometria: (confiança, erro_frente) da percepção; sem ela, velocidade base fixa.
+    linha_detectada: a visão achou a linha na faixa da linha neste frame (e erro é
+    dessa medida). Sem o valor, vale confiança > 0 na geometria e, sem geometria,
+    só as LINE_ACTIONS contam como linha à vista.
+    """
+    global last_action_time, manobra
+    # Manobra em andamento: avança com o que a visão viu neste frame (giros
+    # fecham pela linha; nos segmentos abortáveis, a linha reencontrada encerra a manobra)
+    if manobra is not None:
+        if linha_detectada is None: linha_detectada = geometria[0] > 0 if geometria else acao in LINE_ACTIONS
+        if manobra.tick(linha_encontrada=linha_detectada, erro=erro, acao=acao): return
+        if manobra.abortada: print(f"Módulo de Controle: {manobra.nome} encerrada, linha reencontrada.")
+        manobra = None
+        last_action_time = time.time()
     current_time = time.time()
 
-    is_special_maneuver = any(sub in acao for sub in ["Curva", "Virar", "Meia Volta", "Obstaculo"])
+    # As etapas do desvio vêm em sequência, uma depois da outra: não entram no delay
+    is_special_maneuver = any(sub in acao for sub in ["Curva", "Virar", "Meia Volta"])
     if is_special_maneuver and (current_time - last_action_time < ACTION_DELAY_SECONDS):
         stop_all_motors()
         return
 
     # --- LÓGICA DE MOVIMENTO ---
     if "Seguindo Linha" in acao:
-        _follow_line_pid(erro, base_speed=BASE_SPEED)
-    elif "Seguir em Frente" in acao:
-        _follow_line_pid(erro, base_speed=INTERSECTION_SPEED)
+        _follow_line_pid(erro, base_speed=_plan_speed(erro, geometria) if SPEED_PLANNER and geometria else BASE_SPEED)
+    elif "Seguir em Frente" in acao: # Com o planejador, cruzamento e gap também passam pela rampa
+        _follow_line_pid(erro, base_speed=_ramp_speed(INTERSECTION_SPEED) if SPEED_PLANNER else INTERSECTION_SPEED)
     elif "Atravessando Gap" in acao:
-        _follow_line_pid(erro, base_speed=BASE_SPEED + 5)
+        _follow_line_pid(erro, base_speed=_ramp_speed(BASE_SPEED + 5) if SPEED_PLANNER else BASE_SPEED + 5)
 
     # --- LÓGICA DE DESVIO DE OBSTÁCULO ---
     elif acao == "Obstaculo - Iniciar Desvio":
         print("Módulo de Controle: Obstáculo. Recuando e virando.")
-        _move_backward(OBSTACLE_MANEUVER_SPEED, OBSTACLE_REVERSE_DURATION)
-        _turn('right', OBSTACLE_MANEUVER_SPEED, OBSTACLE_TURN_DURATION)
-        last_action_time = time.time()
+        _start_maneuver(acao, _move_backward(OBSTACLE_MANEUVER_SPEED, OBSTACLE_REVERSE_DURATION) +
+                        _turn('right', OBSTACLE_MANEUVER_SPEED, OBSTACLE_TURN_DURATION))
     
     elif acao == "Obstaculo - Contornar":
         print("Módulo de Controle: Contornando obstáculo.")
-        _move_forward(OBSTACLE_MANEUVER_SPEED, OBSTACLE_FORWARD_DURATION)
-        last_action_time = time.time()
+        _start_maneuver(acao, _move_forward(OBSTACLE_MANEUVER_SPEED, OBSTACLE_FORWARD_DURATION))
         
     elif acao == "Obstaculo - Realinhar":
         print("Módulo de Controle: Realinhando com a pista.")
-        _turn('left', OBSTACLE_MANEUVER_SPEED, OBSTACLE_TURN_DURATION)
-        last_action_time = time.time()
+        _start_maneuver(acao, _turn('left', OBSTACLE_MANEUVER_SPEED, OBSTACLE_TURN_DURATION, abortable=True))
         
     elif acao == "Obstaculo - Procurar Linha":
         print("Módulo de Controle: Procurando a linha após desvio.")
-        _move_forward(OBSTACLE_MANEUVER_SPEED, OBSTACLE_SEARCH_DURATION)
-        last_action_time = time.time()
+        _start_maneuver(acao, _move_forward(OBSTACLE_MANEUVER_SPEED, OBSTACLE_SEARCH_DURATION, abortable=True))
         
     # --- MANOBRAS ESPECIAIS ---
     elif "Curva de 90" in acao or "Virar a" in acao:
         direction = 'right' if "Direita" in acao else 'left'
-        _move_forward(INTERSECTION_SPEED, FORWARD_BEFORE_TURN_DURATION)
-        _turn(direction, TURN_SPEED, TURN_DURATION_90_DEGREES)
-        last_action_time = time.time()
+        _start_maneuver(acao, _forward_past_marker(acao) + _turn_to_line(direction, TURN_TIMEOUT_90_DEGREES))
         
     elif "Meia Volta" in acao:
-        _move_forward(INTERSECTION_SPEED, 0.2)
-        _turn('right', TURN_SPEED, TURN_DURATION_180_DEGREES)
-        last_action_time = time.time()
+        # Passa pelo braço do cruzamento (1 linha) antes de centralizar na linha de volta
+        _start_maneuver(acao, _forward_past_marker(acao) + _turn_to_line('right', TURN_TIMEOUT_180_DEGREES, lines_to_skip=1))
 
     elif "Procurando Linha" in acao:
-        set_motor_speed('L', 35)
-        set_motor_speed('R', -35)
+        _release_pid()
+        _set_speeds(35, -35)
     
     else:
         stop_all_motors()
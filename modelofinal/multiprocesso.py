@@ -0,0 +1,203 @@
+import cv2
+import multiprocessing as mp
+import numpy as np
+import queue
+import time
+from multiprocessing import shared_memory
+import captura
+import controle
+import perfil
+
+# ===================================================================
+# --- PIPELINE EM PROCESSOS SEPARADOS (MEMÓRIA COMPARTILHADA) ---
+# ===================================================================
+#
+# processo de captura --(anel de frames em SharedMemory)--> processo de visão
+# processo de visão --(fila com registros pequenos de decisão)--> interface/motores
+#
+# Nenhum frame passa por pickle: os frames ficam num anel de N_BUFFERS
+# buffers pré-alocados e só o índice do slot circula. Cada lado roda no seu
+# próprio interpretador (e núcleo), sem disputar o GIL com o pygame.
+#
+# A captura usa captura.criar_fonte, então webcam, Picamera2 e vídeo gravado
+# funcionam igual ao modo de uma thread. O anel guarda BGR: frames YUV da
+# Picamera2 (lores) são convertidos no processo de captura, e a captura YUYV
+# crua (--yuv / MODO_YUV) não tem vantagem aqui, por isso não é aceita.
+
+N_BUFFERS = 3 # O mais recente, o que a visão está usando e um livre para a captura
+
+# Estado do processo de captura
+INICIANDO, ABERTA, ERRO = 0, 1, -1
+
+def _processo_captura(nome_shm, forma, ultimo, em_uso, novo_frame, rodando, estado, seq_slots, origem, fps):
+    shm = shared_memory.SharedMemory(name=nome_shm)
+    anel = np.ndarray(forma, dtype=np.uint8, buffer=shm.buf)
+    # A prévia vem do próprio anel: a Picamera2 não precisa do stream main
+    opcoes = {'com_previa': False} if origem == 'picamera2' else {}
+    fonte = captura.criar_fonte(origem, forma[2], forma[1], fps, **opcoes)
+    if not fonte.start():
+        fonte.release(); estado.value = ERRO; shm.close(); return
+    estado.value = ABERTA
+
+    seq, seq_fonte = 0, 0
+    try:
+        while rodando.value:
+            frame, timestamp, seq_novo = fonte.esperar_novo(seq_fonte, 0.1)
+            if frame is None or seq_novo == seq_fonte:
+                if not fonte.isOpened(): break # Vídeo acabou ou câmera caiu: o processo termina e a interface vê isOpened() False
+                continue
+            seq_fonte = seq_novo
+
+            # Escolhe um slot que não seja o mais recente nem esteja em uso pela visão
+            with ultimo.get_lock():
+                slot_recente = int(ultimo[1])
+                slot = next(i for i in range(forma[0]) if i != slot_recente and not em_uso[i])
+                seq_slots[slot] = 0 # Slot sendo reescrito: quem copiar agora descarta a cópia
+
+            destino = anel[slot]
+            if isinstance(frame, captura.QuadroYUV): frame.bgr_linhas(destino=destino)
+            elif frame.shape == destino.shape: np.copyto(destino, frame)
+            else: cv2.resize(frame, (forma[2], forma[1]), dst=destino)
+
+            seq += 1
+            # timestamp é o instante de captura da fonte (time.monotonic vale entre processos)
+            with ultimo.get_lock(): ultimo[0], ultimo[1], ultimo[2], seq_slots[slot] = seq, slot, timestamp, seq
+            novo_frame.set()
+    finally:
+        fonte.release()
+        del anel
+        shm.close()
+
+def _processo_visao(nome_shm, forma, ultimo, em_uso, novo_frame, rodando, fila_calibracao, fila_decisoes, modo_grade, grade, perfil_ativo=False):
+    import percepcao
+    if perfil_ativo: perfil.ativar(despejar_ao_sair=False) # Os escopos da visão ficam neste processo; o relatório sai ao terminar
+    shm = shared_memory.SharedMemory(name=nome_shm)
+    anel = np.ndarray(forma, dtype=np.uint8, buffer=shm.buf)
+    perc = percepcao.PercepcaoRodada(forma[2], forma[1], modo_grade, grade)
+    calib, lut = fila_calibracao.get()
+
+    ultimo_seq = 0
+    try:
+        while rodando.value:
+            try:
+                while True: calib, lut = fila_calibracao.get_nowait() # Fica só com a calibração mais nova
+            except queue.Empty: pass
+
+            if not novo_frame.wait(0.1): continue
+            novo_frame.clear()
+            with ultimo.get_lock():
+                seq, slot, timestamp = int(ultimo[0]), int(ultimo[1]), ultimo[2]
+                if seq == ultimo_seq: continue
+                em_uso[slot] = 1
+
+            try:
+                with perfil.escopo('percepcao'): acao, erro, zone_states = perc.processar(anel[slot], calib, lut)
+            finally:
+                with ultimo.get_lock(): em_uso[slot] = 0
+            ultimo_seq = seq
+            fila_decisoes.put((seq, slot, timestamp, acao, erro, zone_states, perc.t_percepcao, perc.t_decisao, perc.geometria))
+    finally:
+        del anel
+        shm.close()
+        if perfil_ativo: perfil.despejar()
+
+class PipelineMultiprocesso:
+    """
+    Lado da interface: cria o anel em memória compartilhada, inicia os dois
+    processos e entrega os registros de decisão. Tem release()/isOpened()
+    como a captura normal, para TelaRodada tratar os dois do mesmo jeito.
+    origem/fps: como em captura.criar_fonte (webcam, 'picamera2' ou gravação).
+    """
+    def __init__(self, largura, altura, origem=0, fps=None, modo_grade=False, grade=(6, 8)):
+        self.forma = (N_BUFFERS, altura, largura, 3)
+        self.origem, self.fps = origem, fps
+        self.modo_grade, self.grade = modo_grade, grade
+        # spawn: os filhos não herdam a câmera, o SDL nem as threads do pai, mas
+        # reimportam o módulo principal (vindo da interface1, isso importa o pygame,
+        # sem inicializá-lo, porque o App só é criado sob __main__)
+        self.ctx = mp.get_context('spawn')
+        self.shm, self.anel, self.processos = None, None, []
+        self.registros_descartados = 0
+
+    def start(self, calib, lut, timeout_abertura=5.0):
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(self.forma)))
+        self.anel = np.ndarray(self.forma, dtype=np.uint8, buffer=self.shm.buf)
+        self.ultimo = self.ctx.Array('d', [0, 0, 0]) # seq, slot, timestamp
+        self.em_uso = self.ctx.Array('b', N_BUFFERS, lock=False) # Protegido pelo lock de 'ultimo'
+        self.seq_slots = self.ctx.Array('d', N_BUFFERS, lock=False) # seq do frame em cada slot (0 = sendo escrito)
+        self.novo_frame = self.ctx.Event()
+        self.rodando = self.ctx.Value('b', 1)
+        self.estado = self.ctx.Value('i', INICIANDO)
+        self.fila_calibracao = self.ctx.Queue()
+        self.fila_decisoes = self.ctx.Queue()
+        self.atualizar_calibracao(calib, lut)
+
+        comum = (self.shm.name, self.forma, self.ultimo, self.em_uso, self.novo_frame, self.rodando)
+        self.processos = [
+            self.ctx.Process(target=_processo_captura, args=comum + (self.estado, self.seq_slots, self.origem, self.fps), daemon=True),
+            self.ctx.Process(target=_processo_visao, args=comum + (self.fila_calibracao, self.fila_decisoes, self.modo_grade, self.grade, perfil.ATIVO), daemon=True),
+        ]
+        for p in self.processos: p.start()
+
+        limite = time.monotonic() + timeout_abertura
+        while self.estado.value == INICIANDO and time.monotonic() < limite: time.sleep(0.01)
+        return self.estado.value == ABERTA
+
+    def atualizar_calibracao(self, calib, lut):
+        self.fila_calibracao.put((calib, lut))
+
+    def esperar_decisao(self, timeout):
+        """Registro (seq, slot, timestamp, acao, erro, zone_states, t_percepcao, t_decisao, geometria) mais novo, ou None se nada chegar a tempo."""
+        try: registro = self.fila_decisoes.get(timeout=timeout)
+        except queue.Empty: return None
+        try:
+            while True: registro = self.fila_decisoes.get_nowait(); self.registros_descartados += 1
+        except queue.Empty: pass
+        return registro
+
+    def copiar_frame(self, slot, seq):
+        """
+        Cópia do frame seq, para a prévia na tela. Depois que a visão larga o
+        slot a captura pode reescrevê-lo a qualquer momento: se o seq do slot
+        mudou antes ou durante a cópia, devolve None em vez de um frame rasgado.
+        """
+        if self.seq_slots[slot] != seq: return None
+        copia = self.anel[slot].copy()
+        return copia if self.seq_slots[slot] == seq else None
+
+    def isOpened(self):
+        return self.estado is not None and self.estado.value == ABERTA and all(p.is_alive() for p in self.processos)
+
+    def release(self):
+        if not self.processos: return
+        self.rodando.value = 0
+        for p in self.processos:
+            p.join(timeout=2.0)
+            if p.is_alive(): p.terminate()
+        self.processos = []
+        self.anel = None
+        self.shm.close(); self.shm.unlink(); self.shm = None
+
+class LoopControleMultiprocesso(controle.LoopControle):
+    """Mesmo papel do LoopControle, mas a decisão já vem pronta do processo de visão."""
+    def _loop(self):
+        lut_enviada = None
+        while self._rodando:
+            calib, lut = self.obter_calibracao()
+            if lut is not lut_enviada: self.fonte.atualizar_calibracao(calib, lut); lut_enviada = lut
+
+            registro = self.fonte.esperar_decisao(controle.TIMEOUT_SEM_FRAME)
+            if self.latencia: self._fechar_latencia()
+            if registro is None:
+                self.motor.stop_all_motors()
+                self._publicar(acao="Aguardando Câmera" if self.fonte.isOpened() else "Câmera Desconectada")
+                continue
+            seq, slot, timestamp, acao, erro, zone_states, t_percepcao, t_decisao, geometria = registro
+
+            perfil.tick_cprofile()
+            self._aplicar(seq, timestamp, t_percepcao, t_decisao, acao, erro, geometria)
+
+            self.ciclos += 1
+            frame = self.fonte.copiar_frame(slot, seq) if self.com_frame else None
+            if frame is None: self._publicar(seq=seq, timestamp=timestamp, acao=acao, erro=erro, zone_states=zone_states) # Mantém a prévia anterior
+            else: self._publicar(seq=seq, frame=frame, timestamp=timestamp, acao=acao, erro=erro, zone_states=zone_states)
@@ -0,0 +1,7 @@
+# O código fica em comum/padroes.py (o mesmo da phoenix); este arquivo só mantém `import padroes` nesta pasta
+import os
+import sys
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path: sys.path.append(RAIZ)
+from comum import padroes
+sys.modules[__name__] = padroes
@@ -0,0 +1,137 @@
+import cv2
+import numpy as np
+import time
+import visao
+import padroes
+import perfil
+
+# ===================================================================
+# --- PERCEPÇÃO E DECISÃO DA RODADA (SEM PYGAME) ---
+# ===================================================================
+
+# Resolução em que as ROIs foram medidas; outras resoluções são escaladas
+# pela proporção (mesma ideia da phoenix)
+BASE_LARGURA, BASE_ALTURA = 640, 360
+ROIS_BASE = {'CM': (262, 8, 116, 85), 'CE': (64, 131, 186, 85), 'CD': (390, 131, 186, 85),
+             'BE': (64, 275, 186, 85), 'BD': (390, 275, 186, 85)}
+ROI_LINE_Y_BASE, ROI_LINE_HEIGHT_BASE = 240, 40
+ROI_AHEAD_Y_BASE, ROI_AHEAD_HEIGHT_BASE = 100, 30 # Faixa de antecipação, perto do topo: vê a curva antes de chegar nela
+LARGURA_LINHA_MAX = 0.3 # Fração da largura: mais preto que isso na faixa da linha não é só a linha (cruzamento, sombra)
+
+LIMITE_ERRO_ZONAS = 50 # Só olha as zonas com o robô centralizado (em pixels da base)
+
+def escalar_roi(roi, largura, altura):
+    x, y, w, h = roi
+    return (int(x / BASE_LARGURA * largura), int(y / BASE_ALTURA * altura),
+            int(w / BASE_LARGURA * largura), int(h / BASE_ALTURA * altura))
+
+class PercepcaoRodada:
+    """
+    Toda a lógica de visão e decisão que antes ficava em TelaRodada.update:
+    recebe um frame BGR e devolve (acao, erro, zone_states). Não desenha nada
+    e não mexe nos motores, então roda igual na interface, sem tela ou num replay.
+
+    Depois de cada processar(), t_percepcao e t_decisao guardam os instantes
+    (time.monotonic) em que a visão e a decisão ficaram prontas, para medir latência.
+
+    geometria = (confiança 0..1, erro da linha na faixa de antecipação ou None)
+    alimenta o planejador de velocidade do motor_control. Confiança 0 só quando
+    a faixa da linha não tem linha (o motor_control usa isso como "linha à vista").
+
+    Também aceita captura.QuadroYUV: o cinza vem direto do plano Y e a cor só
+    é convertida nas linhas que as zonas cobrem, e só quando elas são olhadas.
+    """
+    MAX_GAP_FRAMES = 15
+
+    def __init__(self, largura=BASE_LARGURA, altura=BASE_ALTURA, modo_grade=False, grade=(6, 8), altura_linha=ROI_LINE_HEIGHT_BASE):
+        self.largura, self.altura = largura, altura
+        self.modo_grade = modo_grade
+        self.grade_linhas, self.grade_colunas = grade
+
+        self.ZONAS = {name: escalar_roi(roi, largura, altura) for name, roi in ROIS_BASE.items()}
+        # altura_linha (pixels da base) muda a espessura da faixa da linha, mantendo o centro dela
+        self.ROI_LINE_Y = int((ROI_LINE_Y_BASE + (ROI_LINE_HEIGHT_BASE - altura_linha) / 2) / BASE_ALTURA * altura)
+        self.ROI_LINE_HEIGHT = max(1, int(altura_linha / BASE_ALTURA * altura))
+        self.ROI_AHEAD_Y = int(ROI_AHEAD_Y_BASE / BASE_ALTURA * altura)
+        self.ROI_AHEAD_HEIGHT = max(1, int(ROI_AHEAD_HEIGHT_BASE / BASE_ALTURA * altura))
+        self.limite_erro_zonas = LIMITE_ERRO_ZONAS * largura / BASE_LARGURA
+        self.ZONAS_GRADE = {name: visao.celulas_da_zona(roi, (altura, largura), self.grade_linhas, self.grade_colunas) for name, roi in self.ZONAS.items()}
+        self.grade = None
+        # Faixa de linhas que precisa de cor (a grade cobre o frame todo)
+        if modo_grade: self.linhas_cor = (0, altura)
+        else: self.linhas_cor = (min(y for _, y, _, _ in self.ZONAS.values()), max(y + h for _, y, _, h in self.ZONAS.values()))
+        self._bgr = None # Buffer reaproveitado para a cor dos frames YUV
+        self.t_percepcao = self.t_decisao = 0.0
+        self.reset()
+
+    def reset(self):
+        self.erro, self.last_erro, self.gap_counter = 0, 0, 0
+        self.acao = "Iniciando..."
+        self.geometria = (0.0, None)
+
+    def _frame_bgr(self, frame):
+        if isinstance(frame, np.ndarray): return frame
+        if self._bgr is None or self._bgr.shape != frame.shape: self._bgr = np.zeros(frame.shape, dtype=np.uint8)
+        return frame.bgr_linhas(*self.linhas_cor, destino=self._bgr)
+
+    def _geometria(self, gray_frame, limiar, massa_linha):
+        roi_ahead = gray_frame[self.ROI_AHEAD_Y : self.ROI_AHEAD_Y + self.ROI_AHEAD_HEIGHT, :]
+        _, mask = cv2.threshold(roi_ahead, limiar, 255, cv2.THRESH_BINARY_INV)
+        M = cv2.moments(mask)
+        erro_frente = int(M["m10"] / M["m00"]) - self.largura // 2 if M["m00"] > 0 else None
+        confianca = 1.0 if massa_linha / 255 / (self.ROI_LINE_HEIGHT * self.largura) <= LARGURA_LINHA_MAX else 0.5
+        if erro_frente is None: confianca *= 0.5 # Sem linha lá em cima: curva fechada, gap ou fim chegando
+        return confianca, erro_frente
+
+    def estados_das_zonas(self, frame, calib, lut):
+        with perfil.escopo('cor_yuv'): frame = self._frame_bgr(frame)
+        if self.modo_grade:
+            with perfil.escopo('classificar'): rotulos = visao.classificar_frame(frame, lut)
+            with perfil.escopo('grade'): self.grade = visao.grade_ocupacao(rotulos, self.grade_linhas, self.grade_colunas)
+            with perfil.escopo('estado_zonas'): return {name: visao.estado_da_zona_grade(self.grade, cel, calib) for name, cel in self.ZONAS_GRADE.items()}
+        # Só os pixels das zonas passam pela LUT
+        with perfil.escopo('classificar'): return {name: visao.estado_do_recorte(frame, roi, lut, calib) for name, roi in self.ZONAS.items()}
+
+    def processar(self, frame, calib, lut):
+        zone_states = None
+        with perfil.escopo('cvtColor'):
+            if isinstance(frame, np.ndarray): gray_frame, limiar = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), calib['THRESHOLD_VALUE']
+            else: gray_frame, limiar = frame.gray, frame.limiar_cinza(calib['THRESHOLD_VALUE']) # Plano Y: cinza sem conversão, limiar na escala do Y
+
+        # 1. Tente seguir a linha primeiro (operação mais barata)
+        with perfil.escopo('moments'):
+            roi_line = gray_frame[self.ROI_LINE_Y : self.ROI_LINE_Y + self.ROI_LINE_HEIGHT, :]
+            _, mask = cv2.threshold(roi_line, limiar, 255, cv2.THRESH_BINARY_INV)
+            M = cv2.moments(mask)
+        self.t_percepcao = time.monotonic()
+
+        if M["m00"] > 0:
+            self.gap_counter = 0
+            cx = int(M["m10"] / M["m00"])
+            self.erro = cx - self.largura // 2
+            self.last_erro = self.erro
+            with perfil.escopo('antecipacao'): self.geometria = self._geometria(gray_frame, limiar, M["m00"])
+
+            # 2. APENAS SE a linha for detectada e reta (erro baixo), cheque as zonas
+            if abs(self.erro) < self.limite_erro_zonas:
+                zone_states = self.estados_das_zonas(frame, calib, lut)
+                self.t_percepcao = time.monotonic()
+                # Estados das zonas -> bitmask -> padrão OBR (uma consulta)
+                with perfil.escopo('decidir'): self.acao = padroes.decidir(zone_states)
+            else:
+                self.acao = "Seguindo Linha" # Em curva, apenas siga a linha
+
+        # 3. Se a linha não for detectada (GAP ou fim de linha)
+        else:
+            self.geometria = (0.0, None)
+            self.gap_counter += 1
+            if self.gap_counter < self.MAX_GAP_FRAMES:
+                self.acao = "Atravessando Gap"
+                self.erro = self.last_erro # Mantenha o último erro conhecido
+            else:
+                self.acao = "Procurando Linha"
+                self.erro = 0 # O erro é 0, mas a ação fará ele girar para procurar
+
+        self.t_decisao = time.monotonic()
+        if zone_states is None: zone_states = {name: "N/A" for name in self.ZONAS}
+        return self.acao, self.erro, zone_states
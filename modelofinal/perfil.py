@@ -0,0 +1,127 @@
+import atexit
+import cProfile
+import io
+import pstats
+import threading
+import time
+
+# ===================================================================
+# --- PERFIL POR ETAPA (ESCOPOS NOMEADOS + HISTOGRAMAS FIXOS) ---
+# ===================================================================
+#
+# Uso:   with perfil.escopo('linha'): ...
+# Desligado (padrão), escopo() devolve sempre o mesmo objeto vazio: custa
+# uma chamada de função e nada mais. Ligado (ativar()), cada escopo mede com
+# perf_counter_ns e soma num histograma de tamanho fixo (baldes em potências
+# de 2 de ns), sem alocar nada por medição.
+
+N_BALDES = 40 # Balde k guarda durações em [2^(k-1), 2^k) ns; 2^39 ns ~ 9 min
+
+ATIVO = False
+_etapas = {}   # nome -> _Etapa
+_escopos = {}  # nome -> _Escopo reaproveitado
+_lock = threading.Lock()
+
+class _Etapa:
+    __slots__ = ('nome', 'baldes', 'n', 'soma_ns', 'max_ns')
+    def __init__(self, nome):
+        self.nome = nome
+        self.baldes = [0] * N_BALDES
+        self.n, self.soma_ns, self.max_ns = 0, 0, 0
+
+    def somar(self, dt):
+        self.baldes[min(dt.bit_length(), N_BALDES - 1)] += 1
+        self.n += 1
+        self.soma_ns += dt
+        if dt > self.max_ns: self.max_ns = dt
+
+    def percentil_ms(self, p):
+        """Limite superior do balde onde cai o percentil p (precisão de 2x, suficiente para achar o gargalo)."""
+        alvo, acumulado = p / 100 * self.n, 0
+        for k, c in enumerate(self.baldes):
+            acumulado += c
+            if acumulado >= alvo and c: return min(2 ** k, self.max_ns) / 1e6
+        return self.max_ns / 1e6
+
+class _Escopo:
+    __slots__ = ('etapa', 't0')
+    def __init__(self, etapa): self.etapa, self.t0 = etapa, 0
+    def __enter__(self): self.t0 = time.perf_counter_ns(); return self
+    def __exit__(self, *exc): self.etapa.somar(time.perf_counter_ns() - self.t0)
+
+class _EscopoNulo:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): pass
+
+_NULO = _EscopoNulo()
+
+def escopo(nome):
+    """Context manager que mede a etapa `nome`. Cada nome deve ser usado por uma thread só."""
+    if not ATIVO: return _NULO
+    e = _escopos.get(nome)
+    if e is None:
+        with _lock:
+            etapa = _etapas.setdefault(nome, _Etapa(nome))
+            e = _escopos[nome] = _Escopo(etapa)
+    return e
+
+def ativar(despejar_ao_sair=True):
+    global ATIVO
+    ATIVO = True
+    if despejar_ao_sair: atexit.register(despejar)
+
+def zerar():
+    with _lock:
+        for etapa in _etapas.values(): etapa.__init__(etapa.nome)
+
+def relatorio():
+    """Tabela por etapa: chamadas, média, p50/p95/p99 (pelo histograma) e máximo, em ms."""
+    with _lock: etapas = sorted(_etapas.values(), key=lambda e: -e.soma_ns)
+    linhas = [f"{'etapa':<16}{'n':>8}{'média':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'máx':>9}  (ms)"]
+    for e in etapas:
+        if not e.n: continue
+        linhas.append(f"{e.nome:<16}{e.n:>8}{e.soma_ns / e.n / 1e6:>9.3f}{e.percentil_ms(50):>9.3f}"
+                      f"{e.percentil_ms(95):>9.3f}{e.percentil_ms(99):>9.3f}{e.max_ns / 1e6:>9.3f}")
+    return "\n".join(linhas)
+
+def medias_ms():
+    """{etapa: média em ms}, para quem quer mostrar os números na tela."""
+    with _lock: return {e.nome: e.soma_ns / e.n / 1e6 for e in _etapas.values() if e.n}
+
+def despejar():
+    if _etapas: print("--- perfil por etapa ---\n" + relatorio(), flush=True)
+
+# ===================================================================
+# --- CAPTURA cProfile DE N SEGUNDOS DO LOOP ---
+# ===================================================================
+#
+# O cProfile só enxerga a thread em que foi ligado, então o pedido é feito
+# de qualquer lugar (tecla, sinal) e quem liga/desliga é o próprio loop de
+# controle, chamando tick_cprofile() a cada ciclo.
+
+_pedido_cprofile = None # (segundos, arquivo)
+_cprofile = None        # (Profile, instante de fim, arquivo)
+
+def pedir_cprofile(segundos=5.0, arquivo='perfil.prof'):
+    global _pedido_cprofile
+    _pedido_cprofile = (segundos, arquivo)
+    print(f"cProfile: capturando {segundos:.0f} s do loop de controle...", flush=True)
+
+def tick_cprofile():
+    global _pedido_cprofile, _cprofile
+    if _cprofile is None:
+        if _pedido_cprofile is None: return
+        segundos, arquivo = _pedido_cprofile
+        _pedido_cprofile = None
+        perfilador = cProfile.Profile()
+        _cprofile = (perfilador, time.monotonic() + segundos, arquivo)
+        perfilador.enable()
+    elif time.monotonic() >= _cprofile[1]:
+        perfilador, _, arquivo = _cprofile
+        perfilador.disable()
+        _cprofile = None
+        perfilador.dump_stats(arquivo)
+        saida = io.StringIO()
+        pstats.Stats(perfilador, stream=saida).sort_stats('cumulative').print_stats(20)
+        print(f"cProfile salvo em '{arquivo}' (snakeviz / python -m pstats):\n{saida.getvalue()}", flush=True)
@@ -0,0 +1,30 @@
+import cv2
+import numpy as np
+import pygame
+
+# ===================================================================
+# --- PRÉVIA DA CÂMERA SEM CÓPIAS EXTRAS ---
+# ===================================================================
+
+class PreviaCamera:
+    """
+    Redimensiona o frame BGR uma única vez, direto para o tamanho da tela,
+    num buffer persistente, e embrulha esse buffer numa Surface do pygame
+    sem copiar (pygame.image.frombuffer). Antes eram três alocações de frame
+    inteiro por desenho: cvtColor, make_surface e transform.scale.
+    """
+    def __init__(self, tamanho):
+        self.tamanho = tamanho
+        self._buffer = np.empty((tamanho[1], tamanho[0], 3), dtype=np.uint8)
+        try:
+            self._surface = pygame.image.frombuffer(self._buffer, tamanho, 'BGR')
+            self._formato_bgr = True
+        except ValueError: # pygame antigo sem 'BGR': converte no próprio buffer
+            self._surface = pygame.image.frombuffer(self._buffer, tamanho, 'RGB')
+            self._formato_bgr = False
+
+    def surface(self, frame_bgr):
+        """Surface pronta para blit. Só vale até a próxima chamada (o buffer é reaproveitado)."""
+        cv2.resize(frame_bgr, self.tamanho, dst=self._buffer, interpolation=cv2.INTER_NEAREST)
+        if not self._formato_bgr: cv2.cvtColor(self._buffer, cv2.COLOR_BGR2RGB, dst=self._buffer)
+        return self._surface
@@ -0,0 +1,121 @@
+# ===================================================================
+# --- REPLAY OFFLINE DA PERCEPÇÃO + DECISÃO (BANCADA, SEM ROBÔ) ---
+# ===================================================================
+#
+# Passa uma corrida gravada (vídeo ou diretório de frames) pela mesma
+# percepção e decisão da TelaRodada (percepcao.PercepcaoRodada +
+# controle.aplicar_decisao), sem pygame e com o motor_control trocado por um
+# registrador. Cada frame é processado (nenhum é descartado), o mais rápido
+# possível.
+#
+# Uso:  python3 replay.py corrida.mp4 [--calibracao calibracao.json] [--grade]
+#                                     [--gravar-golden corrida.golden.csv]
+#                                     [--golden corrida.golden.csv] [--tolerancia-erro 0]
+#
+# Sai com código 1 se as decisões diferirem do golden.
+
+import argparse
+import csv
+import sys
+import time
+import calibracao
+import captura
+import controle
+import percepcao
+import perfil
+import visao
+
+MAX_DIFERENCAS_MOSTRADAS = 20
+
+class MotorFalso:
+    """Mesmo jeito do módulo motor_control, mas só conta as chamadas."""
+    def __init__(self):
+        self.chamadas = {'gerenciar_movimento': 0, 'stop_all_motors': 0}
+
+    def gerenciar_movimento(self, acao, erro, geometria=None): self.chamadas['gerenciar_movimento'] += 1
+    def stop_all_motors(self): self.chamadas['stop_all_motors'] += 1
+
+def rodar(caminho, calib, largura, altura, modo_grade=False, limite=None):
+    """Processa a gravação inteira; devolve ([(frame, acao, erro), ...], segundos, motor)."""
+    lut = visao.construir_lut(calib)
+    fonte = captura.FonteArquivo(caminho, largura, altura, tempo_real=False)
+    if not fonte.start(): raise SystemExit(f"Erro: não foi possível abrir '{caminho}'.")
+    perc = percepcao.PercepcaoRodada(largura, altura, modo_grade)
+    motor = MotorFalso()
+    decisoes, seq = [], 0
+    inicio = time.perf_counter()
+    try:
+        while limite is None or len(decisoes) < limite:
+            frame, _, seq_novo = fonte.esperar_novo(seq, 1.0)
+            if seq_novo == seq:
+                if not fonte.isOpened(): break # Fim da gravação
+                continue
+            seq = seq_novo
+            with perfil.escopo('percepcao'): acao, erro, _ = perc.processar(frame, calib, lut)
+            with perfil.escopo('motor'): controle.aplicar_decisao(motor, acao, erro, perc.geometria)
+            decisoes.append((len(decisoes), acao, erro))
+    finally:
+        fonte.release()
+    return decisoes, time.perf_counter() - inicio, motor
+
+def gravar_golden(caminho, decisoes):
+    with open(caminho, 'w', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(('frame', 'acao', 'erro'))
+        escritor.writerows(decisoes)
+    print(f"Golden gravado em '{caminho}' ({len(decisoes)} frames).")
+
+def ler_golden(caminho):
+    with open(caminho, newline='') as f:
+        return [(int(l['frame']), l['acao'], int(l['erro'])) for l in csv.DictReader(f)]
+
+def comparar(decisoes, golden, tolerancia_erro=0):
+    """Lista de (frame, esperado, obtido) que diferem na ação ou no erro além da tolerância."""
+    diferencas = []
+    for i in range(max(len(decisoes), len(golden))):
+        esperado = golden[i][1:] if i < len(golden) else None
+        obtido = decisoes[i][1:] if i < len(decisoes) else None
+        if esperado is None or obtido is None or esperado[0] != obtido[0] or abs(esperado[1] - obtido[1]) > tolerancia_erro:
+            diferencas.append((i, esperado, obtido))
+    return diferencas
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay offline da percepção e decisão da rodada.")
+    parser.add_argument('gravacao', help="vídeo ou diretório de frames")
+    parser.add_argument('--calibracao', default=calibracao.ARQUIVO_CALIBRACAO)
+    parser.add_argument('--largura', type=int, default=percepcao.BASE_LARGURA)
+    parser.add_argument('--altura', type=int, default=percepcao.BASE_ALTURA)
+    parser.add_argument('--grade', action='store_true', help="zonas derivadas da grade de ocupação")
+    parser.add_argument('--limite', type=int, default=None, help="processa só os N primeiros frames")
+    parser.add_argument('--gravar-golden', metavar='CSV', help="salva a sequência de decisões como referência")
+    parser.add_argument('--golden', metavar='CSV', help="compara com uma referência salva")
+    parser.add_argument('--tolerancia-erro', type=int, default=0, help="diferença de erro (px) aceita no golden")
+    parser.add_argument('--sequencia', action='store_true', help="imprime acao/erro de cada frame")
+    args = parser.parse_args()
+
+    calib = calibracao.carregar(args.calibracao)
+    perfil.ativar(despejar_ao_sair=False)
+    decisoes, segundos, motor = rodar(args.gravacao, calib, args.largura, args.altura, args.grade, args.limite)
+
+    if args.sequencia:
+        for frame, acao, erro in decisoes: print(f"{frame:6d}  {acao:<22} {erro:+5d}")
+    print(f"{len(decisoes)} frames em {segundos:.2f} s = {len(decisoes) / max(segundos, 1e-9):.1f} FPS "
+          f"(motor: {motor.chamadas['gerenciar_movimento']} movimentos, {motor.chamadas['stop_all_motors']} paradas)")
+    perfil.despejar()
+
+    if args.gravar_golden: gravar_golden(args.gravar_golden, decisoes)
+    if args.golden:
+        golden = ler_golden(args.golden)
+        if args.limite: golden = golden[:args.limite]
+        diferencas = comparar(decisoes, golden, args.tolerancia_erro)
+        if not diferencas:
+            print(f"Golden OK: {len(decisoes)} decisões iguais.")
+            return 0
+        print(f"Golden DIFERENTE em {len(diferencas)} frames:")
+        for frame, esperado, obtido in diferencas[:MAX_DIFERENCAS_MOSTRADAS]:
+            print(f"  frame {frame}: esperado {esperado}, obtido {obtido}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
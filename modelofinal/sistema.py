@@ -0,0 +1,40 @@
+# ===================================================================
+# --- SAÚDE DO RASPBERRY PI (TEMPERATURA, FREQUÊNCIA, THROTTLING) ---
+# ===================================================================
+#
+# Só leituras de arquivos do /sys (baratas, sem subprocess/vcgencmd).
+# Fora do Pi os arquivos não existem e as funções devolvem None.
+
+ARQUIVO_TEMPERATURA = '/sys/class/thermal/thermal_zone0/temp'
+ARQUIVO_FREQUENCIA = '/sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq'
+ARQUIVO_THROTTLED = '/sys/devices/platform/soc/soc:firmware/get_throttled'
+
+# Bits do get_throttled que valem agora (os de cima, 16+, são "já aconteceu desde o boot")
+SUBTENSAO, FREQ_LIMITADA, THROTTLING, LIMITE_TEMPERATURA = 0x1, 0x2, 0x4, 0x8
+
+def _ler_inteiro(caminho, base=10):
+    try:
+        with open(caminho) as f: return int(f.read().strip(), base)
+    except (OSError, ValueError):
+        return None
+
+def temperatura_cpu():
+    """Temperatura da CPU em °C, ou None."""
+    mili = _ler_inteiro(ARQUIVO_TEMPERATURA)
+    return mili / 1000 if mili is not None else None
+
+def frequencia_cpu_mhz():
+    """Frequência atual do núcleo 0 em MHz, ou None."""
+    khz = _ler_inteiro(ARQUIVO_FREQUENCIA)
+    return khz / 1000 if khz is not None else None
+
+def estado_throttling():
+    """Máscara do firmware (get_throttled), ou None se o kernel não expõe."""
+    return _ler_inteiro(ARQUIVO_THROTTLED, 16)
+
+def descrever_throttling(mascara):
+    if mascara is None: return "?"
+    agora = [nome for bit, nome in ((SUBTENSAO, "SUBTENSÃO"), (FREQ_LIMITADA, "FREQ LIMITADA"),
+                                    (THROTTLING, "THROTTLING"), (LIMITE_TEMPERATURA, "TEMP")) if mascara & bit]
+    if agora: return " ".join(agora)
+    return "já ocorreu" if mascara >> 16 else "ok"
@@ -0,0 +1,221 @@
+import cv2
+import numpy as np
+import padroes
+import percepcao
+import visao
+
+# ===================================================================
+# --- VARIANTES DE CLASSIFICADOR (PARA COMPARAR ACURÁCIA x VELOCIDADE) ---
+# ===================================================================
+#
+# Cada variante reproduz a visão + decisão de um dos programas do repositório,
+# sem câmera, pygame ou motores. Todas têm a mesma cara:
+#
+#   v = Variante(calib)            # prepara tabelas, ROIs...
+#   v.RESOLUCAO                    # (largura, altura) em que o programa roda
+#   acao, erro = v.processar(frame)  # frame BGR já na RESOLUCAO
+#
+# As que escalam as ROIs pela proporção (Interface1*, Phoenix*) também aceitam
+# Variante(calib, resolucao=(l, a), altura_linha=h), com h em pixels da base
+# 640x360, para a varredura de resolução (varredura.py).
+#
+# acao usa o vocabulário do modelofinal (padroes.py / percepcao.py) e erro
+# vem na convenção do modelofinal (cx - centro, positivo = linha à direita)
+# em pixels da base 640 de largura, ou None se a variante não mede erro.
+# O estado de gap é zerado a cada frame: um frame sem linha vale "Atravessando Gap".
+
+ACOES = ("Seguindo Linha", "Seguir em Frente", "Meia Volta", "Curva de 90 Esquerda", "Curva de 90 Direita",
+         "Fim de Pista", "Atravessando Gap")
+
+def _erro_base(cx, largura):
+    return int(round((cx - largura // 2) * percepcao.BASE_LARGURA / largura))
+
+def _centro_linha(gray, y, h, limiar):
+    _, mask = cv2.threshold(gray[y:y + h, :], limiar, 255, cv2.THRESH_BINARY_INV)
+    M = cv2.moments(mask)
+    return int(M["m10"] / M["m00"]) if M["m00"] > 0 else None
+
+def _estado_zona_hsv(frame, roi, calib):
+    """get_zone_state original das interfaces: cvtColor (HSV e cinza) e inRange no recorte da zona."""
+    x, y, w, h = roi
+    total = w * h
+    if total == 0: return "Branco"
+    roi_bgr = frame[y:y + h, x:x + w]
+    roi_hsv = cv2.cvtColor(roi_bgr, cv2.COLOR_BGR2HSV)
+    roi_gray = cv2.cvtColor(roi_bgr, cv2.COLOR_BGR2GRAY)
+    mask_red = cv2.inRange(roi_hsv, calib['LOWER_RED1'], calib['UPPER_RED1']) + cv2.inRange(roi_hsv, calib['LOWER_RED2'], calib['UPPER_RED2'])
+    if cv2.countNonZero(mask_red) * 100 / total > calib['RED_PERCENT_THRESH']: return "Vermelho"
+    if cv2.countNonZero(cv2.inRange(roi_hsv, calib['LOWER_GREEN'], calib['UPPER_GREEN'])) * 100 / total > calib['GREEN_PERCENT_THRESH']: return "Verde"
+    _, mask_black = cv2.threshold(roi_gray, calib['THRESHOLD_VALUE'], 255, cv2.THRESH_BINARY_INV)
+    if cv2.countNonZero(mask_black) * 100 / total > calib['BLACK_PERCENT_THRESH']: return "Preto"
+    return "Branco"
+
+class _PercepcaoHSV(percepcao.PercepcaoRodada):
+    """PercepcaoRodada com as zonas pelo classificador original (inRange por zona) no lugar da LUT."""
+    def estados_das_zonas(self, frame, calib, lut):
+        return {name: _estado_zona_hsv(frame, roi, calib) for name, roi in self.ZONAS.items()}
+
+class Interface1:
+    """modelofinal/interface1.py: linha primeiro, zonas (LUT nos recortes) só com o robô centralizado."""
+    RESOLUCAO = (640, 360)
+    MODO_GRADE = False
+    PERCEPCAO = percepcao.PercepcaoRodada
+
+    def __init__(self, calib, resolucao=None, altura_linha=percepcao.ROI_LINE_HEIGHT_BASE):
+        self.calib, self.lut = calib, visao.construir_lut(calib)
+        if resolucao: self.RESOLUCAO = tuple(resolucao)
+        self.percepcao = self.PERCEPCAO(*self.RESOLUCAO, modo_grade=self.MODO_GRADE, altura_linha=altura_linha)
+
+    def processar(self, frame):
+        self.percepcao.reset()
+        acao, erro, _ = self.percepcao.processar(frame, self.calib, self.lut)
+        return acao, (_erro_base(erro + self.RESOLUCAO[0] // 2, self.RESOLUCAO[0]) if acao != "Atravessando Gap" else None)
+
+class Interface1Grade(Interface1):
+    """modelofinal/interface1.py com MODO_GRADE: zonas derivadas da grade de ocupação."""
+    MODO_GRADE = True
+
+class Interface1HSV(Interface1):
+    """
+    modelofinal/interface1.py antes da LUT: o mesmo fluxo, com as zonas por
+    cvtColor + inRange. É a referência das outras interface1*.
+    """
+    PERCEPCAO = _PercepcaoHSV
+
+class Phoenix:
+    """
+    phoenix/interface1.py: ROIs proporcionais, zonas sempre (LUT nos recortes),
+    decisão por padrão e, se for "Seguindo Linha", o centro da faixa da linha.
+    """
+    RESOLUCAO = (320, 180)
+    # Em frações de 640x360, como na phoenix
+    ROIS_PROPORCAO = {'CM': (247, 8, 145, 106), 'CE': (41, 120, 232, 106), 'CD': (367, 120, 232, 106),
+                      'BE': (41, 264, 232, 106), 'BD': (367, 264, 232, 106)}
+    LINHA_Y, LINHA_ALTURA = 230, 60
+
+    def __init__(self, calib, resolucao=None, altura_linha=LINHA_ALTURA):
+        self.calib, self.lut = calib, visao.construir_lut(calib)
+        if resolucao: self.RESOLUCAO = tuple(resolucao)
+        largura, altura = self.RESOLUCAO
+        self.ZONAS = {nome: percepcao.escalar_roi(roi, largura, altura) for nome, roi in self.ROIS_PROPORCAO.items()}
+        self.linha_y = int((self.LINHA_Y + (self.LINHA_ALTURA - altura_linha) / 2) / 360 * altura)
+        self.linha_h = max(1, int(altura_linha / 360 * altura))
+
+    def estados(self, frame):
+        return {nome: visao.estado_do_recorte(frame, roi, self.lut, self.calib) for nome, roi in self.ZONAS.items()}
+
+    def processar(self, frame):
+        acao = padroes.decidir(self.estados(frame))
+        if acao != "Seguindo Linha": return acao, None
+        cx = _centro_linha(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), self.linha_y, self.linha_h, self.calib['THRESHOLD_VALUE'])
+        # A phoenix usa erro = centro - cx; aqui volta para a convenção do modelofinal
+        return ("Seguindo Linha", _erro_base(cx, self.RESOLUCAO[0])) if cx is not None else ("Atravessando Gap", None)
+
+class PhoenixHSV(Phoenix):
+    """
+    phoenix original: get_zone_state com cvtColor (HSV e cinza) e inRange
+    por zona. Mais lenta, mas é a referência de cor exata das outras.
+    """
+    def estados(self, frame):
+        return {nome: _estado_zona_hsv(frame, roi, self.calib) for nome, roi in self.ZONAS.items()}
+
+class Otimizada(Phoenix):
+    """modelofinal/interface-otimizada.py: 320x240 com as ROIs fixas dela."""
+    RESOLUCAO = (320, 240)
+
+    def __init__(self, calib):
+        self.calib, self.lut = calib, visao.construir_lut(calib)
+        self.ZONAS = {'CM': (131, 4, 58, 42), 'CE': (32, 65, 93, 42), 'CD': (195, 65, 93, 42),
+                      'BE': (32, 137, 93, 42), 'BD': (195, 137, 93, 42)}
+        self.linha_y, self.linha_h = 120, 20
+
+class Main2Contornos:
+    """
+    modelofinal/main2.py: HSV numa faixa, erode/dilate e contornos. Os
+    comandos dele são traduzidos para o vocabulário do modelofinal.
+    """
+    RESOLUCAO = (640, 480)
+    TRADUCAO = {"parar": "Fim de Pista", "seguir em frente": "Seguir em Frente", "girar 180": "Meia Volta",
+                "Curva verde à direita": "Curva de 90 Direita", "Curva verde à esquerda": "Curva de 90 Esquerda",
+                "Seguir em frente": "Seguindo Linha", "Curva à esquerda": "Seguindo Linha",
+                "Curva à direita": "Seguindo Linha", "Linha não detectada!": "Atravessando Gap"}
+
+    def __init__(self, calib):
+        self.kernel = np.ones((3, 3), np.uint8)
+
+    def _mascara(self, hsv, faixas):
+        mascara = None
+        for baixo, alto in faixas:
+            m = cv2.inRange(hsv, np.array(baixo), np.array(alto))
+            mascara = m if mascara is None else cv2.bitwise_or(mascara, m)
+        mascara = cv2.erode(mascara, self.kernel, iterations=5)
+        mascara = cv2.dilate(mascara, self.kernel, iterations=9)
+        contornos, _ = cv2.findContours(mascara, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        return contornos
+
+    def processar(self, frame):
+        width = frame.shape[1]
+        hsv = cv2.cvtColor(frame[380:440, 0:width], cv2.COLOR_BGR2HSV)
+        contours_blk = self._mascara(hsv, [([0, 0, 0], [179, 50, 50])])
+        contours_grn = self._mascara(hsv, [([40, 50, 50], [80, 255, 255])])
+        contours_red = self._mascara(hsv, [([0, 100, 100], [10, 255, 255]), ([160, 100, 100], [180, 255, 255])])
+        centerx_blk = None
+        if contours_blk:
+            x, _, w, _ = cv2.boundingRect(max(contours_blk, key=cv2.contourArea))
+            centerx_blk = x + w // 2
+        erro = _erro_base(centerx_blk, width) if centerx_blk is not None else None
+
+        if contours_red and cv2.contourArea(max(contours_red, key=cv2.contourArea)) > 500: direction = "parar"
+        elif len(contours_blk) > 1 and all(cv2.contourArea(c) > 200 for c in contours_blk): direction = "seguir em frente"
+        elif len(contours_grn) > 1 and all(cv2.contourArea(c) > 500 for c in contours_grn): direction = "girar 180"
+        elif contours_grn and cv2.contourArea(max(contours_grn, key=cv2.contourArea)) > 500:
+            x_grn, y_grn, w_grn, _ = cv2.boundingRect(max(contours_grn, key=cv2.contourArea))
+            centerx_grn = x_grn + w_grn // 2
+            if contours_blk:
+                _, y_blk, _, _ = cv2.boundingRect(max(contours_blk, key=cv2.contourArea))
+                if y_grn > y_blk: direction = "seguir em frente"
+                else: direction = "Curva verde à direita" if centerx_grn > centerx_blk else "Curva verde à esquerda"
+            elif centerx_grn < width // 3: direction = "Curva verde à esquerda"
+            elif centerx_grn > 2 * width // 3: direction = "Curva verde à direita"
+            else: direction = "Seguir em frente"
+        elif centerx_blk is not None:
+            if centerx_blk < width // 3: direction = "Curva à esquerda"
+            elif centerx_blk > 2 * width // 3: direction = "Curva à direita"
+            else: direction = "Seguir em frente"
+        else: direction = "Linha não detectada!"
+        acao = self.TRADUCAO[direction]
+        return acao, (erro if acao == "Seguindo Linha" else None)
+
+class Keras:
+    """
+    seg-linha-basico/testando.py: CNN 28x28 RGB. Precisa do TensorFlow e do
+    modelo salvo (caminho em MODELO, ou --modelo-keras no corpus.py).
+    """
+    RESOLUCAO = (28, 28)
+    MODELO = None
+    CLASSES = ["forward", "left", "right", "nothing", "forward-black", "verde", "vermelho", "prateado", "interseção-t"]
+    # "verde" não diz o lado e "prateado" (resgate) não existe no modelofinal: contam como erro
+    TRADUCAO = {"forward": "Seguindo Linha", "left": "Seguindo Linha", "right": "Seguindo Linha",
+                "nothing": "Atravessando Gap", "forward-black": "Seguir em Frente", "verde": "Verde",
+                "vermelho": "Fim de Pista", "prateado": "Área de Resgate", "interseção-t": "Seguindo Linha"}
+
+    def __init__(self, calib):
+        if not self.MODELO: raise ImportError("caminho do modelo Keras não informado")
+        from tensorflow.keras.models import load_model # Dependência opcional
+        self.modelo = load_model(self.MODELO)
+
+    def processar(self, frame):
+        img = frame.astype("float32").reshape(1, 28, 28, 3) / 255.0
+        predicao = self.modelo(img, training=False) # Chamada direta: predict() tem custo fixo alto por frame
+        return self.TRADUCAO[self.CLASSES[int(np.argmax(predicao))]], None
+
+VARIANTES = {
+    'interface1': Interface1,
+    'interface1_grade': Interface1Grade,
+    'interface1_hsv': Interface1HSV,
+    'phoenix': Phoenix,
+    'phoenix_hsv': PhoenixHSV,
+    'otimizada': Otimizada,
+    'main2_contornos': Main2Contornos,
+    'keras': Keras,
+}
@@ -0,0 +1,152 @@
+# ===================================================================
+# --- VARREDURA DE RESOLUÇÃO x ALTURA DA FAIXA DA LINHA ---
+# ===================================================================
+#
+# Roda o corpus rotulado (corpus.py) em várias resoluções de captura e
+# alturas da faixa da linha, com as ROIs escaladas pela proporção (como na
+# phoenix), e mede acurácia da decisão x taxa do loop de visão. Mostra a
+# tabela, a fronteira de Pareto e a menor resolução que atinge a acurácia mínima.
+#
+# Uso:  python3 varredura.py corpus/ [--variante interface1]
+#                            [--resolucoes 640x360,480x270,320x180,256x144,160x90]
+#                            [--alturas-linha 20,40,60] [--acuracia-minima 0.95]
+#                            [--grafico pareto.png] [--csv varredura.csv]
+#
+# A taxa é só percepção + decisão (sem câmera e sem motores): o frame do
+# corpus é reduzido para a resolução antes de medir, como se a câmera já
+# entregasse nesse tamanho.
+
+import argparse
+import csv
+import os
+import sys
+import cv2
+import numpy as np
+import calibracao
+import corpus
+import variantes
+
+RESOLUCOES = "640x360,480x270,320x180,256x144,160x90"
+ALTURAS_LINHA = "20,40,60"
+VARIAVEIS = ('interface1', 'interface1_grade', 'interface1_hsv', 'phoenix', 'phoenix_hsv') # As que escalam as ROIs pela proporção
+
+# Gráfico
+TAMANHO_GRAFICO = (800, 500)
+MARGEM = 60
+COR_PONTO, COR_PARETO, COR_LIMIAR = (200, 120, 0), (0, 0, 220), (0, 160, 0)
+
+def ler_lista(texto, conversor):
+    return [conversor(item.strip()) for item in texto.split(',') if item.strip()]
+
+def ler_resolucao(texto):
+    largura, altura = texto.lower().split('x')
+    return int(largura), int(altura)
+
+def varrer(diretorio, nome, calib, resolucoes, alturas_linha, repeticoes, todos=False):
+    """[(resolucao, altura_linha, acurácia, Hz, ms médio, ms p95)] na ordem da varredura."""
+    rotulos = corpus.ler_rotulos(diretorio, not todos)
+    if not rotulos: raise SystemExit("Nenhum frame rotulado (revisado=1). Use --todos para avaliar os pré-rótulos.")
+    frames = [cv2.imread(os.path.join(diretorio, arquivo)) for arquivo, _, _ in rotulos]
+    print(f"{len(rotulos)} frames rotulados, variante '{nome}'.")
+    pontos = []
+    for resolucao in resolucoes:
+        for altura_linha in alturas_linha:
+            variante = variantes.VARIANTES[nome](calib, resolucao=resolucao, altura_linha=altura_linha)
+            por_frame = [(a, acao, erro, []) for a, acao, erro in rotulos]
+            acuracia, _, ms, p95, _ = corpus.avaliar_variante(variante, frames, por_frame, repeticoes)
+            pontos.append((resolucao, altura_linha, acuracia, 1000 / ms, ms, p95))
+    return pontos
+
+def pareto(pontos):
+    """Pontos não dominados (nenhum outro é mais rápido e pelo menos tão preciso), do mais rápido ao mais lento."""
+    fronteira, melhor = [], -1.0
+    for p in sorted(pontos, key=lambda p: (-p[3], -p[2])):
+        if p[2] > melhor:
+            fronteira.append(p)
+            melhor = p[2]
+    return fronteira
+
+def escolher(pontos, acuracia_minima):
+    """Menor resolução (em pixels) que atinge a acurácia; no empate, a mais rápida."""
+    aprovados = [p for p in pontos if p[2] >= acuracia_minima]
+    return min(aprovados, key=lambda p: (p[0][0] * p[0][1], -p[3])) if aprovados else None
+
+def _rotulo(p):
+    return f"{p[0][0]}x{p[0][1]}/{p[1]}"
+
+def desenhar(pontos, fronteira, acuracia_minima, caminho):
+    largura, altura = TAMANHO_GRAFICO
+    img = np.full((altura, largura, 3), 255, np.uint8)
+    hz = [p[3] for p in pontos]
+    acc = [p[2] for p in pontos]
+    hz_min, hz_max = 0.0, max(hz) * 1.1
+    acc_min = min(min(acc), acuracia_minima if acuracia_minima is not None else 1.0)
+    acc_min = max(0.0, acc_min - 0.05)
+    def px(p_hz, p_acc):
+        return (int(MARGEM + (p_hz - hz_min) / (hz_max - hz_min) * (largura - 2 * MARGEM)),
+                int(altura - MARGEM - (p_acc - acc_min) / max(1.0 - acc_min, 1e-9) * (altura - 2 * MARGEM)))
+
+    fonte = cv2.FONT_HERSHEY_SIMPLEX
+    cv2.line(img, (MARGEM, altura - MARGEM), (largura - MARGEM, altura - MARGEM), (0, 0, 0), 1)
+    cv2.line(img, (MARGEM, MARGEM), (MARGEM, altura - MARGEM), (0, 0, 0), 1)
+    cv2.putText(img, "taxa do loop (Hz)", (largura // 2 - 70, altura - 15), fonte, 0.5, (0, 0, 0), 1)
+    cv2.putText(img, "acuracia", (5, MARGEM - 15), fonte, 0.5, (0, 0, 0), 1)
+    for i in range(5):
+        v_hz = hz_min + (hz_max - hz_min) * i / 4
+        v_acc = acc_min + (1.0 - acc_min) * i / 4
+        x, _ = px(v_hz, acc_min)
+        _, y = px(hz_min, v_acc)
+        cv2.putText(img, f"{v_hz:.0f}", (x - 10, altura - MARGEM + 18), fonte, 0.4, (0, 0, 0), 1)
+        cv2.putText(img, f"{v_acc:.1%}", (5, y + 4), fonte, 0.4, (0, 0, 0), 1)
+    if acuracia_minima is not None:
+        _, y = px(hz_min, acuracia_minima)
+        cv2.line(img, (MARGEM, y), (largura - MARGEM, y), COR_LIMIAR, 1)
+    for a, b in zip(fronteira, fronteira[1:]): cv2.line(img, px(a[3], a[2]), px(b[3], b[2]), COR_PARETO, 1)
+    for p in pontos:
+        cor = COR_PARETO if p in fronteira else COR_PONTO
+        cv2.circle(img, px(p[3], p[2]), 4, cor, -1)
+        x, y = px(p[3], p[2])
+        cv2.putText(img, _rotulo(p), (x + 6, y - 6), fonte, 0.35, cor, 1)
+    cv2.imwrite(caminho, img)
+    print(f"Gráfico salvo em '{caminho}'.")
+
+def gravar_csv(caminho, pontos, fronteira):
+    with open(caminho, 'w', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(('largura', 'altura', 'altura_linha', 'acuracia', 'hz', 'ms_media', 'ms_p95', 'pareto'))
+        for p in pontos:
+            escritor.writerow((*p[0], p[1], f"{p[2]:.4f}", f"{p[3]:.1f}", f"{p[4]:.3f}", f"{p[5]:.3f}", int(p in fronteira)))
+
+def main():
+    parser = argparse.ArgumentParser(description="Acurácia x taxa do loop em várias resoluções e alturas da faixa da linha.")
+    parser.add_argument('diretorio', help="corpus rotulado (corpus.py extrair)")
+    parser.add_argument('--variante', default='interface1', choices=VARIAVEIS)
+    parser.add_argument('--resolucoes', default=RESOLUCOES, help="lista LxA separada por vírgulas")
+    parser.add_argument('--alturas-linha', default=ALTURAS_LINHA, help="alturas da faixa da linha, em pixels da base 640x360")
+    parser.add_argument('--calibracao', default=calibracao.ARQUIVO_CALIBRACAO)
+    parser.add_argument('--repeticoes', type=int, default=3, help="passadas pelo corpus para medir o tempo")
+    parser.add_argument('--acuracia-minima', type=float, default=0.95)
+    parser.add_argument('--todos', action='store_true', help="inclui frames ainda não revisados")
+    parser.add_argument('--grafico', default=None, metavar='PNG', help="salva o gráfico de Pareto")
+    parser.add_argument('--csv', default=None, help="salva a tabela")
+    args = parser.parse_args()
+
+    calib = calibracao.carregar(args.calibracao)
+    pontos = varrer(args.diretorio, args.variante, calib, ler_lista(args.resolucoes, ler_resolucao),
+                    ler_lista(args.alturas_linha, int), args.repeticoes, args.todos)
+    fronteira = pareto(pontos)
+
+    print(f"\n{'resolução':>10}{'faixa':>7}{'acurácia':>10}{'Hz':>9}{'ms':>9}{'p95 ms':>9}  pareto")
+    for p in pontos:
+        print(f"{f'{p[0][0]}x{p[0][1]}':>10}{p[1]:>7}{p[2] * 100:>9.1f}%{p[3]:>9.1f}{p[4]:>9.3f}{p[5]:>9.3f}  {'*' if p in fronteira else ''}")
+    escolhido = escolher(pontos, args.acuracia_minima)
+    if escolhido: print(f"\nMenor resolução com acurácia >= {args.acuracia_minima:.0%}: {_rotulo(escolhido)} "
+                        f"({escolhido[2]:.1%}, {escolhido[3]:.0f} Hz)")
+    else: print(f"\nNenhuma combinação atingiu {args.acuracia_minima:.0%}.")
+
+    if args.csv: gravar_csv(args.csv, pontos, fronteira)
+    if args.grafico: desenhar(pontos, fronteira, args.acuracia_minima, args.grafico)
+    return 0 if escolhido else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
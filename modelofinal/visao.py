@@ -0,0 +1,7 @@
+# O código fica em comum/visao.py (o mesmo da phoenix); este arquivo só mantém `import visao` nesta pasta
+import os
+import sys
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path: sys.path.append(RAIZ)
+from comum import visao
+sys.modules[__name__] = visao
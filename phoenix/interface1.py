@@ -3,8 +3,10 @@ import numpy as np
 import pygame
 import sys
 import os
-import motor_control
+import motor_control1 as motor_control # A versão com desvio de obstáculo e manobras sem bloqueio
 import ultrassonico 
+import visao
+import padroes
 
 # --- Configurações da Interface Gráfica ---
 SCREEN_WIDTH = 480
@@ -25,6 +27,13 @@ CAMERA_DISPLAY_SIZE = (430, 242)
 FRAME_WIDTH = 320
 FRAME_HEIGHT = 180
 
+# --- Grade de Ocupação ---
+# True: as zonas CM/CE/CD/BE/BD passam a ser vistas derivadas de uma grade N x M
+# (classifica o frame inteiro, não só os recortes das zonas: é opção de layout, não de velocidade)
+MODO_GRADE = False
+GRADE_LINHAS = 6
+GRADE_COLUNAS = 8
+
 # --- Classe Principal da Aplicação ---
 class App:
     def __init__(self):
@@ -74,6 +83,8 @@ class App:
             'WHITE_PERCENT_THRESH': 50.0,
             'RED_PERCENT_THRESH': 40.0,
         }
+        # Tabela BGR -> cor, refeita apenas quando a calibração muda
+        self.lut_cores = visao.construir_lut(self.calib_vars)
 
         try:
             motor_control.setup_motors()
@@ -108,6 +119,9 @@ class App:
         elif self.state == 'rodada': self.tela_rodada.draw()
         pygame.display.flip()
 
+    def reconstruir_lut(self):
+        self.lut_cores = visao.construir_lut(self.calib_vars)
+
     def quit_app(self):
         print("encerrando aplicação")
         self.tela_calibracao.stop()
@@ -194,11 +208,13 @@ class TelaCalibracao:
     def avancar_passo(self):
         if self.step == 0 and self.black_samples:
             self.app.calib_vars['THRESHOLD_VALUE'] = int(np.mean(self.black_samples) + 30)
+            self.app.reconstruir_lut()
         elif self.step == 1 and self.green_samples:
             h_vals, _, _ = zip(*self.green_samples)
             h_min, h_max = max(0, min(h_vals) - 10), min(179, max(h_vals) + 10)
             self.app.calib_vars['LOWER_GREEN'] = np.array([h_min, 40, 40])
             self.app.calib_vars['UPPER_GREEN'] = np.array([h_max, 255, 255])
+            self.app.reconstruir_lut()
         elif self.step == 2 and self.white_samples:
              self.app.calib_vars['WHITE_THRESHOLD_LOWER'] = int(np.mean(self.white_samples) - 30)
 
@@ -234,6 +250,8 @@ class TelaRodada:
         self.last_erro = 0; self.gap_counter = 0; self.MAX_GAP_FRAMES = 15
         
         self.ZONAS = {}
+        self.ZONAS_GRADE = {}
+        self.grade = None
         self.ROI_LINE_Y = 0
         self.ROI_LINE_HEIGHT = 0
         self.frame_width = 0
@@ -265,6 +283,7 @@ class TelaRodada:
         self.ROI_BD = (int(367/640 * self.frame_width), int(264/360 * frame_height), int(232/640 * self.frame_width), int(106/360 * frame_height))
         
         self.ZONAS = {'CM': self.ROI_CM, 'CE': self.ROI_CE, 'CD': self.ROI_CD, 'BE': self.ROI_BE, 'BD': self.ROI_BD}
+        self.ZONAS_GRADE = {name: visao.celulas_da_zona(roi, (frame_height, self.frame_width), GRADE_LINHAS, GRADE_COLUNAS) for name, roi in self.ZONAS.items()}
         
         # ROI de seguimento de linha 
         self.ROI_LINE_Y = int(230/360 * frame_height) 
@@ -278,26 +297,8 @@ class TelaRodada:
         self.app.state = 'inicio'
 
     def get_zone_state(self, frame, zone_roi, calib):
-        x, y, w, h = zone_roi
-        roi_bgr = frame[y:y+h, x:x+w]
-        total_pixels = w * h
-        if total_pixels == 0: return "Branco"
-        
-        roi_hsv = cv2.cvtColor(roi_bgr, cv2.COLOR_BGR2HSV)
-        roi_gray = cv2.cvtColor(roi_bgr, cv2.COLOR_BGR2GRAY)
-        
-        mask_r1 = cv2.inRange(roi_hsv, calib['LOWER_RED1'], calib['UPPER_RED1'])
-        mask_r2 = cv2.inRange(roi_hsv, calib['LOWER_RED2'], calib['UPPER_RED2'])
-        mask_red = mask_r1 + mask_r2
-        if (cv2.countNonZero(mask_red) * 100 / total_pixels) > calib['RED_PERCENT_THRESH']: return "Vermelho"
-        
-        mask_green = cv2.inRange(roi_hsv, calib['LOWER_GREEN'], calib['UPPER_GREEN'])
-        if (cv2.countNonZero(mask_green) * 100 / total_pixels) > calib['GREEN_PERCENT_THRESH']: return "Verde"
-        
-        _, mask_black = cv2.threshold(roi_gray, calib['THRESHOLD_VALUE'], 255, cv2.THRESH_BINARY_INV)
-        if (cv2.countNonZero(mask_black) * 100 / total_pixels) > calib['BLACK_PERCENT_THRESH']: return "Preto"
-        
-        return "Branco"
+        # Só o recorte da zona passa pela LUT (as zonas cobrem cerca de 1/3 do frame)
+        return visao.estado_do_recorte(frame, zone_roi, self.app.lut_cores, calib)
 
     def update(self):
         if not self.cap or not self.cap.isOpened(): self.acao = "Câmera Desconectada"; motor_control.stop_all_motors(); return
@@ -307,7 +308,7 @@ class TelaRodada:
         if dist < ultrassonico.DISTANCIA_OBSTACULO:
             self.acao = "Desviando..."
             self.area = "Obstáculo"
-            motor_control.gerenciar_movimento("Desviando", 0) 
+            motor_control.gerenciar_movimento("Desviando", 0, linha_detectada=False) # Sem frame neste ciclo
             self.last_erro = 0 # Reseta o erro para recomeçar o PID
             return # Pula o resto da lógica de visão se estiver desviando
         
@@ -317,26 +318,28 @@ class TelaRodada:
         if not ret: self.acao = "Falha na Captura"; motor_control.stop_all_motors(); return
         
         calib = self.app.calib_vars
-        zone_states = {name: self.get_zone_state(self.frame, roi, calib) for name, roi in self.ZONAS.items()}
-        
-        if any(state == "Vermelho" for state in zone_states.values()):
-            self.acao = "Fim de Pista"
-        elif zone_states['BE'] == "Preto" and zone_states['BD'] == "Preto": self.acao = "Seguir em Frente"
-        elif zone_states['BD'] == "Verde" and zone_states['BE'] == "Verde": self.acao = "Meia Volta"
-        elif zone_states['CE'] == "Preto" and zone_states['CD'] == "Branco" and zone_states['CM'] == "Branco": self.acao = "Curva de 90 Esquerda"
-        elif zone_states['CD'] == "Preto" and zone_states['CE'] == "Branco" and zone_states['CM'] == "Branco": self.acao = "Curva de 90 Direita"
+        if MODO_GRADE:
+            self.grade = visao.grade_ocupacao(visao.classificar_frame(self.frame, self.app.lut_cores), GRADE_LINHAS, GRADE_COLUNAS)
+            zone_states = {name: visao.estado_da_zona_grade(self.grade, cel, calib) for name, cel in self.ZONAS_GRADE.items()}
         else:
-            self.acao = "Seguindo Linha"
-            gray_frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
-            roi_line = gray_frame[self.ROI_LINE_Y : self.ROI_LINE_Y + self.ROI_LINE_HEIGHT, :]
-            _, mask = cv2.threshold(roi_line, calib['THRESHOLD_VALUE'], 255, cv2.THRESH_BINARY_INV)
-            M = cv2.moments(mask)
-            
-            if M["m00"] > 0:
-                cx = int(M["m10"] / M["m00"])
-                self.erro = (self.frame_width // 2) - cx
-                self.last_erro = self.erro
-                self.gap_counter = 0
+            zone_states = {name: self.get_zone_state(self.frame, roi, calib) for name, roi in self.ZONAS.items()}
+        
+        # Centroide da linha em todo frame: os giros fechados pela visão precisam do erro
+        # deste frame, seja qual for a ação que as zonas decidirem
+        gray_frame = cv2.cvtColor(self.frame, cv2.COLOR_BGR2GRAY)
+        roi_line = gray_frame[self.ROI_LINE_Y : self.ROI_LINE_Y + self.ROI_LINE_HEIGHT, :]
+        _, mask = cv2.threshold(roi_line, calib['THRESHOLD_VALUE'], 255, cv2.THRESH_BINARY_INV)
+        M = cv2.moments(mask)
+        linha_detectada = M["m00"] > 0
+        if linha_detectada:
+            cx = int(M["m10"] / M["m00"])
+            self.erro = (self.frame_width // 2) - cx
+            self.last_erro = self.erro
+        
+        # Estados das zonas -> bitmask -> padrão OBR (uma consulta na tabela)
+        self.acao = padroes.decidir(zone_states)
+        if self.acao == "Seguindo Linha":
+            if linha_detectada: self.gap_counter = 0
             else:
                 self.gap_counter += 1
                 if self.gap_counter < self.MAX_GAP_FRAMES:
@@ -349,7 +352,7 @@ class TelaRodada:
         if self.acao == "Fim de Pista":
             motor_control.stop_all_motors()
         else:
-            motor_control.gerenciar_movimento(self.acao, self.erro)
+            motor_control.gerenciar_movimento(self.acao, self.erro, linha_detectada=linha_detectada)
         
         self.frame = self.visualize_rois(self.frame.copy(), zone_states)
 
@@ -1,5 +1,6 @@
 import RPi.GPIO as GPIO
 import time
+import manobras
 
 # --- Pinos GPIO ---
 IN1_L, IN2_L, EN_L = 21, 20, 12
@@ -28,9 +29,16 @@ OBSTACLE_BACKWARD_TIME = 0.2
 OBSTACLE_BACKWARD_SPEED = 70.0
 
 
-# --- Parâmetros de Manobra ---
-TURN_DURATION_180 = 1.5   # Segundos para girar 180 graus
-FORWARD_DURATION = 0.2    # Segundos para avançar um pouco antes de virar
+# --- Parâmetros de Manobra (curvas fechadas pela visão) ---
+# Avança até a marcação sair da visão e gira até a linha voltar ao centro;
+# os tempos abaixo são só limites de segurança.
+FORWARD_TIMEOUT = 0.6     # Máximo para avançar antes de virar
+TURN_TIMEOUT_90 = 1.5     # Máximo para girar 90 graus
+TURN_TIMEOUT_180 = 2.5    # Máximo para girar 180 graus
+TURN_CENTER_TOLERANCE = 10 # |erro| (px do frame da visão, 320 de largura) que já conta como centralizado
+TURN_SLOWDOWN_ERROR = 80  # Abaixo desse |erro| o giro desacelera proporcionalmente
+TURN_MIN_SPEED = 10
+LINE_ACTIONS = ("Seguindo Linha", "Seguir em Frente") # Sem linha_detectada, só essas ações contam como linha à vista
 
 # --- Variáveis de Estado Internas do Módulo ---
 last_error = 0
@@ -38,6 +46,8 @@ integral = 0
 pwm_L, pwm_R = None, None
 last_action_time = 0
 ACTION_DELAY_SECONDS = 0.5 # Delay para evitar comandos duplicados
+SPIN_MIN_FRACTION = 0.5 # Parte do giro que sempre é feita antes de aceitar a linha reencontrada
+manobra = None # manobras.Manobra em andamento (avançada por gerenciar_movimento, sem sleep)
 
 # ===================================================================
 # --- FUNÇÕES DE BAIXO NÍVEL (Controle direto dos motores) ---
@@ -71,10 +81,15 @@ def set_motor_speed(motor, speed):
         if motor == 'L': pwm_L.ChangeDutyCycle(0)
         elif motor == 'R': pwm_R.ChangeDutyCycle(0)
 
+def _set_speeds(speed_L, speed_R):
+    set_motor_speed('L', speed_L)
+    set_motor_speed('R', speed_R)
+
 def stop_all_motors():
-    """Para ambos os motores."""
-    set_motor_speed('L', 0)
-    set_motor_speed('R', 0)
+    """Para ambos os motores (e cancela a manobra em andamento)."""
+    global manobra
+    manobra = None
+    _set_speeds(0, 0)
 
 def full_stop_and_cleanup():
     """Para os motores e limpa os pinos GPIO. Chame ao sair do programa."""
@@ -104,30 +119,36 @@ def _follow_line_pid(error, base_speed):
     set_motor_speed('L', max(-100, min(100, speed_L)))
     set_motor_speed('R', max(-100, min(100, speed_R)))
 
-def _turn(direction, speed, duration):
-    """Lógica interna para giros."""
-    if direction == 'left':
-        set_motor_speed('L', -speed)
-        set_motor_speed('R', speed)
-    else: # right
-        set_motor_speed('L', speed)
-        set_motor_speed('R', -speed)
-    time.sleep(duration)
-    stop_all_motors()
-
-def _move_forward(speed, duration):
-    """Lógica interna para mover para frente."""
-    set_motor_speed('L', speed)
-    set_motor_speed('R', speed)
-    time.sleep(duration)
-    stop_all_motors()
+def _turn(direction, speed, duration, abortable=False):
+    """Segmentos de giro; se abortable, a segunda metade termina ao reencontrar a linha."""
+    if not abortable: return [manobras.girar(direction, speed, duration)]
+    fixo = duration * SPIN_MIN_FRACTION
+    return [manobras.girar(direction, speed, fixo), manobras.girar(direction, speed, duration - fixo, abortavel=True)]
+
+def _move_forward(speed, duration, abortable=False):
+    """Segmento para mover para frente."""
+    return [manobras.frente(speed, duration, abortable)]
 
 def _move_backward(speed, duration):
-    """Lógica interna para mover para trás."""
-    set_motor_speed('L', -speed)
-    set_motor_speed('R', -speed)
-    time.sleep(duration)
-    stop_all_motors()
+    """Segmento para mover para trás."""
+    return [manobras.tras(speed, duration)]
+
+def _forward_past_marker(acao):
+    """Avança até a marcação que disparou a manobra sair da visão."""
+    return [manobras.AvancoAteSair(INTERSECTION_SPEED, acao, FORWARD_TIMEOUT)]
+
+def _turn_to_line(direction, timeout, lines_to_skip=0):
+    """Gira até a linha voltar ao centro da faixa da linha."""
+    return [manobras.GiroAteLinha(direction, TURN_SPEED, timeout, lines_to_skip, TURN_CENTER_TOLERANCE,
+                                  TURN_SLOWDOWN_ERROR, TURN_MIN_SPEED)]
+
+def _start_maneuver(nome, segmentos):
+    """Começa uma manobra; quem a faz avançar é gerenciar_movimento, a cada frame."""
+    global manobra
+    manobra = manobras.Manobra(nome, segmentos, _set_speeds).iniciar()
+
+def manobra_em_andamento():
+    return manobra is not None and manobra.ativa
 
 # ===================================================================
 # --- FUNÇÕES DE ALTO NÍVEL (Manobras Específicas) ---
@@ -135,48 +156,47 @@ def _move_backward(speed, duration):
 
 def manobra_desvio_obstaculo():
     """
-    Executa a sequência completa de movimentos para desviar de um obstáculo.
+    Inicia a sequência completa de movimentos para desviar de um obstáculo.
+    Não bloqueia: a partir do realinhamento, reencontrar a linha encerra o desvio.
     """
     print("Módulo de Controle: Iniciando manobra de desvio de obstáculo.")
-    stop_all_motors()
-    time.sleep(0.5)
-
-    _move_backward(OBSTACLE_BACKWARD_SPEED, OBSTACLE_BACKWARD_TIME)
-    time.sleep(0.2)
-
-    # 1. Primeiro giro (Direita) e avanço
-    _turn('right', OBSTACLE_TURN_SPEED, OBSTACLE_TURN_TIME_1)
-    time.sleep(0.2)
-    _move_forward(OBSTACLE_MOVE_SPEED, OBSTACLE_FORWARD_TIME_1)
-    time.sleep(0.2)
-    
-    # 2. Segundo giro (Esquerda) e avanço lateral
-    _turn('left', OBSTACLE_TURN_SPEED, OBSTACLE_TURN_TIME_2)
-    time.sleep(0.2)
-    _move_forward(OBSTACLE_MOVE_SPEED, OBSTACLE_FORWARD_TIME_2)
-    time.sleep(0.2)
-    
-    # 3. Terceiro giro (Esquerda) para realinhar e avançar
-    _turn('left', OBSTACLE_TURN_SPEED, OBSTACLE_TURN_TIME_3)
-    time.sleep(0.2)
-    _move_forward(OBSTACLE_MOVE_SPEED, OBSTACLE_FORWARD_TIME_3)
-    time.sleep(0.2)
-    
-    # 4. Quarto giro (Direita) para finalizar a manobra
-    _turn('right', OBSTACLE_TURN_SPEED, OBSTACLE_TURN_TIME_4)
-    
-    print("Módulo de Controle: Manobra de desvio concluída.")
-    time.sleep(0.5)
+    _start_maneuver("Desvio de obstáculo",
+        [manobras.pausa(0.5)] +
+        _move_backward(OBSTACLE_BACKWARD_SPEED, OBSTACLE_BACKWARD_TIME) + [manobras.pausa(0.2)] +
+        # 1. Primeiro giro (Direita) e avanço
+        _turn('right', OBSTACLE_TURN_SPEED, OBSTACLE_TURN_TIME_1) + [manobras.pausa(0.2)] +
+        _move_forward(OBSTACLE_MOVE_SPEED, OBSTACLE_FORWARD_TIME_1) + [manobras.pausa(0.2)] +
+        # 2. Segundo giro (Esquerda) e avanço lateral
+        _turn('left', OBSTACLE_TURN_SPEED, OBSTACLE_TURN_TIME_2) + [manobras.pausa(0.2)] +
+        _move_forward(OBSTACLE_MOVE_SPEED, OBSTACLE_FORWARD_TIME_2) + [manobras.pausa(0.2)] +
+        # 3. Terceiro giro (Esquerda) para realinhar e avançar
+        _turn('left', OBSTACLE_TURN_SPEED, OBSTACLE_TURN_TIME_3, abortable=True) + [manobras.pausa(0.2)] +
+        _move_forward(OBSTACLE_MOVE_SPEED, OBSTACLE_FORWARD_TIME_3, abortable=True) + [manobras.pausa(0.2)] +
+        # 4. Quarto giro (Direita) para finalizar a manobra
+        _turn('right', OBSTACLE_TURN_SPEED, OBSTACLE_TURN_TIME_4, abortable=True) +
+        [manobras.pausa(0.5)])
 
 # ===================================================================
 # --- FUNÇÃO PRINCIPAL (A única que o main vai chamar) ---
 # ===================================================================
 
-def gerenciar_movimento(acao, erro):
+def gerenciar_movimento(acao, erro, linha_detectada=None):
     """
     Recebe a ação da visão computacional e executa o movimento correspondente.
+    linha_detectada: a visão achou a linha na faixa da linha neste frame (e erro
+    é dessa medida). Sem o valor, só as LINE_ACTIONS contam como linha à vista.
     """
-    global last_action_time
+    global last_action_time, manobra
+    # Manobra em andamento: avança com o que a visão viu neste frame (giros
+    # fecham pela linha; nos segmentos abortáveis, a linha reencontrada encerra a manobra).
+    # Aqui erro = centro - cx; as manobras usam positivo = linha à direita.
+    if manobra is not None:
+        if linha_detectada is None: linha_detectada = acao in LINE_ACTIONS
+        if manobra.tick(linha_encontrada=linha_detectada, erro=-erro, acao=acao): return
+        if manobra.abortada: print(f"Módulo de Controle: {manobra.nome} encerrada, linha reencontrada.")
+        else: print(f"Módulo de Controle: {manobra.nome} concluída.")
+        manobra = None
+        last_action_time = time.time()
     current_time = time.time()
 
     # Ações que não devem ser interrompidas por delay
@@ -200,25 +220,19 @@ def gerenciar_movimento(acao, erro):
 
     if "Curva de 90 Direita" in acao:
         print("Módulo de Controle: Executando curva de 90 graus à direita.")
-        _move_forward(INTERSECTION_SPEED, 0.25)
-        _turn('right', TURN_SPEED, 0.5)
-        last_action_time = time.time()
+        _start_maneuver(acao, _forward_past_marker(acao) + _turn_to_line('right', TURN_TIMEOUT_90))
         
     elif "Curva de 90 Esquerda" in acao:
         print("Módulo de Controle: Executando curva de 90 graus à esquerda.")
-        _move_forward(INTERSECTION_SPEED, 0.25)
-        _turn('left', TURN_SPEED, 0.5)
-        last_action_time = time.time()
+        _start_maneuver(acao, _forward_past_marker(acao) + _turn_to_line('left', TURN_TIMEOUT_90))
         
     elif "Meia Volta" in acao:
         print("Módulo de Controle: Executando meia volta.")
-        _move_forward(INTERSECTION_SPEED, FORWARD_DURATION)
-        _turn('right', TURN_SPEED, TURN_DURATION_180)
-        last_action_time = time.time()
+        # Passa pelo braço do cruzamento (1 linha) antes de centralizar na linha de volta
+        _start_maneuver(acao, _forward_past_marker(acao) + _turn_to_line('right', TURN_TIMEOUT_180, lines_to_skip=1))
     
     elif "Desviando" in acao:
         manobra_desvio_obstaculo()
-        last_action_time = time.time()
 
     else:
         stop_all_motors()
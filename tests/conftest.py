@@ -0,0 +1,21 @@
+import os
+import sys
+import types
+
+# Os scripts rodam da própria pasta (import visao, import motor_controll...):
+# aqui a raiz (comum/) e a modelofinal entram no sys.path do mesmo jeito
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for caminho in (os.path.join(RAIZ, 'modelofinal'), RAIZ):
+    if caminho not in sys.path: sys.path.insert(0, caminho)
+
+# motor_controll importa RPi.GPIO no topo. Fora do Raspberry entra um módulo
+# só com as constantes; os testes do driver trocam motor_controll.GPIO por um
+# gravador, então nenhum teste mexe nos pinos de verdade
+try:
+    import RPi.GPIO
+except ImportError:
+    gpio = types.ModuleType('RPi.GPIO')
+    gpio.BCM, gpio.OUT, gpio.HIGH, gpio.LOW = 11, 0, 1, 0
+    rpi = types.ModuleType('RPi')
+    rpi.GPIO = gpio
+    sys.modules['RPi'], sys.modules['RPi.GPIO'] = rpi, gpio
@@ -0,0 +1,143 @@
+import pytest
+from comum import manobras
+
+# Os testes passam `agora` explícito: nada depende do relógio real
+
+class Motores:
+    """aplicar(L, R) que só guarda as velocidades pedidas."""
+    def __init__(self): self.comandos = []
+    def __call__(self, velocidade_L, velocidade_R): self.comandos.append((velocidade_L, velocidade_R))
+
+def test_segmentos_em_ordem_pelo_tempo():
+    motores = Motores()
+    m = manobras.Manobra("teste", [manobras.tras(30, 0.3), manobras.girar('left', 25, 0.5), manobras.frente(20, 0.8)], motores)
+    m.iniciar(agora=0.0)
+    assert motores.comandos == [(-30, -30)]
+    for agora, esperado in ((0.1, (-30, -30)), (0.3, (-25, 25)), (0.79, (-25, 25)), (0.8, (20, 20)), (1.5, (20, 20))):
+        assert m.tick(agora=agora)
+        assert motores.comandos[-1] == esperado
+    assert not m.tick(agora=1.6)
+    assert motores.comandos[-1] == (0, 0)
+    assert not m.ativa and not m.abortada
+
+def test_aplicar_so_quando_a_velocidade_muda():
+    motores = Motores()
+    m = manobras.Manobra("teste", [manobras.frente(20, 1.0), manobras.frente(20, 1.0), manobras.pausa(0.5)], motores).iniciar(agora=0.0)
+    for i in range(1, 25): m.tick(agora=i * 0.1)
+    assert motores.comandos == [(20, 20), (0, 0)]
+
+def test_frame_atrasado_nao_encurta_o_segmento_seguinte():
+    # O tempo de cada segmento conta de quando ele começou de fato
+    motores = Motores()
+    m = manobras.Manobra("teste", [manobras.frente(20, 0.1), manobras.girar('right', 25, 0.1), manobras.tras(30, 1.0)], motores).iniciar(agora=0.0)
+    assert m.tick(agora=0.25)
+    assert m.indice == 1 and motores.comandos[-1] == (25, -25)
+    assert m.tick(agora=0.34) and m.indice == 1
+    assert m.tick(agora=0.35) and m.indice == 2
+
+def test_linha_aborta_so_segmento_abortavel():
+    motores = Motores()
+    m = manobras.Manobra("desvio", [manobras.frente(25, 0.5), manobras.girar('left', 25, 1.0, abortavel=True)], motores).iniciar(agora=0.0)
+    assert m.tick(linha_encontrada=True, agora=0.2) # O primeiro segmento não é abortável
+    assert m.tick(agora=0.6)
+    assert not m.tick(linha_encontrada=True, agora=0.7)
+    assert m.abortada and motores.comandos[-1] == (0, 0)
+    assert not m.tick(agora=0.8) # Depois de abortada não volta a comandar
+    assert motores.comandos.count((0, 0)) == 1
+
+def test_abortar_de_fora_para_os_motores():
+    motores = Motores()
+    m = manobras.Manobra("teste", [manobras.frente(20, 1.0)], motores).iniciar(agora=0.0)
+    m.abortar()
+    assert m.abortada and not m.ativa and motores.comandos[-1] == (0, 0)
+
+def test_iniciar_de_novo_limpa_o_aborto():
+    m = manobras.Manobra("teste", [manobras.frente(20, 1.0, abortavel=True)], Motores()).iniciar(agora=0.0)
+    m.tick(linha_encontrada=True, agora=0.1)
+    assert m.abortada
+    m.iniciar(agora=1.0)
+    assert m.ativa and not m.abortada
+
+@pytest.mark.parametrize('direcao, esperado', [('left', (-25, 25)), ('right', (25, -25))])
+def test_sentido_do_giro(direcao, esperado):
+    s = manobras.girar(direcao, 25, 1.0)
+    assert s.comecar(0.0) == esperado
+
+def test_avanco_ate_sair_da_marcacao():
+    motores = Motores()
+    acao = "Curva de 90 Direita"
+    m = manobras.Manobra("curva", [manobras.AvancoAteSair(20, acao, 0.6), manobras.pausa(1.0)], motores).iniciar(agora=0.0)
+    assert m.tick(agora=0.05, acao=acao) and m.indice == 0
+    assert m.tick(agora=0.10, acao="Seguindo Linha") and m.indice == 0 # Um frame sem a marcação ainda não basta
+    assert m.tick(agora=0.15, acao=acao) and m.indice == 0              # Voltou: a contagem recomeça
+    for i in range(manobras.AvancoAteSair.QUADROS_LIVRE - 1):
+        assert m.tick(agora=0.2 + i * 0.05, acao="Seguindo Linha") and m.indice == 0
+    assert m.tick(agora=0.4, acao="Seguindo Linha") and m.indice == 1
+    assert motores.comandos == [(20, 20), (0, 0)]
+
+def test_avanco_ate_sair_respeita_o_tempo_maximo():
+    acao = "Curva de 90 Esquerda"
+    m = manobras.Manobra("curva", [manobras.AvancoAteSair(20, acao, 0.6)], Motores()).iniciar(agora=0.0)
+    assert m.tick(agora=0.59, acao=acao)
+    assert not m.tick(agora=0.6, acao=acao)
+
+# --- GiroAteLinha ---
+
+def test_giro_sai_da_linha_procura_e_centraliza():
+    g = manobras.GiroAteLinha('right', 25, 1.5, tolerancia=20, erro_desacelerar=160, velocidade_minima=12)
+    assert g.comecar(0.0) == (25, -25)
+    assert g.atualizar(0.1, True, 5, None) == (25, -25)  # Ainda na linha de onde saiu: não conta
+    assert g.atualizar(0.2, False, None, None) == (25, -25)
+    assert g.fase == 'procurando'
+    assert g.atualizar(0.3, True, 80, None) == pytest.approx((12.5, -12.5)) # Linha à vista: desacelera pelo erro
+    assert g.atualizar(0.4, True, 20, None) is None
+
+def test_giro_nunca_abaixo_da_velocidade_minima_e_volta_se_passar():
+    g = manobras.GiroAteLinha('right', 25, 1.5, velocidade_minima=12)
+    g.comecar(0.0)
+    g.atualizar(0.1, False, None, None)
+    assert g.atualizar(0.2, True, 30, None) == (12, -12)
+    assert g.atualizar(0.3, True, -40, None) == (-12, 12)   # Passou do centro: volta para a esquerda
+    assert g.atualizar(0.4, False, None, None) == (-12, 12) # Perdeu de vista: devagar para o lado em que ela estava
+
+def test_giro_ignora_linhas_cruzadas():
+    # Meia volta num cruzamento: o braço lateral passa pela câmera antes da linha de trás
+    g = manobras.GiroAteLinha('left', 25, 2.5, ignorar=1)
+    g.comecar(0.0)
+    for linha, erro in ((True, 0), (False, None), (True, -5), (False, None)):
+        assert g.atualizar(0.1, linha, erro, None) == (-25, 25)
+    g.atualizar(0.2, True, -5, None)
+    assert g.fase == 'centralizando'
+    assert g.atualizar(0.3, True, -5, None) is None
+
+def test_giro_termina_no_tempo_maximo_sem_linha():
+    g = manobras.GiroAteLinha('left', 25, 1.5)
+    g.comecar(0.0)
+    assert g.atualizar(1.49, False, None, None) == (-25, 25)
+    assert g.atualizar(1.5, False, None, None) is None
+
+def _girar_no_mundo(direcao, alvo, ignorar=0, tempo_maximo=2.5):
+    """
+    Robô girando no lugar num mundo de brinquedo: linhas a 0° (a de partida),
+    `alvo` e, com ignorar, no meio do caminho. A câmera vê uma linha a até 30°
+    e o erro é 4 px por grau (positivo = linha à direita). Devolve (ângulo
+    final, instante em que a manobra acabou, abortada).
+    """
+    linhas = [0.0, alvo] + ([alvo / 2] if ignorar else [])
+    g = manobras.GiroAteLinha(direcao, 25, tempo_maximo, ignorar=ignorar)
+    velocidades = []
+    m = manobras.Manobra("giro", [g], lambda L, R: velocidades.append((L, R))).iniciar(agora=0.0)
+    theta, t, dt = 0.0, 0.0, 1 / 30
+    while m.ativa and t < 5:
+        t += dt
+        theta += (velocidades[-1][0] - velocidades[-1][1]) * 6 * dt # 25/-25 -> 300°/s
+        vista = [l for l in linhas if abs(l - theta) < 30]
+        erro = None if not vista else (min(vista, key=lambda l: abs(l - theta)) - theta) * 4
+        m.tick(vista != [], agora=t, erro=erro)
+    return theta, t, m.abortada
+
+@pytest.mark.parametrize('direcao, alvo, ignorar', [('right', 90, 0), ('left', -90, 0), ('right', 180, 1)])
+def test_giro_fecha_na_linha(direcao, alvo, ignorar):
+    theta, t, abortada = _girar_no_mundo(direcao, alvo, ignorar)
+    assert abs(theta - alvo) <= 5 # Tolerância de 20 px = 5°
+    assert t < 2.5 and not abortada
@@ -0,0 +1,219 @@
+import math
+import pytest
+import motor_controll as mc
+
+REF = mc.PID_REFERENCE_DT
+
+@pytest.fixture
+def pid(monkeypatch):
+    """Estado do PID zerado e ganhos fixos, independentes da calibração do arquivo."""
+    for nome, valor in (('integral', 0), ('derivative', 0), ('last_error', 0), ('last_error_time', None),
+                        ('KP', 0.4), ('KI', 0.0), ('KD', 0.05), ('INTEGRAL_LIMIT', 200)):
+        monkeypatch.setattr(mc, nome, valor)
+    return mc
+
+# --- Integral e anti-windup ---
+
+def test_saida_limitada(pid):
+    assert pid._calculate_pid(1000, REF, 30) == 30
+    assert pid._calculate_pid(-1000, REF, 30) == -30
+
+def test_integral_nao_cresce_com_a_saida_saturada(pid):
+    pid.KI = 0.1
+    for _ in range(100): saida = pid._calculate_pid(300, REF, 20)
+    assert saida == 20
+    assert pid.integral == 0
+
+def test_integral_descarrega_quando_o_erro_inverte(pid):
+    # Saturada para um lado e erro do outro: a integral volta a andar
+    pid.KI, pid.integral = 0.1, 200
+    pid._calculate_pid(-10, REF, 5)
+    assert pid.integral == 190
+
+def test_integral_limitada(pid):
+    pid.KP, pid.KD, pid.KI = 0, 0, 0.01
+    for _ in range(10): pid._calculate_pid(50, REF, 100)
+    assert pid.integral == pid.INTEGRAL_LIMIT
+    for _ in range(20): pid._calculate_pid(-50, REF, 100)
+    assert pid.integral == -pid.INTEGRAL_LIMIT
+
+def test_integral_proporcional_ao_dt(pid):
+    # A thread do PID roda mais rápido que a câmera: o passo da integral segue o dt real
+    pid.KP, pid.KD, pid.KI = 0, 0, 0.01
+    pid._calculate_pid(30, REF / 3, 100)
+    assert pid.integral == pytest.approx(10)
+    pid._calculate_pid(30, 10.0, 100) # Frame travado conta só até PID_MAX_DT
+    assert pid.integral == pytest.approx(10 + 30 * pid.PID_MAX_DT / REF)
+
+# --- Derivada filtrada ---
+
+def test_primeira_medida_recomeca_do_zero(pid):
+    pid.integral, pid.derivative = 50, 3
+    assert pid._new_measurement(40, 1.0) == REF
+    assert pid.integral == 0 and pid.derivative == 0
+
+def test_degrau_passa_pelo_filtro(pid):
+    pid._new_measurement(0, 1.0)
+    dt = 0.02
+    pid._new_measurement(30, 1.0 + dt)
+    bruta = 30 / dt * REF
+    alpha = dt / (dt + 1 / (2 * math.pi * pid.DERIVATIVE_CUTOFF_HZ))
+    assert pid.derivative == pytest.approx(alpha * bruta)
+    assert pid.derivative < bruta
+    anteriores = [pid.derivative]
+    for i in range(2, 10):
+        pid._new_measurement(30, 1.0 + i * dt) # Erro parado: a derivada só decai
+        anteriores.append(pid.derivative)
+    assert all(b < a for a, b in zip(anteriores, anteriores[1:])) and anteriores[-1] > 0
+
+@pytest.mark.parametrize('fps', [30, 60, 90])
+def test_derivada_nao_depende_da_taxa_da_camera(pid, fps):
+    # Uma rampa de 300 px/s dá a mesma derivada (por passo de referência) a qualquer FPS
+    for i in range(fps):
+        pid._new_measurement(300 * i / fps, 1.0 + i / fps)
+    assert pid.derivative == pytest.approx(300 * REF, rel=0.01)
+
+def test_medida_velha_zera_o_estado(pid):
+    pid._new_measurement(0, 1.0)
+    pid._new_measurement(50, 1.03)
+    pid.integral = 80
+    assert pid._new_measurement(60, 1.03 + pid.PID_STALE_SECONDS + 0.01) == REF
+    assert pid.integral == 0 and pid.derivative == 0
+
+# --- Instante de atuação ---
+
+class DriverNulo:
+    def set_speeds(self, speeds): pass
+
+def test_instante_atuacao_e_a_primeira_escrita_do_comando(monkeypatch):
+    monkeypatch.setattr(mc, 'driver', DriverNulo())
+    monkeypatch.setattr(mc, '_escrita', (0.0, 0.0))
+    assert mc.instante_atuacao(10.0) is None
+    mc._set_speeds(20, 20, 10.5) # Primeira passada da thread do PID com o comando das 10.5
+    primeira = mc.instante_atuacao(10.0)
+    mc._set_speeds(21, 19, 10.5) # As seguintes não mudam o instante
+    assert mc.instante_atuacao(10.0) == primeira
+    assert mc.instante_atuacao(10.6) is None # Comando mais novo ainda não escrito
+    mc._set_speeds(0, 0) # Escrita direta (parada, manobra) vale na hora
+    assert mc.instante_atuacao(primeira) >= primeira
+
+# --- MotorDriver: só escreve o que mudou ---
+
+class GPIOGravador:
+    HIGH, LOW = 1, 0
+    def __init__(self): self.saidas = []
+    def output(self, canais, valores): self.saidas.append((list(canais), list(valores)))
+
+class PWMGravador:
+    def __init__(self): self.duties = []
+    def ChangeDutyCycle(self, duty): self.duties.append(duty)
+
+@pytest.fixture
+def motores(monkeypatch):
+    gpio = GPIOGravador()
+    monkeypatch.setattr(mc, 'GPIO', gpio)
+    pwms = {'L': PWMGravador(), 'R': PWMGravador()}
+    driver = mc.MotorDriver({'L': (21, 20), 'R': (16, 19)}, pwms)
+    return driver, gpio, pwms
+
+def test_primeiro_comando_escreve_tudo_numa_saida(motores):
+    driver, gpio, pwms = motores
+    driver.set_speeds((('L', 30), ('R', -40)))
+    assert gpio.saidas == [([21, 20, 16, 19], [1, 0, 0, 1])] # Sentido dos dois motores numa chamada só
+    assert pwms['L'].duties == [30] and pwms['R'].duties == [40]
+    assert (driver.gpio_calls, driver.skipped) == (3, 0)
+
+def test_comando_repetido_nao_escreve(motores):
+    driver, gpio, pwms = motores
+    for _ in range(10): driver.set_speeds((('L', 30), ('R', 30)))
+    assert len(gpio.saidas) == 1 and pwms['L'].duties == [30] and pwms['R'].duties == [30]
+    assert driver.gpio_calls == 3 and driver.skipped == 9 * 4
+
+def test_variacao_menor_que_o_passo_do_duty_nao_escreve(motores):
+    driver, _, pwms = motores
+    driver.set_speeds((('L', 30), ('R', 30)))
+    driver.set_speeds((('L', 30.2), ('R', 29.8)))
+    assert pwms['L'].duties == [30] and pwms['R'].duties == [30]
+    driver.set_speeds((('L', 30.3), ('R', 30)))
+    assert pwms['L'].duties == [30, 30.5]
+
+def test_so_o_motor_que_inverte_escreve_o_sentido(motores):
+    driver, gpio, _ = motores
+    driver.set_speeds((('L', 30), ('R', 30)))
+    driver.set_speeds((('L', -30), ('R', 30)))
+    assert gpio.saidas[-1] == ([21, 20], [0, 1])
+
+def test_velocidade_zero_so_zera_o_duty(motores):
+    driver, gpio, pwms = motores
+    driver.set_speeds((('L', 30), ('R', 30)))
+    driver.set_speeds((('L', 0), ('R', 0)))
+    driver.set_speeds((('L', 0), ('R', 0))) # Parar de novo não custa nada
+    driver.set_speeds((('L', 25), ('R', 25))) # Mesmo sentido de antes da parada: só o duty
+    assert len(gpio.saidas) == 1
+    assert pwms['L'].duties == [30, 0, 25]
+
+def test_velocidade_limitada_a_100(motores):
+    driver, _, pwms = motores
+    driver.set_speeds((('L', 150), ('R', -150)))
+    assert pwms['L'].duties == [100] and pwms['R'].duties == [100]
+
+def test_invalidate_reescreve_tudo(motores):
+    driver, gpio, pwms = motores
+    driver.set_speeds((('L', 30), ('R', 30)))
+    driver.invalidate()
+    driver.set_speeds((('L', 30), ('R', 30)))
+    assert len(gpio.saidas) == 2 and pwms['L'].duties == [30, 30]
+
+def test_set_motor_speed_usa_o_driver(motores, monkeypatch):
+    driver, gpio, pwms = motores
+    monkeypatch.setattr(mc, 'driver', driver)
+    monkeypatch.setattr(mc, '_escrita', (0.0, 0.0))
+    mc.set_motor_speed('R', -20)
+    mc.set_motor_speed('R', -20)
+    assert gpio.saidas == [([16, 19], [0, 1])] and pwms['R'].duties == [20] and pwms['L'].duties == []
+    assert mc.gpio_stats() == (2, 2)
+
+# --- Velocidade base (planejador e rampa) ---
+
+@pytest.fixture
+def relogio(monkeypatch):
+    """time.monotonic controlado pelo teste; o planejador começa sem histórico."""
+    agora = [100.0]
+    monkeypatch.setattr(mc.time, 'monotonic', lambda: agora[0])
+    monkeypatch.setattr(mc, 'planned_speed', None)
+    monkeypatch.setattr(mc, 'planned_time', 0.0)
+    monkeypatch.setattr(mc, 'manobra', None)
+    monkeypatch.setattr(mc, '_pid_running', False)
+    bases = []
+    monkeypatch.setattr(mc, '_follow_line_pid', lambda erro, base_speed: bases.append(base_speed))
+    return agora, bases
+
+def test_planejador_desligado_por_padrao(relogio):
+    _, bases = relogio
+    assert mc.SPEED_PLANNER is False
+    mc.gerenciar_movimento("Seguindo Linha", 0, (1.0, 0))
+    mc.gerenciar_movimento("Seguir em Frente", 0, (1.0, 0))
+    assert bases == [mc.BASE_SPEED, mc.INTERSECTION_SPEED]
+
+def test_cruzamento_desacelera_pela_rampa(relogio, monkeypatch):
+    agora, bases = relogio
+    monkeypatch.setattr(mc, 'SPEED_PLANNER', True)
+    monkeypatch.setattr(mc, 'MAX_SPEED', 40)
+    mc.gerenciar_movimento("Seguindo Linha", 0, (1.0, 0))
+    for _ in range(100): # Reta longa e limpa: sobe até MAX_SPEED
+        agora[0] += 0.05
+        mc.gerenciar_movimento("Seguindo Linha", 0, (1.0, 0))
+    assert bases[-1] == pytest.approx(40)
+    agora[0] += 0.05
+    mc.gerenciar_movimento("Seguir em Frente", 0, (1.0, 0))
+    assert bases[-1] == pytest.approx(40 - mc.DECEL_LIMIT * 0.05) # Não pula direto para INTERSECTION_SPEED
+    for _ in range(10):
+        agora[0] += 0.05
+        mc.gerenciar_movimento("Seguir em Frente", 0, (1.0, 0))
+    assert bases[-1] == pytest.approx(mc.INTERSECTION_SPEED)
+
+def test_rampa_sobe_devagar(relogio):
+    agora, _ = relogio
+    assert mc._ramp_speed(40) == mc.MIN_SPEED # Sem histórico (saindo de manobra/parada) começa do mínimo
+    agora[0] += 0.1
+    assert mc._ramp_speed(40) == pytest.approx(mc.MIN_SPEED + mc.ACCEL_LIMIT * 0.1)
@@ -0,0 +1,57 @@
+import itertools
+import pytest
+from comum import padroes
+
+TODOS = [dict(zip(padroes.ORDEM_ZONAS, estados)) for estados in itertools.product(padroes.ESTADOS, repeat=len(padroes.ORDEM_ZONAS))]
+
+def cadeia_original(z):
+    """A cadeia de if/elif das interfaces antes da tabela (as duas pastas tinham a mesma)."""
+    if any(estado == "Vermelho" for estado in z.values()): return "Fim de Pista"
+    elif z['BE'] == "Preto" and z['BD'] == "Preto": return "Seguir em Frente"
+    elif z['BD'] == "Verde" and z['BE'] == "Verde": return "Meia Volta"
+    elif z['CE'] == "Preto" and z['CD'] == "Branco" and z['CM'] == "Branco": return "Curva de 90 Esquerda"
+    elif z['CD'] == "Preto" and z['CE'] == "Branco" and z['CM'] == "Branco": return "Curva de 90 Direita"
+    return "Seguindo Linha"
+
+def primeiro_exato(z):
+    """Primeiro padrão de PADROES_OBR que bate sem erro nenhum (a prioridade da lista), ou None."""
+    for _nome, acao, restricoes, _tol in padroes.PADROES_OBR:
+        if all(z[zona] == estado for zona, estado in restricoes.items()): return acao
+    return None
+
+def test_todos_os_codigos_tem_acao():
+    assert len(padroes.TABELA_ACOES) == 4 ** 5 == len(TODOS)
+
+@pytest.mark.parametrize('z', TODOS[::37] + TODOS[-3:])
+def test_codificar_e_decodificar(z):
+    assert padroes.decodificar_zonas(padroes.codificar_zonas(z)) == z
+
+def test_tabela_igual_as_regras_exatas():
+    for z in TODOS:
+        exato = primeiro_exato(z)
+        if exato is not None: assert padroes.decidir(z) == exato, z
+
+def test_tabela_decide_igual_a_cadeia_original():
+    for z in TODOS:
+        assert padroes.decidir(z) == cadeia_original(z), z
+
+CURVAS_COMPLETAS = [
+    ("90 esquerda", "Curva de 90 Esquerda", {'CM': "Branco", 'CE': "Preto", 'CD': "Branco", 'BE': "Branco", 'BD': "Branco"}, 1),
+    ("90 direita",  "Curva de 90 Direita",  {'CM': "Branco", 'CE': "Branco", 'CD': "Preto", 'BE': "Branco", 'BD': "Branco"}, 1),
+]
+
+def test_tolerancia_aceita_uma_zona_errada():
+    tabela = padroes.compilar_padroes(CURVAS_COMPLETAS)
+    z = {'CM': "Verde", 'CE': "Preto", 'CD': "Branco", 'BE': "Branco", 'BD': "Branco"} # CM com ruído
+    assert tabela[padroes.codificar_zonas(z)] == "Curva de 90 Esquerda"
+    z['BE'] = "Preto" # Duas zonas erradas: passa da tolerância
+    assert tabela[padroes.codificar_zonas(z)] == padroes.ACAO_PADRAO
+
+def test_empate_com_erro_entre_acoes_diferentes_e_ambiguo():
+    tabela = padroes.compilar_padroes(CURVAS_COMPLETAS)
+    z = {'CM': "Branco", 'CE': "Branco", 'CD': "Branco", 'BE': "Branco", 'BD': "Branco"} # A uma zona das duas curvas
+    assert tabela[padroes.codificar_zonas(z)] == padroes.ACAO_PADRAO
+
+def test_estado_desconhecido_conta_como_branco():
+    z = {'CM': "???", 'CE': "Preto", 'CD': "Branco", 'BE': "Branco", 'BD': "Branco"}
+    assert padroes.decidir(z) == "Curva de 90 Esquerda"
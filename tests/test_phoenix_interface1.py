@@ -0,0 +1,79 @@
+import importlib.util
+import os
+import sys
+import types
+import cv2
+import numpy as np
+import pytest
+
+PHOENIX = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'phoenix')
+
+class CameraFalsa:
+    """VideoCapture 320x180 com uma linha preta vertical no meio."""
+    def __init__(self, *args): self.centro = 160
+    def isOpened(self): return True
+    def set(self, *args): pass
+    def get(self, prop): return {cv2.CAP_PROP_FRAME_WIDTH: 320, cv2.CAP_PROP_FRAME_HEIGHT: 180}.get(prop, 0)
+    def read(self):
+        frame = np.full((180, 320, 3), 230, np.uint8)
+        frame[:, self.centro - 10:self.centro + 10] = 20
+        return True, frame
+    def release(self): pass
+
+@pytest.fixture
+def rodada(monkeypatch):
+    """TelaRodada da phoenix/interface1.py de verdade, com câmera, ultrassom e motores falsos."""
+    monkeypatch.syspath_prepend(PHOENIX)
+    ultrassom = types.ModuleType('ultrassonico')
+    ultrassom.DISTANCIA_OBSTACULO, ultrassom.distancia = 10, 100
+    ultrassom.medir_distancia = lambda: ultrassom.distancia
+    monkeypatch.setitem(sys.modules, 'ultrassonico', ultrassom)
+    for nome in ('motor_control1', 'phoenix_interface1'): monkeypatch.delitem(sys.modules, nome, raising=False)
+
+    spec = importlib.util.spec_from_file_location('phoenix_interface1', os.path.join(PHOENIX, 'interface1.py'))
+    interface = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, 'phoenix_interface1', interface)
+    spec.loader.exec_module(interface)
+
+    motor = interface.motor_control
+    velocidades, chamadas = {}, []
+    monkeypatch.setattr(motor, 'set_motor_speed', lambda m, v: velocidades.__setitem__(m, v))
+    original = motor.gerenciar_movimento
+    def gerenciar_movimento(*args, **kwargs):
+        chamadas.append((args, kwargs))
+        return original(*args, **kwargs)
+    monkeypatch.setattr(motor, 'gerenciar_movimento', gerenciar_movimento)
+    monkeypatch.setattr(cv2, 'VideoCapture', CameraFalsa)
+
+    calib = {'THRESHOLD_VALUE': 80, 'LOWER_GREEN': np.array([40, 50, 50]), 'UPPER_GREEN': np.array([80, 255, 255]),
+             'LOWER_RED1': np.array([0, 70, 50]), 'UPPER_RED1': np.array([10, 255, 255]),
+             'LOWER_RED2': np.array([170, 70, 50]), 'UPPER_RED2': np.array([180, 255, 255]),
+             'BLACK_PERCENT_THRESH': 50.0, 'GREEN_PERCENT_THRESH': 30.0, 'RED_PERCENT_THRESH': 40.0}
+    app = types.SimpleNamespace(calib_vars=calib, lut_cores=interface.visao.construir_lut(calib), state='rodada')
+    tela = interface.TelaRodada(app)
+    tela.start()
+    yield tela, motor, ultrassom, velocidades, chamadas
+    motor.manobra = None
+
+def test_interface_usa_o_modulo_de_motor_com_manobras(rodada):
+    _, motor, *_ = rodada
+    assert motor.__name__ == 'motor_control1'
+
+def test_seguindo_linha_chega_aos_motores(rodada):
+    tela, _, _, velocidades, chamadas = rodada
+    for _ in range(3): tela.update()
+    assert tela.acao == "Seguindo Linha" and abs(tela.erro) <= 1 # Centroide da linha de 20 px: 159.5
+    assert chamadas[-1] == (("Seguindo Linha", tela.erro), {'linha_detectada': True})
+    assert velocidades['L'] == pytest.approx(15, abs=1) and velocidades['R'] == pytest.approx(15, abs=1)
+
+def test_obstaculo_inicia_o_desvio_sem_bloquear(rodada):
+    tela, motor, ultrassom, velocidades, chamadas = rodada
+    tela.update()
+    ultrassom.distancia = 5
+    tela.update()
+    assert chamadas[-1] == (("Desviando", 0), {'linha_detectada': False})
+    assert motor.manobra is not None and motor.manobra.nome == "Desvio de obstáculo"
+    # Linha de volta na frente: o desvio segue (o começo não é abortável) e cada frame só avança a manobra
+    ultrassom.distancia = 100
+    for _ in range(3): tela.update()
+    assert motor.manobra_em_andamento() and tela.acao == "Seguindo Linha"
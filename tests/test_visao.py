@@ -0,0 +1,87 @@
+import cv2
+import numpy as np
+import pytest
+import calibracao
+from comum import visao
+
+CALIB = calibracao.padrao()
+
+def rotulos_hsv(frame, calib=CALIB):
+    """Os rótulos pelo caminho antigo: HSV e cinza do frame inteiro, máscara por máscara."""
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    vermelho = cv2.inRange(hsv, calib['LOWER_RED1'], calib['UPPER_RED1']) | cv2.inRange(hsv, calib['LOWER_RED2'], calib['UPPER_RED2'])
+    rotulos = np.where(gray <= calib['THRESHOLD_VALUE'], visao.BIT_PRETO, 0).astype(np.uint8)
+    rotulos[cv2.inRange(hsv, calib['LOWER_GREEN'], calib['UPPER_GREEN']) > 0] |= visao.BIT_VERDE
+    rotulos[vermelho > 0] |= visao.BIT_VERMELHO
+    return rotulos
+
+def estado_hsv(frame, zone_roi, calib=CALIB):
+    x, y, w, h = zone_roi
+    rotulos = rotulos_hsv(frame[y:y + h, x:x + w], calib)
+    preto, verde, vermelho = (np.count_nonzero(rotulos & bit) * 100 / rotulos.size for bit in visao.CANAIS_CLASSES)
+    return visao._estado_por_percentual(preto, verde, vermelho, calib)
+
+def pista(ruido=8, semente=0):
+    """Frame 640x360 de pista: fundo branco, linha preta, dois verdes e uma faixa vermelha, com ruído."""
+    frame = np.full((360, 640, 3), (225, 230, 228), np.uint8)
+    cv2.rectangle(frame, (290, 0), (350, 359), (30, 30, 30), -1)
+    cv2.rectangle(frame, (200, 200), (280, 280), (60, 150, 40), -1)
+    cv2.rectangle(frame, (360, 200), (440, 280), (60, 150, 40), -1)
+    cv2.rectangle(frame, (0, 0), (639, 50), (40, 40, 200), -1)
+    gerador = np.random.default_rng(semente)
+    return np.clip(frame + gerador.normal(0, ruido, frame.shape), 0, 255).astype(np.uint8)
+
+ZONAS = {'linha': (295, 100, 50, 80), 'verde E': (210, 210, 60, 60), 'verde D': (370, 210, 60, 60),
+         'vermelho': (100, 5, 200, 40), 'branco': (500, 150, 100, 100), 'borda': (600, 320, 100, 100)}
+ESPERADO = {'linha': "Preto", 'verde E': "Verde", 'verde D': "Verde", 'vermelho': "Vermelho", 'branco': "Branco", 'borda': "Branco"}
+
+@pytest.mark.parametrize('bits', [5, 6])
+def test_lut_igual_ao_hsv_nos_centros_dos_bins(bits):
+    # Nos centros dos bins a LUT é exatamente o HSV; o resto é só quantização
+    n = 1 << bits
+    passo = 256 // n
+    centros = np.arange(n, dtype=np.uint8) * passo + passo // 2
+    b, g, r = np.meshgrid(centros, centros, centros, indexing='ij')
+    frame = np.stack([b, g, r], axis=-1).reshape(n * n, n, 3)
+    lut = visao.construir_lut(CALIB, bits)
+    np.testing.assert_array_equal(visao.classificar_frame(frame, lut, bits), rotulos_hsv(frame))
+
+@pytest.mark.parametrize('bits, minimo', [(5, 0.97), (6, 0.98)])
+def test_lut_concorda_com_hsv_em_cores_aleatorias(bits, minimo):
+    frame = np.random.default_rng(1).integers(0, 256, (120, 160, 3), dtype=np.uint8)
+    lut = visao.construir_lut(CALIB, bits)
+    assert (visao.classificar_frame(frame, lut, bits) == rotulos_hsv(frame)).mean() >= minimo
+
+@pytest.mark.parametrize('semente', range(3))
+def test_estado_das_zonas_igual_ao_hsv(semente):
+    frame = pista(semente=semente)
+    lut = visao.construir_lut(CALIB)
+    for nome, roi in ZONAS.items():
+        esperado = estado_hsv(frame, roi)
+        assert esperado == ESPERADO[nome]
+        assert visao.estado_do_recorte(frame, roi, lut, CALIB) == esperado, nome
+
+def test_recorte_limitado_ao_frame():
+    frame = pista()
+    lut = visao.construir_lut(CALIB)
+    rotulos = visao.classificar_frame(frame, lut)
+    for roi, fatia in (((-20, -20, 50, 50), (slice(0, 30), slice(0, 30))), ((600, 320, 100, 100), (slice(320, 360), slice(600, 640)))):
+        contagem, total = visao.contagem_recorte(frame, roi, lut)
+        esperado = [np.count_nonzero(rotulos[fatia] & bit) for bit in visao.CANAIS_CLASSES]
+        np.testing.assert_array_equal(contagem, esperado)
+        assert total == rotulos[fatia].size
+    contagem, total = visao.contagem_recorte(frame, (700, 0, 10, 10), lut)
+    assert total == 0 and not contagem.any()
+    assert visao.estado_do_recorte(frame, (700, 0, 10, 10), lut, CALIB) == "Branco"
+
+@pytest.mark.parametrize('linhas, colunas', [(6, 8), (5, 7), (1, 1)])
+def test_grade_igual_a_media_de_cada_celula(linhas, colunas):
+    rotulos = visao.classificar_frame(pista(), visao.construir_lut(CALIB))
+    grade = visao.grade_ocupacao(rotulos, linhas, colunas)
+    altura, largura = rotulos.shape[0] // linhas, rotulos.shape[1] // colunas
+    for l in range(linhas):
+        for c in range(colunas):
+            celula = rotulos[l * altura:(l + 1) * altura, c * largura:(c + 1) * largura]
+            esperado = [np.count_nonzero(celula & bit) / celula.size for bit in visao.CANAIS_CLASSES]
+            np.testing.assert_allclose(grade[l, c], esperado)